@@ -0,0 +1,110 @@
+"""Compare video download throughput of the old 8 KiB `iter_content` loop and `stream_to_file`.
+
+A file of random bytes is served by `python -m http.server` in a separate process, so the server does not compete
+with the download for the GIL. Reported per method are the wall clock throughput and the CPU time of this process.
+
+Usage:
+    python benchmarks/bench_download.py [--size-mb 256] [--runs 3]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from tiktokdl.streaming import stream_to_file
+
+
+def iter_content_download(url: str, path: str):
+    with requests.get(url, stream=True, headers={"accept-encoding": "identity"}) as r:
+        r.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in r.iter_content(chunk_size=8192):
+                f.write(chunk)
+
+
+def stream_to_file_download(url: str, path: str):
+    with requests.get(url, stream=True, headers={"accept-encoding": "identity"}) as r:
+        r.raise_for_status()
+        content_length = r.headers.get("content-length")
+        stream_to_file(r.raw, path, int(content_length) if content_length else None)
+
+
+METHODS = {
+    "iter_content(8192)": iter_content_download,
+    "stream_to_file": stream_to_file_download,
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port: int, timeout: float = 10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError("The file server did not start")
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "video.mp4")
+        with open(source, "wb") as file:
+            for _ in range(args.size_mb):
+                file.write(os.urandom(1024 * 1024))
+
+        port = free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "http.server",
+                str(port),
+                "--bind",
+                "127.0.0.1",
+                "--directory",
+                directory,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_server(port)
+            url = f"http://127.0.0.1:{port}/video.mp4"
+            target = os.path.join(directory, "download.mp4")
+
+            print(f"{'method':<20}{'MB/s':>10}{'cpu s':>10}")
+            for name, download in METHODS.items():
+                best_wall = best_cpu = float("inf")
+                for _ in range(args.runs):
+                    wall_start, cpu_start = time.perf_counter(), time.process_time()
+                    download(url, target)
+                    best_wall = min(best_wall, time.perf_counter() - wall_start)
+                    best_cpu = min(best_cpu, time.process_time() - cpu_start)
+                    assert os.path.getsize(target) == args.size_mb * 1024 * 1024
+                    os.remove(target)
+                print(f"{name:<20}{args.size_mb / best_wall:>10.1f}{best_cpu:>10.2f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--runs", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,89 @@
+"""Compare downloading many small slideshow images with a new connection per image against the shared `HttpClient`.
+
+The stand-in adds a fixed delay to every new connection to stand in for the TCP and TLS handshakes with a remote CDN,
+so the difference between the methods is mostly the number of connections each one opens.
+
+Usage:
+    python benchmarks/bench_http.py [--images 200] [--image-kb 48] [--handshake-ms 20]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from urllib.request import urlretrieve
+
+import requests
+
+from standin import StandInServer
+from tiktokdl.download_post import __parse_api_response as parse_api_response
+from tiktokdl.download_post import download_slideshow
+from tiktokdl.http_client import HttpClient
+
+
+def urlretrieve_download(urls, directory):
+    for idx, url in enumerate(urls):
+        urlretrieve(url, os.path.join(directory, f"{idx}.jpeg"))
+
+
+def requests_download(urls, directory):
+    for idx, url in enumerate(urls):
+        with requests.get(url) as r:
+            r.raise_for_status()
+            with open(os.path.join(directory, f"{idx}.jpeg"), "wb") as file:
+                file.write(r.content)
+
+
+def make_shared_client_download(standin: StandInServer):
+    client = HttpClient()
+
+    def download(urls, directory):
+        post = parse_api_response(json.loads(standin.detail_body("1", slideshow=True)))
+        post.images = [{"image_url": [url]} for url in urls]
+        asyncio.run(download_slideshow(post, directory + os.sep, client))
+
+    return client, download
+
+
+def main(args):
+    with StandInServer(
+        image_size=args.image_kb * 1024, handshake_delay=args.handshake_ms / 1000.0
+    ) as standin:
+        urls = [f"{standin.url}/image/{idx}.jpeg" for idx in range(args.images)]
+        client, shared_client_download = make_shared_client_download(standin)
+        methods = {
+            "urlretrieve": urlretrieve_download,
+            "requests.get": requests_download,
+            "HttpClient": shared_client_download,
+        }
+
+        print(f"{'method':<16}{'seconds':>10}{'images/s':>10}{'connections':>13}")
+        for name, method in methods.items():
+            connections = standin.connections
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                method(urls, directory)
+                elapsed = time.perf_counter() - start
+            print(
+                f"{name:<16}{elapsed:>10.3f}{args.images / elapsed:>10.1f}"
+                f"{standin.connections - connections:>13}"
+            )
+
+        metrics = client.metrics
+        print(
+            f"\nHttpClient: {metrics.requests} requests over {metrics.connections} connections "
+            f"({metrics.reuse_ratio:.1%} reused), {metrics.dns_misses} DNS lookups"
+        )
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--image-kb", type=int, default=48)
+    parser.add_argument("--handshake-ms", type=float, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""Measure how long `import tiktokdl` takes in a fresh interpreter.
+
+Each run starts a new interpreter with `-X importtime` and sums the cumulative import time of the top level
+`tiktokdl` imports, eg. `tiktokdl` and `tiktokdl.download_post`, including the dependencies they import. The
+interpreter start up, `site` and `encodings` imports are not counted. Exits with status 1 if the median is above
+`--max-ms`, so it can be used as a CI check.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 20] [--max-ms 50] [--statement "import tiktokdl"]
+"""
+
+import argparse
+import subprocess
+import sys
+from statistics import median
+
+HEAVY_MODULES = ("cv2", "numpy", "requests", "playwright")
+
+
+def import_time(statement: str) -> tuple:
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"{statement}; import sys; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines look like "import time:  self [us] | cumulative | imported package", top level imports are not indented.
+    # Submodules imported by the statement are top level lines of their own, next to their package.
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        name = name.rstrip()
+        if name == " tiktokdl" or name.startswith(" tiktokdl."):
+            total += int(cumulative)
+
+    loaded = set(result.stdout.split())
+    return total / 1000, [module for module in HEAVY_MODULES if module in loaded]
+
+
+def main(args) -> int:
+    times = []
+    heavy = []
+    for _ in range(args.runs):
+        elapsed, heavy = import_time(args.statement)
+        times.append(elapsed)
+
+    result = median(times)
+    print(
+        f"{args.statement!r}: median {result:.1f}ms, min {min(times):.1f}ms over {args.runs} runs"
+    )
+    if heavy:
+        print(f"Heavy modules imported: {', '.join(heavy)}")
+
+    if args.max_ms is not None and result > args.max_ms:
+        print(f"FAIL: median import time is above {args.max_ms}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=None)
+    parser.add_argument("--statement", default="import tiktokdl")
+    sys.exit(main(parser.parse_args()))
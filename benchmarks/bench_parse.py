@@ -0,0 +1,64 @@
+"""Microbenchmark decoding and parsing of the recorded item detail responses.
+
+Each decoder is timed on the raw response body followed by `__parse_api_response`, which is what happens once the
+detail response has been captured. Allocations are measured with tracemalloc over a single decode and parse.
+
+Usage:
+    python benchmarks/bench_parse.py [--number 2000]
+"""
+
+import argparse
+import json
+import timeit
+import tracemalloc
+
+from standin import FIXTURES_PATH, SLIDESHOW_FIXTURE, VIDEO_FIXTURE
+from tiktokdl.download_post import __parse_api_response as parse_api_response
+
+DECODERS = {"json": json.loads}
+try:
+    import orjson
+
+    DECODERS["orjson"] = orjson.loads
+except ImportError:
+    pass
+
+
+def allocations(function, *args) -> tuple:
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    function(*args)
+    snapshot_after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = snapshot_after.compare_to(snapshot_before, "lineno")
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    return blocks, peak
+
+
+def main(args):
+    print(
+        f"{'fixture':<12}{'decoder':<10}{'decode us':>12}{'decode+parse us':>18}{'blocks':>10}{'peak KiB':>10}"
+    )
+    for fixture in (VIDEO_FIXTURE, SLIDESHOW_FIXTURE):
+        body = (FIXTURES_PATH / fixture).read_bytes()
+        for name, decode in DECODERS.items():
+            decode_time = timeit.timeit(lambda: decode(body), number=args.number)
+            total_time = timeit.timeit(
+                lambda: parse_api_response(decode(body)), number=args.number
+            )
+            blocks, peak = allocations(lambda: parse_api_response(decode(body)))
+            print(
+                f"{fixture.split('_')[-1].split('.')[0]:<12}{name:<10}"
+                f"{decode_time / args.number * 1e6:>12.1f}{total_time / args.number * 1e6:>18.1f}"
+                f"{blocks:>10}{peak / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--number", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,132 @@
+"""Compare the per-page cost of the browser context profiles.
+
+For each profile a fresh browser is launched and the same post pages are loaded one after another. Reported per page:
+
+- latency: from navigation start until the item detail response has been received.
+- bytes: the response header and body bytes of every request that finished.
+- cpu: user + system CPU time of the browser and the Playwright driver, measured once the browser has exited.
+
+Usage:
+    python benchmarks/bench_profiles.py [--pages 10] [--browser firefox] [--url URL ...]
+
+By default the pages are served by the local stand-in, pass `--url` to benchmark against real posts instead.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import time
+from statistics import mean
+
+from playwright.async_api import async_playwright
+
+from standin import StandInServer
+from tiktokdl.browser_profiles import PROFILES, new_profile_context
+from tiktokdl.tiktok_magic import ITEM_DETAIL_API_PATH
+
+
+def children_cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def load_page(context, url: str, timeout: float) -> dict:
+    page = await context.new_page()
+    sizes = []
+
+    async def record_size(request):
+        try:
+            request_sizes = await request.sizes()
+        except Exception:
+            return
+        sizes.append(
+            request_sizes["responseHeadersSize"] + request_sizes["responseBodySize"]
+        )
+
+    pending = set()
+    page.on(
+        "requestfinished",
+        lambda request: pending.add(asyncio.ensure_future(record_size(request))),
+    )
+
+    start = time.perf_counter()
+    async with page.expect_response(
+        lambda response: ITEM_DETAIL_API_PATH in response.url, timeout=timeout
+    ):
+        await page.goto(url)
+    latency = time.perf_counter() - start
+
+    # Let the page keep loading for a moment, as it would while the post is parsed and downloaded.
+    await page.wait_for_timeout(500)
+    await page.close()
+    if pending:
+        await asyncio.gather(*pending)
+
+    return {"latency": latency, "bytes": sum(sizes), "requests": len(sizes)}
+
+
+async def bench_profile(browser: str, profile: str, urls: list, timeout: float) -> dict:
+    cpu_before = children_cpu_time()
+    async with async_playwright() as playwright:
+        browser_instance = await getattr(playwright, browser).launch()
+        context = await new_profile_context(playwright, browser_instance, profile)
+        pages = [await load_page(context, url, timeout) for url in urls]
+        await browser_instance.close()
+    cpu = children_cpu_time() - cpu_before
+
+    return {
+        "profile": profile,
+        "pages": len(pages),
+        "latency_ms": mean(page["latency"] for page in pages) * 1000,
+        "kib_per_page": mean(page["bytes"] for page in pages) / 1024,
+        "requests_per_page": mean(page["requests"] for page in pages),
+        "cpu_ms_per_page": cpu / len(pages) * 1000,
+    }
+
+
+async def main(args):
+    standin = None
+    urls = args.url
+    if not urls:
+        standin = StandInServer().start()
+        urls = [
+            standin.post_url(str(7406020582829051179 + n)) for n in range(args.pages)
+        ]
+
+    try:
+        results = [
+            await bench_profile(args.browser, profile, urls, args.timeout)
+            for profile in args.profiles
+        ]
+    finally:
+        if standin is not None:
+            standin.stop()
+
+    print(
+        f"{'profile':<12}{'latency ms':>12}{'KiB/page':>12}{'requests':>10}{'cpu ms':>10}"
+    )
+    for result in results:
+        print(
+            f"{result['profile']:<12}{result['latency_ms']:>12.1f}{result['kib_per_page']:>12.1f}"
+            f"{result['requests_per_page']:>10.1f}{result['cpu_ms_per_page']:>10.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument(
+        "--browser", default="firefox", choices=("chromium", "firefox", "webkit")
+    )
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES))
+    parser.add_argument("--url", nargs="*", default=[])
+    parser.add_argument("--timeout", type=float, default=10000)
+    parser.add_argument("--json", help="Also write the results to this file.")
+    asyncio.run(main(parser.parse_args()))
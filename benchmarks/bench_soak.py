@@ -0,0 +1,185 @@
+"""Soak test: get thousands of posts from the stand-in and check that memory stays flat.
+
+Every post alternates between the recorded video and slideshow fixtures and is downloaded into a temporary directory
+that is emptied after each post. The resident memory of this process and everything it launched (the Playwright
+driver and the browsers) is sampled as the run goes. Once the warm up is over, the memory may not grow by more than
+`--max-growth-mb`, otherwise the script exits with status 1.
+
+With `--offline` the browser is skipped: the detail response is fetched from the stand-in directly and goes through
+the same parsing and download path as `get_post`, which runs without Playwright browsers installed.
+
+Usage:
+    python benchmarks/bench_soak.py [--posts 10000] [--concurrency 4] [--offline] [--max-growth-mb 32]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from standin import StandInServer
+from tiktokdl.browser_pool import BrowserPool
+from tiktokdl.download_post import __process_post as process_post
+from tiktokdl.download_post import get_post
+from tiktokdl.http_client import HttpClient
+from tiktokdl.memory import memory_report
+from tiktokdl.tiktok_magic import ITEM_DETAIL_API_PATH
+
+MB = 1024 * 1024
+
+
+def make_offline_getter(standin: StandInServer, client: HttpClient):
+
+    async def get(post_id: str, slideshow: bool, download_path: str):
+        kind = "slideshow" if slideshow else "video"
+        with client.get(
+            f"{standin.url}{ITEM_DETAIL_API_PATH}",
+            params={"item_id": post_id, "kind": kind},
+        ) as response:
+            headers = {"user-agent": "standin", "cookie": ""}
+            return await process_post(
+                post_id, headers, response.content, True, download_path, client
+            )
+
+    return get
+
+
+def make_browser_getter(standin: StandInServer, pool: BrowserPool, client: HttpClient):
+
+    async def get(post_id: str, slideshow: bool, download_path: str):
+        return await get_post(
+            standin.post_url(post_id, slideshow),
+            pool=pool,
+            download_path=download_path,
+            early_abort=True,
+            http_client=client,
+            retries=0,
+        )
+
+    return get
+
+
+async def soak(args, get, samples: list):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    completed = 0
+    failed = 0
+
+    async def run(idx: int):
+        nonlocal completed, failed
+        async with semaphore:
+            directory = tempfile.mkdtemp(prefix="tiktokdl-soak-")
+            try:
+                await get(
+                    str(7_400_000_000_000_000_000 + idx),
+                    idx % 2 == 1,
+                    directory + os.sep,
+                )
+            except Exception as e:
+                failed += 1
+                if failed <= 5:
+                    print(f"post {idx} failed: {e!r}", file=sys.stderr)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            completed += 1
+            if completed % args.sample_every == 0:
+                sample()
+
+    def sample():
+        # Sampled by post count rather than on a timer, so runs of different speeds can be compared sample by sample.
+        report = memory_report()
+        samples.append((completed, report))
+        print(
+            f"{completed:>8}{report.rss / MB:>12.1f}{(report.children_rss or 0) / MB:>14.1f}"
+            f"{report.total_rss / MB:>12.1f}"
+        )
+
+    print(f"{'posts':>8}{'python MB':>12}{'children MB':>14}{'total MB':>12}")
+    sample()
+    await asyncio.gather(*(run(idx) for idx in range(args.posts)))
+    return failed
+
+
+def main(args):
+    samples = []
+    started = time.perf_counter()
+    with StandInServer(
+        video_size=args.video_kb * 1024, image_size=args.image_kb * 1024
+    ) as standin:
+        with HttpClient() as client:
+            if args.offline:
+                failed = asyncio.run(
+                    soak(args, make_offline_getter(standin, client), samples)
+                )
+            else:
+
+                async def run_with_pool():
+                    async with BrowserPool(
+                        browser=args.browser,
+                        size=args.concurrency,
+                        headless=True,
+                        profile="lightweight",
+                        max_context_uses=args.max_context_uses,
+                        recycle_after=args.recycle_after,
+                        max_rss=args.max_rss_mb * MB if args.max_rss_mb else None,
+                    ) as pool:
+                        failed = await soak(
+                            args, make_browser_getter(standin, pool, client), samples
+                        )
+                        print(
+                            f"browsers launched: {pool.browsers_launched}, contexts created: {pool.contexts_created}"
+                        )
+                        return failed
+
+                failed = asyncio.run(run_with_pool())
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"\n{args.posts} posts ({failed} failed) in {elapsed:.1f}s, {args.posts / elapsed:.1f} posts/s"
+    )
+
+    warm = [
+        report.total_rss for done, report in samples if done >= args.posts * args.warmup
+    ]
+    if len(warm) < 2:
+        print(
+            "Not enough samples after the warm up, use a longer run or a smaller --sample-every"
+        )
+        return 1
+
+    # The first sample after the warm up is the baseline.
+    growth = (max(warm[1:]) - warm[0]) / MB
+    print(
+        f"Memory growth after warm up: {growth:.1f} MB (limit {args.max_growth_mb} MB)"
+    )
+    if failed or growth > args.max_growth_mb:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--posts", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--offline", action="store_true")
+    parser.add_argument(
+        "--browser", default="chromium", choices=["chromium", "firefox", "webkit"]
+    )
+    parser.add_argument("--video-kb", type=int, default=256)
+    parser.add_argument("--image-kb", type=int, default=32)
+    parser.add_argument("--sample-every", type=int, default=250)
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=0.1,
+        help="The fraction of posts before memory is compared",
+    )
+    parser.add_argument("--max-growth-mb", type=float, default=32)
+    parser.add_argument("--max-context-uses", type=int, default=50)
+    parser.add_argument("--recycle-after", type=int, default=2000)
+    parser.add_argument("--max-rss-mb", type=int, default=None)
+    sys.exit(main(parser.parse_args()))
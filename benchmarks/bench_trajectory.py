@@ -0,0 +1,97 @@
+"""Compare the per-step Python loop that used to generate slide trajectories with the vectorised generator.
+
+Each method is timed up to the body of the captcha verify request, as that is where the steps end up: the loop and
+`generate` build a dict per step that is then JSON encoded (twice, for reply and reply2), while the captcha now uses
+`generate_json` to serialise the steps straight from the arrays.
+
+Measured on a single shared core, the median of four runs: at 60, 180 and 300 px the loop took ~80, ~180 and ~300us
+to the request body, `generate` ~95, ~170 and ~240us and `generate_json` ~55, ~65 and ~75us. Building and encoding
+the dicts costs more than generating the arrays, so `generate` is only kept for callers that want the deltas.
+
+Usage:
+    python benchmarks/bench_trajectory.py [--number 5000]
+"""
+
+import argparse
+import json
+import timeit
+from random import randint
+
+from tiktokdl.captcha import __generate_captcha_response as generate_captcha_response
+from tiktokdl.trajectory import TrajectoryGenerator
+
+
+def loop_trajectory(target_position: int, tip_y_value: int):
+    """The previous implementation of `__generate_random_captcha_steps`."""
+    current_position = 0
+    current_time = randint(200, 400)
+    steps = []
+    deltas = []
+    while current_position < target_position:
+        time_step = randint(8, 9)
+        move_step = randint(1, 6)
+
+        current_time += time_step
+        current_position += move_step
+
+        steps.append(
+            {"x": current_position, "y": tip_y_value, "relative_time": current_time}
+        )
+        deltas.append({"x": move_step, "y": randint(-2, 2), "time": time_step})
+
+    return steps, deltas
+
+
+def dict_request_body(steps: list) -> bytes:
+    """The previous body of the verify request, encoded from a dict like Playwright does."""
+    return json.dumps(
+        {
+            "modified_img_width": 552,
+            "id": "captcha-id",
+            "mode": "slide",
+            "reply": steps,
+            "reply2": steps,
+            "verify_id": "verify-id",
+            "version": 2,
+        }
+    ).encode()
+
+
+def main(args):
+    generator = TrajectoryGenerator(seed=0)
+    setup_time = timeit.timeit(lambda: TrajectoryGenerator(seed=0), number=20) / 20
+
+    print(f"template library setup: {setup_time * 1e3:.2f}ms")
+    print(
+        f"{'target px':<12}{'loop us':>10}{'generate us':>14}{'generate_json us':>19}{'arrays only us':>16}"
+    )
+    for target in (60, 180, 300):
+        loop = timeit.timeit(
+            lambda: dict_request_body(loop_trajectory(target, 50)[0]),
+            number=args.number,
+        )
+        dicts = timeit.timeit(
+            lambda: dict_request_body(generator.generate(target, 50)[0]),
+            number=args.number,
+        )
+        serialised = timeit.timeit(
+            lambda: generate_captcha_response(
+                generator.generate_json(target, 50), "captcha-id", "verify-id"
+            ),
+            number=args.number,
+        )
+        arrays = timeit.timeit(
+            lambda: generator.generate_arrays(target, 50), number=args.number
+        )
+        print(
+            f"{target:<12}{loop / args.number * 1e6:>10.1f}{dicts / args.number * 1e6:>14.1f}"
+            f"{serialised / args.number * 1e6:>19.1f}{arrays / args.number * 1e6:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--number", type=int, default=5000)
+    main(parser.parse_args())
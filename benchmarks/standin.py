@@ -0,0 +1,210 @@
+"""A local stand-in for the parts of TikTok that the benchmarks exercise.
+
+The stand-in serves a post page that behaves like the TikTok web app from the point of view of `get_post`: it loads a
+stylesheet, a font, images, an autoplaying video and an analytics script, then calls the item detail API. The detail
+API returns the recorded fixtures in `benchmarks/fixtures`, rewritten so that every media URL points back at the stand-in.
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from typing import Dict
+
+FIXTURES_PATH = Path(__file__).parent / "fixtures"
+
+VIDEO_FIXTURE = "item_detail_video.json"
+SLIDESHOW_FIXTURE = "item_detail_slideshow.json"
+
+POST_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<link rel="stylesheet" href="/static/app.css">
+<script src="/monitor_browser/collect/sdk.js"></script>
+</head>
+<body>
+<img src="/static/avatar.jpeg?page={post_id}">
+<img src="/static/cover.jpeg?page={post_id}">
+<video autoplay muted loop playsinline src="/static/video.mp4?page={post_id}"></video>
+<script>
+fetch("/api/reflow/item/detail/?item_id={post_id}&kind={kind}")
+    .then((response) => response.json())
+    .then((data) => {{ document.title = data.item_info.item_basic.id; }});
+</script>
+</body>
+</html>
+"""
+
+STYLESHEET = b"""
+@font-face { font-family: "TikTokFont"; src: url("/static/font.woff2"); }
+body { font-family: "TikTokFont", sans-serif; }
+video { animation: pulse 1s infinite; }
+@keyframes pulse { from { opacity: 0.9; } to { opacity: 1; } }
+"""
+
+ANALYTICS_SCRIPT = b"""
+setInterval(() => navigator.sendBeacon("/monitor_browser/collect/batch/", "x".repeat(2048)), 250);
+"""
+
+
+def load_fixture(name: str) -> str:
+    with open(FIXTURES_PATH / name, encoding="utf-8") as file:
+        return file.read()
+
+
+class StandInServer:
+    """A threaded HTTP/1.1 server with keep-alive that stands in for TikTok."""
+
+    def __init__(
+        self,
+        video_size: int = 4 * 1024 * 1024,
+        image_size: int = 64 * 1024,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        handshake_delay: float = 0,
+    ):
+        self.video_size = video_size
+        self.image_size = image_size
+        # Added to every new connection, to stand in for the TCP and TLS round trips to a remote CDN.
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._fixtures = {
+            "video": load_fixture(VIDEO_FIXTURE),
+            "slideshow": load_fixture(SLIDESHOW_FIXTURE),
+        }
+        self._static: Dict[str, bytes] = {
+            "/static/video.mp4": os.urandom(video_size),
+            "/static/audio.mp3": os.urandom(image_size),
+            "/static/font.woff2": os.urandom(32 * 1024),
+            "/static/app.css": STYLESHEET,
+            "/monitor_browser/collect/sdk.js": ANALYTICS_SCRIPT,
+        }
+        self._image = os.urandom(image_size)
+        self._server = ThreadingHTTPServer((host, port), self.__make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def post_url(self, post_id: str, slideshow: bool = False) -> str:
+        kind = "photo" if slideshow else "video"
+        return f"{self.url}/@standin/{kind}/{post_id}"
+
+    def set_static(self, path: str, body: bytes):
+        self._static[path] = body
+
+    def set_image(self, body: bytes):
+        self._image = body
+
+    def detail_body(self, post_id: str, slideshow: bool = False) -> bytes:
+        fixture = self._fixtures["slideshow" if slideshow else "video"]
+        data = fixture.replace("{host}", self.url)
+        data = json.loads(data)
+        data["item_info"]["item_basic"]["id"] = post_id
+        return json.dumps(data).encode()
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, sent: int, connection: bool = False):
+        with self._lock:
+            if connection:
+                self.connections += 1
+            else:
+                self.requests += 1
+                self.bytes_sent += sent
+
+    def __make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, without this keep-alive responses stall on delayed ACKs.
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                server._count(0, connection=True)
+                if server.handshake_delay:
+                    time.sleep(server.handshake_delay)
+
+            def log_message(self, *args):
+                pass
+
+            def send_body(self, body: bytes, content_type: str, status: int = 200):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server._count(len(body))
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = url.path.strip("/").split("/")
+
+                if len(parts) == 3 and parts[0].startswith("@"):
+                    kind = "slideshow" if parts[1] == "photo" else "video"
+                    page = POST_PAGE.format(post_id=parts[2], kind=kind)
+                    self.send_body(page.encode(), "text/html; charset=utf-8")
+                elif url.path.startswith("/api/reflow/item/detail/"):
+                    post_id = query.get("item_id", ["0"])[0]
+                    slideshow = query.get("kind", ["video"])[0] == "slideshow"
+                    body = server.detail_body(post_id, slideshow)
+                    self.send_body(body, "application/json")
+                elif url.path in server._static:
+                    content_type = (
+                        "text/css"
+                        if url.path.endswith(".css")
+                        else "application/octet-stream"
+                    )
+                    if url.path.endswith(".js"):
+                        content_type = "application/javascript"
+                    elif url.path.endswith(".mp4"):
+                        content_type = "video/mp4"
+                    self.send_body(server._static[url.path], content_type)
+                elif url.path.endswith(".jpeg"):
+                    self.send_body(server._image, "image/jpeg")
+                else:
+                    self.send_body(b"", "text/plain", status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                self.send_body(b"{}", "application/json")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    with StandInServer() as standin:
+        print(
+            f"Serving stand-in at {standin.url}, eg. {standin.post_url('7406020582829051179')}"
+        )
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
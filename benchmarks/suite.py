@@ -0,0 +1,393 @@
+"""Run the per-stage benchmarks offline, save the results as JSON and compare them with a previous run.
+
+Stages:
+
+- parse: decoding and `__parse_api_response` of the recorded video and slideshow fixtures.
+- captcha: `preprocess` and `find_position` on a synthetic slide challenge, and `__generate_random_captcha_steps`.
+- download: `download_video` and `download_slideshow` throughput from the stand-in.
+- get_post: full `get_post` latency through a `BrowserPool` against the stand-in, at several concurrency levels.
+  Skipped when no Playwright browser can be launched.
+
+Every result records if higher or lower is better, and how noisy it was: the interquartile range of its samples
+relative to their median. With `--compare`, a result that is worse than the previous run by more than `--threshold`,
+and by more than NOISE_FACTOR times the noise of either run, is reported as a regression and the script exits with
+status 1. So are results of the stages that ran that are missing from this run, while stages that were not selected
+or were skipped are not compared.
+
+Usage:
+    python benchmarks/suite.py [--stage parse --stage captcha] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from dataclasses import asdict, dataclass
+from statistics import median, quantiles
+
+from standin import FIXTURES_PATH, SLIDESHOW_FIXTURE, VIDEO_FIXTURE, StandInServer
+
+from typing import Callable, Dict, List, Set, Union
+
+MB = 1024 * 1024
+
+# A change is only counted as a regression if it is larger than this many times the noise of the result.
+NOISE_FACTOR = 2
+
+
+@dataclass()
+class Result:
+    value: float
+    unit: str
+    higher_is_better: bool = False
+    noise: float = 0.0
+
+
+def summarise(
+    samples: List[float], unit: str, higher_is_better: bool = False
+) -> Result:
+    """The median of the samples, with the interquartile range relative to it as the noise."""
+    value = median(samples)
+    noise = 0.0
+    if len(samples) >= 2 and value:
+        lower, _, upper = quantiles(samples, n=4)
+        noise = (upper - lower) / value
+    return Result(value, unit, higher_is_better, noise)
+
+
+def per_call(function: Callable, scale: int = 1, repeat: int = 7) -> Result:
+    """The average time per call in microseconds, over several runs that each take at least 0.2s * scale."""
+    timer = timeit.Timer(function)
+    number = timer.autorange()[0] * scale
+    timings = timer.repeat(number=number, repeat=repeat)
+    return summarise([timing / number * 1e6 for timing in timings], "us")
+
+
+def bench_parse(args) -> Dict[str, Result]:
+    from tiktokdl.download_post import __parse_api_response as parse_api_response
+    from tiktokdl.download_post import json_loads
+
+    results = {}
+    for name, fixture in (("video", VIDEO_FIXTURE), ("slideshow", SLIDESHOW_FIXTURE)):
+        body = (FIXTURES_PATH / fixture).read_bytes()
+        results[f"parse.{name}"] = per_call(
+            lambda: parse_api_response(json_loads(body)), args.scale
+        )
+    return results
+
+
+def synthetic_challenge(seed: int = 0):
+    """A slide challenge at the size TikTok serves it, with the piece cut from a known offset of the background."""
+    import cv2 as cv
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 255, size=(24, 40, 3), dtype=np.uint8)
+    background = cv.resize(blocks, (552, 344), interpolation=cv.INTER_CUBIC)
+    piece = background[120:230, 300:410].copy()
+    return background, piece
+
+
+def bench_captcha(args) -> Dict[str, Result]:
+    import cv2 as cv
+
+    from tiktokdl.captcha import __generate_random_captcha_steps as generate_steps
+    from tiktokdl.image_processing import find_position, preprocess
+    from tiktokdl.tiktok_magic import MODIFIED_IMAGE_WIDTH
+
+    background, piece = synthetic_challenge()
+    ratio = MODIFIED_IMAGE_WIDTH / background.shape[1]
+    background = cv.resize(background, (0, 0), fx=ratio, fy=ratio)
+    piece = cv.resize(piece, (0, 0), fx=ratio, fy=ratio)
+
+    # Warm up the lazily created trajectory generator before timing it.
+    generate_steps(180, 40)
+    return {
+        "captcha.preprocess": per_call(lambda: preprocess(background), args.scale),
+        "captcha.find_position": per_call(
+            lambda: find_position(background, piece), args.scale
+        ),
+        "captcha.steps": per_call(lambda: generate_steps(180, 40), args.scale),
+    }
+
+
+def bench_download(args) -> Dict[str, Result]:
+    from tiktokdl.download_post import __parse_api_response as parse_api_response
+    from tiktokdl.download_post import download_slideshow, download_video
+    from tiktokdl.http_client import HttpClient
+
+    video_size = args.scale * 64 * MB
+    with StandInServer(
+        video_size=video_size, image_size=256 * 1024
+    ) as standin, HttpClient() as client:
+        headers = {"user-agent": "tiktokdl-benchmarks"}
+        video = parse_api_response(json.loads(standin.detail_body("1")))
+        slideshow = parse_api_response(
+            json.loads(standin.detail_body("2", slideshow=True))
+        )
+        slideshow_urls = slideshow.images
+
+        def run(download: Callable) -> List[float]:
+            timings = []
+            for _ in range(5):
+                with tempfile.TemporaryDirectory() as directory:
+                    start = time.perf_counter()
+                    asyncio.run(download(directory + os.sep))
+                    timings.append(time.perf_counter() - start)
+            return timings
+
+        def video_download(directory: str):
+            return download_video(headers, video, directory, client)
+
+        def slideshow_download(directory: str):
+            slideshow.images = slideshow_urls
+            return download_slideshow(slideshow, directory, client)
+
+        video_times = run(video_download)
+        slideshow_times = run(slideshow_download)
+
+    return {
+        "download.video": summarise(
+            [video_size / MB / elapsed for elapsed in video_times],
+            "MB/s",
+            higher_is_better=True,
+        ),
+        "download.slideshow": summarise(
+            [len(slideshow_urls) / elapsed for elapsed in slideshow_times],
+            "images/s",
+            higher_is_better=True,
+        ),
+    }
+
+
+async def get_post_latencies(
+    standin: StandInServer, concurrency: int, posts: int
+) -> List[float]:
+    from tiktokdl.browser_pool import BrowserPool
+    from tiktokdl.download_post import get_post
+
+    latencies = []
+    async with BrowserPool(
+        browser="chromium", size=concurrency, headless=True, profile="lightweight"
+    ) as pool:
+
+        async def timed(idx: int):
+            start = time.perf_counter()
+            await get_post(
+                standin.post_url(str(idx), slideshow=idx % 2 == 1),
+                download=False,
+                pool=pool,
+                retries=0,
+            )
+            latencies.append(time.perf_counter() - start)
+
+        # One post per context first, so browser and context start up is not part of the results.
+        await asyncio.gather(*(timed(idx) for idx in range(concurrency)))
+        latencies.clear()
+        await asyncio.gather(*(timed(idx) for idx in range(posts)))
+    return latencies
+
+
+async def launch_error(browser: str) -> Union[str, None]:
+    """Try to launch a browser, returns why it could not be launched or None if it can."""
+    from playwright.async_api import Error as PlaywrightError
+    from playwright.async_api import async_playwright
+
+    from tiktokdl.browser_pool import launch_browser
+
+    try:
+        async with async_playwright() as playwright:
+            instance = await launch_browser(playwright, browser, headless=True)
+            await instance.close()
+    except (PlaywrightError, OSError) as e:
+        return f"{e.__class__.__name__}: {str(e).splitlines()[0]}"
+    return None
+
+
+def bench_get_post(args) -> Union[Dict[str, Result], None]:
+    error = asyncio.run(launch_error("chromium"))
+    if error is not None:
+        print(
+            f"Skipping get_post, no browser could be launched: {error}", file=sys.stderr
+        )
+        return None
+
+    results = {}
+    with StandInServer() as standin:
+        for concurrency in args.concurrency:
+            posts = max(concurrency * 4, args.scale * 20)
+            start = time.perf_counter()
+            latencies = asyncio.run(get_post_latencies(standin, concurrency, posts))
+            elapsed = time.perf_counter() - start
+
+            results[f"get_post.c{concurrency}.p50"] = Result(
+                median(latencies) * 1000, "ms"
+            )
+            results[f"get_post.c{concurrency}.throughput"] = Result(
+                posts / elapsed, "posts/s", higher_is_better=True
+            )
+    return results
+
+
+STAGES = {
+    "parse": bench_parse,
+    "captcha": bench_captcha,
+    "download": bench_download,
+    "get_post": bench_get_post,
+}
+
+
+def environment() -> dict:
+    try:
+        from importlib.metadata import version
+
+        package_version = version("tiktok-dlpy")
+    except Exception:
+        package_version = None
+
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except Exception:
+        commit = None
+
+    return {
+        "version": package_version,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.time(),
+    }
+
+
+def change(result: Result, previous: dict) -> float:
+    """The relative change of a result from a previous one."""
+    if not previous.get("value"):
+        return 0.0
+    return (result.value - previous["value"]) / previous["value"]
+
+
+def stage_of(name: str) -> str:
+    return name.split(".", 1)[0]
+
+
+def report(
+    results: Dict[str, Result],
+    baseline: Union[dict, None],
+    threshold: float,
+    stages: Set[str],
+) -> List[str]:
+    """Print the results next to the baseline and get the names of the regressions.
+
+    Args:
+        results (Dict[str, Result]): The results of this run.
+        baseline (dict | None): A previous run to compare with.
+        threshold (float): The relative change counted as a regression, unless the results are noisier than that.
+        stages (Set[str]): The stages that ran, results of other stages missing from this run are not compared.
+
+    Returns:
+        List[str]: The names of the results that got worse, or are missing from this run.
+    """
+    regressions = []
+    print(
+        f"{'benchmark':<28}{'value':>14}  {'unit':<10}{'noise':>8}{'baseline':>14}{'change':>10}"
+    )
+    for name, result in results.items():
+        line = f"{name:<28}{result.value:>14.2f}  {result.unit:<10}{result.noise:>8.1%}"
+        previous = (baseline or {}).get("results", {}).get(name)
+        if previous is not None:
+            difference = change(result, previous)
+            line += f"{previous['value']:>14.2f}{difference:>+10.1%}"
+            worse = -difference if result.higher_is_better else difference
+            noise = max(result.noise, previous.get("noise", 0.0))
+            if worse > max(threshold, NOISE_FACTOR * noise):
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    # A benchmark that no longer produces a result, eg. because it failed, counts as a regression too.
+    for name, previous in (baseline or {}).get("results", {}).items():
+        if name not in results and stage_of(name) in stages:
+            print(
+                f"{name:<28}{'':>14}  {previous['unit']:<10}{'':>8}{previous['value']:>14.2f}{'':>10}  MISSING"
+            )
+            regressions.append(name)
+    return regressions
+
+
+def main(args) -> int:
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    results: Dict[str, Result] = {}
+    stages = set()
+    for stage in args.stage or STAGES:
+        stage_results = STAGES[stage](args)
+        # None when the stage was skipped, eg. get_post without a browser.
+        if stage_results is not None:
+            stages.add(stage)
+            results.update(stage_results)
+
+    regressions = report(results, baseline, args.threshold, stages)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    **environment(),
+                    "results": {
+                        name: asdict(result) for name, result in results.items()
+                    },
+                },
+                file,
+                indent=2,
+            )
+
+    if regressions:
+        print(
+            f"\n{len(regressions)} regression(s) of more than {args.threshold:.0%} or the noise: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--stage",
+        action="append",
+        choices=list(STAGES),
+        help="Only run the given stage, can be repeated",
+    )
+    parser.add_argument("--output", help="The file to save the results to as JSON")
+    parser.add_argument(
+        "--compare", help="A results file of a previous run to compare with"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="The relative slow down counted as a regression",
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="Multiplies the work done per benchmark, for steadier results",
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    sys.exit(main(parser.parse_args()))
@@ -13,6 +13,7 @@ setup(
     author="Fluxticks",
     packages=find_packages(),
     install_requires=["playwright", "requests"],
+    extras_require={"fast": ["orjson"]},
     long_description=long_description,
     long_description_content_type="text/markdown",
     description="A package to download TikTok videos or slideshows by URL without needing to login",
@@ -0,0 +1,276 @@
+from unittest import IsolatedAsyncioTestCase, skipUnless
+from unittest.mock import patch
+from asyncio import ensure_future, gather, sleep
+import os
+import subprocess
+import sys
+from tiktokdl.browser_pool import PLAYWRIGHT_DRIVER_COMMAND, BrowserPool
+
+PROCESS_ALLOCATION = 64 * 1024 * 1024
+
+
+def start_process(*args: str) -> subprocess.Popen:
+    """Start a Python process holding PROCESS_ALLOCATION bytes, the args are added to its command line."""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            f"import sys; data = bytearray({PROCESS_ALLOCATION}); print(flush=True); sys.stdin.read()",
+            *args,
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    process.stdout.readline()
+    return process
+
+
+class FakeContext:
+
+    def __init__(self, browser: "FakeBrowser"):
+        self.browser = browser
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+
+    def __init__(self, start_driver: bool = False):
+        self.start_driver = start_driver
+        self.driver = None
+        self.started = 0
+        self.stopped = False
+
+    async def start(self) -> "FakePlaywright":
+        await sleep(0)
+        self.started += 1
+        if self.start_driver:
+            self.driver = start_process(PLAYWRIGHT_DRIVER_COMMAND)
+        return self
+
+    async def stop(self):
+        self.stopped = True
+        if self.driver is not None:
+            self.driver.communicate()
+
+
+class Test_TestBrowserPool(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.playwright = FakePlaywright()
+        self.browsers = []
+
+        async def launch_browser(*args, **kwargs) -> FakeBrowser:
+            browser = FakeBrowser()
+            self.browsers.append(browser)
+            return browser
+
+        async def new_profile_context(playwright, browser, profile) -> FakeContext:
+            return FakeContext(browser)
+
+        patches = [
+            patch("tiktokdl.browser_pool.async_playwright", lambda: self.playwright),
+            patch("tiktokdl.browser_pool.RSS_CHECK_INTERVAL", 0),
+            patch("tiktokdl.browser_pool.launch_browser", launch_browser),
+            patch("tiktokdl.browser_pool.new_profile_context", new_profile_context),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+    async def test_contexts_are_reused(self):
+        async with BrowserPool(size=2) as pool:
+            first = await pool.acquire()
+            second = await pool.acquire()
+            self.assertEqual(2, pool.in_use)
+            self.assertEqual(0, pool.idle)
+
+            await pool.release(first)
+            await pool.release(second, discard=True)
+            self.assertEqual(0, pool.in_use)
+            self.assertEqual(1, pool.idle)
+            self.assertTrue(second.closed)
+
+            self.assertIs(first, await pool.acquire())
+            self.assertEqual(2, pool.contexts_created)
+            self.assertEqual(3, pool.acquisitions)
+            self.assertEqual(2, pool.cold_starts)
+
+        self.assertTrue(self.playwright.stopped)
+        self.assertTrue(self.browsers[0].closed)
+
+    async def test_acquire_waits_for_a_slot(self):
+        async with BrowserPool(size=1) as pool:
+            first = await pool.acquire()
+            waiter = ensure_future(pool.acquire())
+            await sleep(0.01)
+
+            self.assertFalse(waiter.done())
+            self.assertEqual(1, pool.waiting)
+
+            await pool.release(first)
+            self.assertIs(first, await waiter)
+            self.assertEqual(0, pool.waiting)
+
+    async def test_context_manager_discards_on_error(self):
+        async with BrowserPool(size=1) as pool:
+            with self.assertRaises(ValueError):
+                async with pool.context() as context:
+                    raise ValueError()
+
+            self.assertTrue(context.closed)
+            self.assertEqual(0, pool.idle)
+            self.assertEqual(0, pool.in_use)
+
+    async def test_concurrent_acquire_starts_once(self):
+        pool = BrowserPool(size=3)
+        contexts = await gather(*(pool.acquire() for _ in range(3)))
+        await pool.close()
+
+        self.assertEqual(1, self.playwright.started)
+        self.assertEqual(1, len(self.browsers))
+        self.assertTrue(
+            all(context.browser is self.browsers[0] for context in contexts)
+        )
+
+    async def test_offer_keeps_the_pool_size(self):
+        async with BrowserPool(size=2) as pool:
+            first = await pool.acquire()
+            offered = await pool.new_context()
+            await pool.offer(offered)
+            self.assertEqual(1, pool.idle)
+
+            second = await pool.acquire()
+            self.assertIs(offered, second)
+            late_context = await pool.new_context()
+            await pool.offer(late_context)
+            self.assertTrue(late_context.closed)
+            self.assertEqual(0, pool.idle)
+            self.assertEqual(2, pool.in_use)
+
+            await pool.release(first)
+            await pool.release(second)
+
+    async def test_replacement_for_queued_callers(self):
+        async with BrowserPool(size=1) as pool:
+            first = await pool.acquire()
+            waiter = ensure_future(pool.acquire())
+            await sleep(0.01)
+
+            replacement = await pool.new_context()
+            await pool.offer(replacement)
+            extra = await pool.new_context()
+            await pool.offer(extra)
+            self.assertEqual(1, pool.idle)
+            self.assertTrue(extra.closed)
+
+            # The slot of the discarded context goes to the warm replacement.
+            await pool.release(first, discard=True)
+            self.assertIs(replacement, await waiter)
+            self.assertEqual(1, pool.cold_starts)
+
+            await pool.release(replacement)
+            self.assertEqual(1, pool.idle)
+
+    async def test_pool_shrinks_back_after_the_queue(self):
+        async with BrowserPool(size=1) as pool:
+            first = await pool.acquire()
+            waiter = ensure_future(pool.acquire())
+            await sleep(0.01)
+
+            replacement = await pool.new_context()
+            await pool.offer(replacement)
+            await pool.release(first)
+            second = await waiter
+            self.assertEqual(1, pool.idle)
+
+            await pool.release(second)
+            self.assertTrue(second.closed)
+            self.assertEqual(1, pool.idle)
+            self.assertEqual(0, pool.in_use)
+
+    async def test_worn_out_contexts_are_replaced(self):
+        async with BrowserPool(size=1, max_context_uses=2) as pool:
+            first = await pool.acquire()
+            await pool.release(first)
+            self.assertIs(first, await pool.acquire())
+            await pool.release(first)
+
+            self.assertTrue(first.closed)
+            self.assertEqual(0, pool.idle)
+            second = await pool.acquire()
+            self.assertIsNot(first, second)
+            self.assertEqual(2, pool.contexts_created)
+
+    async def test_recycle_after(self):
+        async with BrowserPool(size=1, recycle_after=2) as pool:
+            for _ in range(2):
+                context = await pool.acquire()
+                await pool.release(context)
+
+            idle_context = context
+            context = await pool.acquire()
+
+            self.assertEqual(2, len(self.browsers))
+            self.assertEqual(1, pool.recycles)
+            self.assertTrue(self.browsers[0].closed)
+            self.assertTrue(idle_context.closed)
+            self.assertIs(self.browsers[1], context.browser)
+
+    async def test_replaced_browser_closes_after_last_release(self):
+        async with BrowserPool(size=2, recycle_after=1) as pool:
+            old_context = await pool.acquire()
+            new_context = await pool.acquire()
+            old_browser, new_browser = self.browsers
+
+            self.assertIs(old_browser, old_context.browser)
+            self.assertIs(new_browser, new_context.browser)
+            self.assertFalse(old_browser.closed)
+
+            late_context = FakeContext(old_browser)
+            await pool.offer(late_context)
+            self.assertTrue(late_context.closed)
+            self.assertEqual(0, pool.idle)
+
+            await pool.release(old_context)
+            self.assertTrue(old_context.closed)
+            self.assertTrue(old_browser.closed)
+            self.assertEqual(1, pool.in_use)
+
+            await pool.release(new_context)
+            self.assertFalse(new_browser.closed)
+            self.assertEqual(1, pool.idle)
+
+        self.assertTrue(new_browser.closed)
+
+    @skipUnless(os.path.isdir("/proc"), "Resident memory is read from /proc")
+    async def test_max_rss_only_counts_the_driver(self):
+        self.playwright.start_driver = True
+        # Started by this process like the workers of a MediaProcessor, but not part of the browser.
+        other_process = start_process()
+        try:
+            async with BrowserPool(size=1, max_rss=PROCESS_ALLOCATION * 3 // 2) as pool:
+                rss = pool.browser_rss()
+                self.assertGreater(rss, PROCESS_ALLOCATION)
+                self.assertLess(rss, PROCESS_ALLOCATION * 3 // 2)
+
+                context = await pool.acquire()
+                await pool.release(context)
+                self.assertEqual(0, pool.recycles)
+
+                pool.max_rss = PROCESS_ALLOCATION // 2
+                await pool.acquire()
+                self.assertEqual(1, pool.recycles)
+        finally:
+            other_process.communicate()
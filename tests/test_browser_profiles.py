@@ -0,0 +1,156 @@
+from unittest import IsolatedAsyncioTestCase, TestCase
+from tiktokdl.browser_profiles import (
+    DEFAULT_PROFILE,
+    DISABLE_ANIMATIONS_SCRIPT,
+    LIGHTWEIGHT_PROFILE,
+    MINIMAL_PROFILE,
+    ContextProfile,
+    get_profile,
+    new_profile_context,
+)
+from tiktokdl.tiktok_magic import EMULATED_DEVICE
+
+DEVICE = {
+    "user_agent": "Mozilla/5.0 (iPhone)",
+    "viewport": {"width": 430, "height": 739},
+    "screen": {"width": 430, "height": 932},
+    "device_scale_factor": 3,
+    "is_mobile": True,
+    "has_touch": True,
+}
+
+
+class FakePlaywright:
+
+    def __init__(self):
+        self.devices = {EMULATED_DEVICE: DEVICE}
+
+
+class FakeContext:
+
+    def __init__(self, options: dict):
+        self.options = options
+        self.init_scripts = []
+        self.routes = []
+
+    async def clear_cookies(self):
+        pass
+
+    async def add_init_script(self, script: str):
+        self.init_scripts.append(script)
+
+    async def route(self, url: str, handler):
+        self.routes.append((url, handler))
+
+
+class FakeBrowser:
+
+    async def new_context(self, **options) -> FakeContext:
+        return FakeContext(options)
+
+
+class FakeRequest:
+
+    def __init__(self, resource_type: str, url: str):
+        self.resource_type = resource_type
+        self.url = url
+
+
+class FakeRoute:
+
+    def __init__(self, resource_type: str, url: str):
+        self.request = FakeRequest(resource_type, url)
+        self.result = None
+
+    async def abort(self, error_code: str):
+        self.result = error_code
+
+    async def fallback(self):
+        self.result = "fallback"
+
+
+class Test_TestContextProfile(TestCase):
+
+    def test_should_block(self):
+        self.assertTrue(
+            LIGHTWEIGHT_PROFILE.should_block(
+                "image", "https://p16-sign.tiktokcdn.com/a.jpeg"
+            )
+        )
+        self.assertTrue(
+            LIGHTWEIGHT_PROFILE.should_block(
+                "xhr", "https://mon-va.tiktokv.com/monitor_browser/collect"
+            )
+        )
+        self.assertTrue(
+            LIGHTWEIGHT_PROFILE.should_block(
+                "fetch", "https://v16-webapp.tiktok.com/a/video.mp4?b=1"
+            )
+        )
+        self.assertFalse(
+            LIGHTWEIGHT_PROFILE.should_block("script", "https://www.tiktok.com/app.js")
+        )
+        self.assertFalse(
+            LIGHTWEIGHT_PROFILE.should_block(
+                "stylesheet", "https://www.tiktok.com/app.css"
+            )
+        )
+        self.assertTrue(
+            MINIMAL_PROFILE.should_block("stylesheet", "https://www.tiktok.com/app.css")
+        )
+        self.assertFalse(
+            DEFAULT_PROFILE.should_block("image", "https://mon.tiktokv.com/a.jpeg")
+        )
+
+    def test_custom_url_patterns(self):
+        profile = ContextProfile(
+            name="custom", blocked_url_patterns=(r"\.gif$", r"ads\.")
+        )
+
+        self.assertTrue(profile.blocks_requests)
+        self.assertTrue(profile.should_block("image", "https://example.com/a.gif"))
+        self.assertTrue(profile.should_block("script", "https://ads.example.com/a.js"))
+        self.assertFalse(profile.should_block("image", "https://example.com/a.png"))
+        self.assertFalse(DEFAULT_PROFILE.blocks_requests)
+
+    def test_get_profile(self):
+        custom = ContextProfile(name="custom")
+
+        self.assertIs(DEFAULT_PROFILE, get_profile(None))
+        self.assertIs(MINIMAL_PROFILE, get_profile("minimal"))
+        self.assertIs(custom, get_profile(custom))
+        with self.assertRaises(ValueError):
+            get_profile("tiny")
+
+
+class Test_TestNewProfileContext(IsolatedAsyncioTestCase):
+
+    async def test_default_profile(self):
+        context = await new_profile_context(FakePlaywright(), FakeBrowser(), "default")
+
+        self.assertEqual(DEVICE["viewport"], context.options["viewport"])
+        self.assertNotIn("is_mobile", context.options)
+        self.assertNotIn("reduced_motion", context.options)
+        self.assertEqual([], context.init_scripts)
+        self.assertEqual([], context.routes)
+        self.assertTrue(DEVICE["is_mobile"])
+
+    async def test_minimal_profile(self):
+        context = await new_profile_context(
+            FakePlaywright(), FakeBrowser(), MINIMAL_PROFILE
+        )
+
+        self.assertEqual(MINIMAL_PROFILE.viewport, context.options["viewport"])
+        self.assertEqual(MINIMAL_PROFILE.viewport, context.options["screen"])
+        self.assertEqual("reduce", context.options["reduced_motion"])
+        self.assertEqual(DEVICE["user_agent"], context.options["user_agent"])
+        self.assertEqual([DISABLE_ANIMATIONS_SCRIPT], context.init_scripts)
+
+        ((pattern, handler),) = context.routes
+        self.assertEqual("**/*", pattern)
+        blocked = FakeRoute("stylesheet", "https://www.tiktok.com/app.css")
+        allowed = FakeRoute("document", "https://www.tiktok.com/@user/video/1")
+        await handler(blocked)
+        await handler(allowed)
+        self.assertEqual("blockedbyclient", blocked.result)
+        self.assertEqual("fallback", allowed.result)
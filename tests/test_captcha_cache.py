@@ -0,0 +1,70 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from tiktokdl.captcha_cache import CaptchaSolutionCache
+import os
+import random
+
+
+class Test_TestCaptchaSolutionCache(TestCase):
+
+    def setUp(self):
+        self.background = 0xF0F0_1234_ABCD_FFFF
+        self.piece = 0x0123_4567_89AB_CDEF
+
+    def test_exact_and_near_hits(self):
+        with CaptchaSolutionCache() as cache:
+            self.assertIsNone(cache.get(self.background, self.piece))
+            cache.put(self.background, self.piece, 187)
+
+            self.assertEqual(187, cache.get(self.background, self.piece))
+            self.assertEqual(187, cache.get(self.background ^ 0b101, self.piece ^ 0b1))
+            self.assertIsNone(cache.get(self.background ^ 0xFFFF, self.piece))
+            self.assertEqual((2, 2), (cache.hits, cache.misses))
+
+    def test_bounded_and_persistent(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "captcha.db")
+            with CaptchaSolutionCache(path, max_entries=2) as cache:
+                cache.put(0, 0, 10)
+                cache.put(0xFFFF_FFFF, 0xFFFF_FFFF, 20)
+                cache.put(0xFFFF_FFFF << 32, 0xFFFF_FFFF << 32, 30)
+                self.assertEqual(2, len(cache))
+
+            with CaptchaSolutionCache(path, max_entries=2) as cache:
+                self.assertIsNone(cache.get(0, 0))
+                self.assertEqual(30, cache.get(0xFFFF_FFFF << 32, 0xFFFF_FFFF << 32))
+
+                cache.discard(0xFFFF_FFFF << 32, 0xFFFF_FFFF << 32)
+                self.assertIsNone(cache.get(0xFFFF_FFFF << 32, 0xFFFF_FFFF << 32))
+
+    def test_index_matches_a_full_scan(self):
+        rng = random.Random(0)
+
+        def flip(value: int, bits: int) -> int:
+            for bit in rng.sample(range(64), bits):
+                value ^= 1 << bit
+            return value
+
+        def distance(a: int, b: int) -> int:
+            return bin(a ^ b).count("1")
+
+        entries = {
+            (rng.getrandbits(64), rng.getrandbits(64)): idx for idx in range(2000)
+        }
+        with CaptchaSolutionCache() as cache:
+            for (background, piece), x_offset in entries.items():
+                cache.put(background, piece, x_offset)
+
+            for background, piece in rng.sample(list(entries), 200):
+                query = (
+                    flip(background, rng.randint(0, 6)),
+                    flip(piece, rng.randint(0, 6)),
+                )
+                matches = [
+                    (distance(key[0], query[0]) + distance(key[1], query[1]), x)
+                    for key, x in entries.items()
+                    if distance(key[0], query[0]) <= 4
+                    and distance(key[1], query[1]) <= 4
+                ]
+                expected = min(matches)[1] if matches else None
+                self.assertEqual(expected, cache.get(*query))
@@ -0,0 +1,182 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+from asyncio import Semaphore
+from contextlib import asynccontextmanager
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from tiktokdl.download_post import __capture_detail_response as capture_detail_response
+from tiktokdl.download_post import get_post
+from tiktokdl.tiktok_magic import ITEM_DETAIL_API_GLOB
+
+
+class FakeResponse:
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def body(self) -> bytes:
+        return self._body
+
+
+class FakeRequest:
+
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+    async def all_headers(self) -> dict:
+        return self.headers
+
+
+class FakeRoute:
+
+    def __init__(self, page: "FakePage", body: bytes, headers: dict):
+        self.page = page
+        self.request = FakeRequest(headers)
+        self.response = FakeResponse(body)
+        self.fulfilled = None
+
+    async def fetch(self) -> FakeResponse:
+        return self.response
+
+    async def fulfill(self, response: FakeResponse, body: bytes):
+        if self.page.fulfill_error is not None:
+            raise self.page.fulfill_error
+        if self.page.closed:
+            raise PlaywrightError("Target page, context or browser has been closed")
+        self.fulfilled = body
+
+
+class FakePage:
+
+    def __init__(self, responses: list, events: list = None):
+        self.responses = responses
+        self.events = events if events is not None else []
+        self.routes = {}
+        self.fulfilled = []
+        self.closed = False
+        self.fulfill_error = None
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+        self.events.append("page closed")
+
+    async def route(self, url: str, handler):
+        self.routes[url] = handler
+
+    async def goto(self, url: str, wait_until: str, timeout: float):
+        handler = self.routes[ITEM_DETAIL_API_GLOB]
+        for body, headers in self.responses:
+            route = FakeRoute(self, body, headers)
+            await handler(route)
+            self.fulfilled.append(route.fulfilled)
+
+
+class FakeContext:
+
+    def __init__(self, events: list):
+        self.events = events
+
+    async def new_page(self) -> FakePage:
+        return FakePage([(b"body", {"cookie": "msToken=1"})], self.events)
+
+
+class FakePool:
+
+    proxy = None
+
+    def __init__(self):
+        self.events = []
+        self.pending_bodies = Semaphore(2)
+
+    @asynccontextmanager
+    async def context(self):
+        self.events.append("acquired")
+        yield FakeContext(self.events)
+        self.events.append("released")
+
+
+class Test_TestCaptureDetailResponse(IsolatedAsyncioTestCase):
+
+    async def test_captures_headers_and_body(self):
+        page = FakePage([(b'{"item_info": {}}', {"cookie": "msToken=1"})])
+
+        headers, body = await capture_detail_response(
+            page, "https://tiktok.com/@a/video/1", 1000
+        )
+
+        self.assertEqual({"cookie": "msToken=1"}, headers)
+        self.assertEqual(b'{"item_info": {}}', body)
+        self.assertEqual([body], page.fulfilled)
+
+    async def test_first_capture_wins(self):
+        page = FakePage([(b"first", {"n": "1"}), (b"second", {"n": "2"})])
+
+        headers, body = await capture_detail_response(
+            page, "https://tiktok.com/@a/video/1", 1000
+        )
+
+        self.assertEqual((b"first", {"n": "1"}), (body, headers))
+        # The page still gets every response it asked for.
+        self.assertEqual([b"first", b"second"], page.fulfilled)
+
+    async def test_timeout(self):
+        page = FakePage([])
+
+        with self.assertRaises(PlaywrightTimeoutError):
+            await capture_detail_response(page, "https://tiktok.com/@a/video/1", 50)
+
+    async def test_closed_page_is_ignored(self):
+        page = FakePage([(b"body", {})])
+        page.closed = True
+
+        _, body = await capture_detail_response(
+            page, "https://tiktok.com/@a/video/1", 1000
+        )
+
+        self.assertEqual(b"body", body)
+        self.assertEqual([None], page.fulfilled)
+
+    async def test_fulfill_errors_on_open_page_are_raised(self):
+        page = FakePage([(b"body", {})])
+        page.fulfill_error = PlaywrightError("Route is already handled")
+
+        with self.assertRaises(PlaywrightError):
+            await capture_detail_response(page, "https://tiktok.com/@a/video/1", 1000)
+
+
+class Test_TestEarlyAbort(IsolatedAsyncioTestCase):
+
+    async def get_post_events(self, early_abort: bool) -> list:
+        pool = FakePool()
+
+        async def process_post(url, request_headers, body, *args):
+            pool.events.append("processed")
+            self.assertEqual(
+                (b"body", {"cookie": "msToken=1"}), (body, request_headers)
+            )
+            return body
+
+        with patch("tiktokdl.download_post.__process_post", process_post):
+            result = await get_post(
+                "https://tiktok.com/@a/video/1",
+                download=False,
+                pool=pool,
+                early_abort=early_abort,
+                retries=0,
+            )
+
+        self.assertEqual(b"body", result)
+        return pool.events
+
+    async def test_early_abort_releases_context_before_processing(self):
+        events = await self.get_post_events(early_abort=True)
+
+        self.assertEqual(["acquired", "page closed", "released", "processed"], events)
+
+    async def test_context_is_held_while_processing(self):
+        events = await self.get_post_events(early_abort=False)
+
+        self.assertEqual(["acquired", "processed", "page closed", "released"], events)
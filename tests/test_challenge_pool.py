@@ -0,0 +1,85 @@
+from unittest import IsolatedAsyncioTestCase
+from asyncio import sleep
+from tiktokdl.captcha import ChallengePool
+
+
+class FakeResponse:
+
+    def __init__(self, data):
+        self.data = data
+
+    async def json(self):
+        return self.data
+
+    async def body(self):
+        return self.data
+
+
+class FakeRequestContext:
+
+    def __init__(self, modes):
+        self.modes = list(modes)
+        self.challenges_served = 0
+
+    async def fetch(self, url, **kwargs):
+        await sleep(0.01)
+        mode = self.modes.pop(0) if self.modes else "slide"
+        self.challenges_served += 1
+        return FakeResponse(
+            {
+                "data": {
+                    "id": f"captcha-{self.challenges_served}",
+                    "verify_id": "",
+                    "mode": mode,
+                    "question": {"url1": "background", "url2": "piece", "tip_y": 40},
+                }
+            }
+        )
+
+    async def get(self, url, **kwargs):
+        return FakeResponse(url.encode())
+
+
+class FakePage:
+
+    def __init__(self, modes=()):
+        self.request = FakeRequestContext(modes)
+
+
+class Test_TestChallengePool(IsolatedAsyncioTestCase):
+
+    async def test_skips_other_modes(self):
+        page = FakePage(["3d", "whirl", "slide"])
+        pool = ChallengePool(page, "verify_fp", 1, "token", size=1, parallel_requests=3)
+        challenge = await pool.take()
+        pool.close()
+
+        self.assertEqual("slide", challenge.get("mode"))
+        self.assertEqual(b"background", challenge.get("background_image"))
+        self.assertEqual(b"piece", challenge.get("piece_image"))
+        self.assertEqual(2, pool.challenges_discarded)
+
+    async def test_prefetches_next_challenge(self):
+        page = FakePage()
+        pool = ChallengePool(page, "verify_fp", 1, "token", size=2, parallel_requests=2)
+        first = await pool.take()
+        await sleep(0.05)
+        second = await pool.take()
+        pool.close()
+
+        self.assertNotEqual(first.get("captcha_id"), second.get("captcha_id"))
+        self.assertGreaterEqual(pool.requests_made, 3)
+
+    async def test_gives_up_without_slide(self):
+        page = FakePage(["3d"] * 10)
+        pool = ChallengePool(
+            page,
+            "verify_fp",
+            1,
+            "token",
+            parallel_requests=2,
+            max_requests=4,
+            retry_interval=1,
+        )
+        self.assertIsNone(await pool.take())
+        self.assertEqual(4, page.request.challenges_served)
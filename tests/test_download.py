@@ -0,0 +1,127 @@
+from unittest import IsolatedAsyncioTestCase
+from asyncio import ensure_future, sleep
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+import gzip
+import os
+import threading
+import time
+from tiktokdl.download_post import download_slideshow, download_video
+from tiktokdl.http_client import HttpClient
+from tiktokdl.post_data import MediaInfo
+
+
+class CompressingHandler(BaseHTTPRequestHandler):
+    """Serves a JPEG, compressed when the client accepts gzip, after a short delay."""
+
+    protocol_version = "HTTP/1.1"
+    body = b"\xff\xd8" + bytes(4094)
+    delay = 0.2
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = self.body
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        if "gzip" in self.headers.get("accept-encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FailingProcessor:
+    """Fails to process the second image, and stops working altogether after the third."""
+
+    def __init__(self):
+        self.images = 0
+
+    def image(self, data: bytes, path: str):
+        self.images += 1
+        if self.images > 3:
+            raise BrokenProcessPool()
+        return ensure_future(self.process_image(self.images))
+
+    async def process_image(self, idx: int) -> MediaInfo:
+        if idx == 2:
+            raise ValueError("Could not decode the image")
+        return MediaInfo(1, 1, idx, idx)
+
+    async def video(self, path: str) -> MediaInfo:
+        raise BrokenProcessPool()
+
+
+class Test_TestDownloadSlideshow(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CompressingHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.directory = TemporaryDirectory()
+        self.client = HttpClient()
+
+    def tearDown(self):
+        self.client.close()
+        self.directory.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def slideshow(self, count: int) -> SimpleNamespace:
+        return SimpleNamespace(
+            images=[{"image_url": [f"{self.url}/{idx}.jpeg"]} for idx in range(count)],
+            media_info=None,
+        )
+
+    async def test_images_are_not_encoded(self):
+        slideshow = self.slideshow(2)
+        await download_slideshow(slideshow, self.directory.name, self.client)
+
+        self.assertEqual(2, len(slideshow.images))
+        for path in slideshow.images:
+            with open(path, "rb") as file:
+                self.assertEqual(CompressingHandler.body, file.read())
+
+    async def test_event_loop_is_not_blocked(self):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await sleep(0.01)
+                ticks += 1
+
+        ticker = ensure_future(tick())
+        await download_slideshow(self.slideshow(2), self.directory.name, self.client)
+        ticker.cancel()
+
+        # The two images take at least 0.4s, a blocked loop would only tick between them.
+        self.assertGreater(ticks, 10)
+
+    async def test_processing_errors_leave_media_info_unset(self):
+        slideshow = self.slideshow(4)
+        await download_slideshow(
+            slideshow, self.directory.name, self.client, FailingProcessor()
+        )
+
+        self.assertEqual(4, len(slideshow.images))
+        self.assertEqual(
+            [1, None, 3, None],
+            [info and info.difference_hash for info in slideshow.media_info],
+        )
+
+        video = SimpleNamespace(
+            download_url=f"{self.url}/video.mp4", post_id="1", media_info=None
+        )
+        await download_video(
+            {}, video, self.directory.name, self.client, FailingProcessor()
+        )
+
+        self.assertTrue(os.path.exists(video.file_path))
+        self.assertIsNone(video.media_info)
@@ -0,0 +1,48 @@
+from unittest import TestCase
+import subprocess
+import sys
+
+HEAVY_MODULES = ("cv2", "numpy", "requests", "playwright")
+
+
+class Test_TestLazyImports(TestCase):
+
+    def loaded_modules(self, statement: str) -> set:
+        output = subprocess.check_output(
+            [
+                sys.executable,
+                "-c",
+                f"import sys; {statement}; print(' '.join(sys.modules))",
+            ],
+            text=True,
+        )
+        return set(output.split())
+
+    def test_package_import_is_light(self):
+        loaded = self.loaded_modules("import tiktokdl")
+
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, loaded)
+
+    def test_data_classes_are_light(self):
+        loaded = self.loaded_modules(
+            "from tiktokdl import TikTokVideo, StatsStore, RetryLimitReached"
+        )
+
+        self.assertIn("tiktokdl.post_data", loaded)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, loaded)
+
+    def test_image_processing_does_not_load_requests(self):
+        loaded = self.loaded_modules(
+            "import tiktokdl.image_processing, tiktokdl.media_processing"
+        )
+
+        self.assertIn("cv2", loaded)
+        self.assertNotIn("requests", loaded)
+
+    def test_unknown_attribute(self):
+        import tiktokdl
+
+        with self.assertRaises(AttributeError):
+            tiktokdl.not_a_real_attribute
@@ -0,0 +1,69 @@
+from unittest import IsolatedAsyncioTestCase
+from tempfile import TemporaryDirectory
+import os
+import cv2 as cv
+import numpy as np
+from tiktokdl.image_processing import perceptual_hash
+from tiktokdl.media_processing import MediaProcessor, process_video
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def make_image(seed: int, width: int = 720, height: int = 960) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 255, size=(8, 6, 3), dtype=np.uint8)
+    return cv.resize(blocks, (width, height), interpolation=cv.INTER_CUBIC)
+
+
+def encode(image: np.ndarray, quality: int = 95) -> bytes:
+    return cv.imencode(".jpeg", image, [cv.IMWRITE_JPEG_QUALITY, quality])[1].tobytes()
+
+
+class Test_TestMediaProcessing(IsolatedAsyncioTestCase):
+
+    def test_perceptual_hash_is_robust(self):
+        image = make_image(1)
+        smaller = cv.imdecode(
+            np.frombuffer(encode(cv.resize(image, (360, 480)), 40), np.uint8), -1
+        )
+
+        self.assertLessEqual(
+            hamming_distance(perceptual_hash(image), perceptual_hash(smaller)), 4
+        )
+        self.assertGreater(
+            hamming_distance(perceptual_hash(image), perceptual_hash(make_image(2))), 10
+        )
+
+    async def test_image_from_bytes(self):
+        with TemporaryDirectory() as directory, MediaProcessor(
+            processes=False
+        ) as processor:
+            image_path = os.path.join(directory, "1.jpeg")
+            info = await processor.image(encode(make_image(1)), image_path)
+
+            self.assertEqual((720, 960), (info.width, info.height))
+            self.assertEqual(
+                os.path.join(directory, "1_thumbnail.jpeg"), info.thumbnail_path
+            )
+            self.assertEqual((320, 240), cv.imread(info.thumbnail_path).shape[:2])
+            self.assertFalse(os.path.exists(image_path))
+
+    def test_video_frames_are_sampled(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "video.avi")
+            writer = cv.VideoWriter(
+                path, cv.VideoWriter_fourcc(*"MJPG"), 30, (180, 320)
+            )
+            for idx in range(60):
+                writer.write(cv.resize(make_image(idx // 12), (180, 320)))
+            writer.release()
+
+            info = process_video(path, sample_frames=5)
+
+            self.assertEqual((180, 320), (info.width, info.height))
+            self.assertAlmostEqual(2.0, info.duration)
+            self.assertEqual(5, len(info.frame_hashes))
+            self.assertEqual(5, len(set(info.frame_hashes)))
+            self.assertIsNone(info.thumbnail_path)
@@ -0,0 +1,44 @@
+from unittest import IsolatedAsyncioTestCase, skipUnless
+import os
+import subprocess
+import sys
+from tiktokdl.memory import MemoryMonitor, memory_report, process_tree_rss
+
+CHILD_ALLOCATION = 64 * 1024 * 1024
+
+
+@skipUnless(os.path.isdir("/proc"), "Resident memory is read from /proc")
+class Test_TestMemory(IsolatedAsyncioTestCase):
+
+    def test_includes_children(self):
+        before = process_tree_rss(include_root=False)
+        child = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                f"import sys; data = bytearray({CHILD_ALLOCATION}); print(flush=True); sys.stdin.read()",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        try:
+            child.stdout.readline()
+            self.assertGreater(
+                process_tree_rss(include_root=False) - before, CHILD_ALLOCATION
+            )
+            self.assertGreater(process_tree_rss(), process_tree_rss(include_root=False))
+        finally:
+            child.communicate()
+
+    async def test_monitor_reports(self):
+        reports = []
+        async with MemoryMonitor(
+            reports.append, interval=0.01, trace=True, top=3
+        ) as monitor:
+            data = [bytearray(1024) for _ in range(1000)]
+            report = monitor.report()
+
+        self.assertGreaterEqual(len(reports), 1)
+        self.assertGreater(report.traced_current, len(data) * 1024)
+        self.assertEqual(3, len(report.top_allocations))
+        self.assertIsNone(memory_report().traced_current)
@@ -0,0 +1,108 @@
+from unittest import IsolatedAsyncioTestCase
+from asyncio import sleep
+from tiktokdl.prewarm import SessionPrewarmer
+
+
+class FakeContext:
+
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePool:
+
+    def __init__(self, size: int = 4):
+        self.size = size
+        self.in_use = 0
+        self.waiting = 0
+        self.contexts = []
+        self._idle = []
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def new_context(self):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def offer(self, context):
+        self._idle.append(context)
+
+
+class InstantPrewarmer(SessionPrewarmer):
+
+    def __init__(self, *args, fail: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail = fail
+
+    async def warm(self, context) -> bool:
+        await sleep(0.01)
+        return not self.fail
+
+
+class Test_TestSessionPrewarmer(IsolatedAsyncioTestCase):
+
+    async def test_keeps_standby(self):
+        pool = FakePool()
+        prewarmer = InstantPrewarmer(pool, min_standby=2).start()
+        await sleep(0.3)
+
+        self.assertEqual(2, pool.idle)
+        pool._idle.pop()
+        await sleep(0.3)
+        await prewarmer.stop()
+
+        self.assertEqual(2, pool.idle)
+        self.assertEqual(3, prewarmer.warmed)
+
+    async def test_standby_counts_towards_pool_size(self):
+        pool = FakePool(size=4)
+        pool.in_use = 3
+        prewarmer = InstantPrewarmer(pool, min_standby=2, parallel=4).start()
+        await sleep(0.3)
+
+        self.assertEqual(1, prewarmer.target)
+        self.assertEqual(1, pool.idle)
+
+        pool.in_use = 4
+        pool._idle.pop()
+        await sleep(0.3)
+        await prewarmer.stop()
+
+        self.assertEqual(0, prewarmer.target)
+        self.assertEqual(0, pool.idle)
+        self.assertEqual(1, prewarmer.warmed)
+
+    async def test_replacements_while_callers_are_queued(self):
+        pool = FakePool(size=2)
+        pool.in_use = 2
+        prewarmer = InstantPrewarmer(pool, min_standby=2, parallel=4).start()
+        await sleep(0.3)
+        self.assertEqual(0, pool.idle)
+
+        pool.waiting = 1
+        await sleep(0.3)
+        self.assertEqual(1, prewarmer.target)
+        self.assertEqual(1, pool.idle)
+
+        pool.waiting = 5
+        await sleep(0.3)
+        await prewarmer.stop()
+
+        self.assertEqual(2, prewarmer.target)
+        self.assertEqual(2, pool.idle)
+
+    async def test_failed_contexts_are_closed(self):
+        pool = FakePool()
+        prewarmer = InstantPrewarmer(pool, min_standby=1, fail=True).start()
+        await sleep(0.1)
+        await prewarmer.stop()
+
+        self.assertEqual(0, pool.idle)
+        self.assertGreaterEqual(prewarmer.failed, 1)
+        self.assertTrue(all(context.closed for context in pool.contexts))
@@ -0,0 +1,156 @@
+from unittest import IsolatedAsyncioTestCase
+from contextlib import asynccontextmanager
+import json
+from tiktokdl.download_post import refresh_post_stats
+from tiktokdl.stats_store import StatsStore
+from tiktokdl.tiktok_magic import ITEM_DETAIL_API_URL
+
+
+def detail_body(post_id: str, likes: int) -> bytes:
+    return json.dumps(
+        {
+            "item_info": {
+                "item_basic": {"id": post_id},
+                "item_stats": {
+                    "digg_count": likes,
+                    "share_count": 2,
+                    "comment_count": 3,
+                    "play_count": 400,
+                },
+            }
+        }
+    ).encode()
+
+
+class FakeResponse:
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def body(self) -> bytes:
+        return self._body
+
+
+class FakeRequest:
+
+    def __init__(self, bodies: dict):
+        self.bodies = bodies
+        self.requested = []
+
+    async def get(self, url: str, params: dict, timeout: float) -> FakeResponse:
+        post_id = params["item_id"]
+        self.requested.append((url, post_id))
+        body = self.bodies[post_id]
+        if isinstance(body, Exception):
+            raise body
+        return FakeResponse(body)
+
+
+class FakePage:
+
+    def __init__(self, context: "FakeContext"):
+        self.context = context
+
+    async def goto(self, url: str):
+        self.context.visited.append(url)
+        self.context.session = True
+
+    async def close(self):
+        pass
+
+
+class FakeContext:
+
+    def __init__(self, bodies: dict, session: bool = False):
+        self.request = FakeRequest(bodies)
+        self.session = session
+        self.visited = []
+
+    async def cookies(self) -> list:
+        if not self.session:
+            return []
+        return [{"name": "msToken", "value": "token", "secure": True}]
+
+    async def new_page(self) -> FakePage:
+        return FakePage(self)
+
+
+class FakePool:
+
+    def __init__(self, context: FakeContext):
+        self._context = context
+        self.released = False
+
+    @asynccontextmanager
+    async def context(self):
+        yield self._context
+        self.released = True
+
+
+class Test_TestRefreshPostStats(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.bodies = {
+            "1": detail_body("1", 10),
+            "2": b"<html>Access denied</html>",
+            "3": json.dumps({"item_info": {}}).encode(),
+            "4": TimeoutError("Request timed out"),
+            "5": detail_body("5", 50),
+        }
+        self.post_ids = list(self.bodies)
+
+    async def test_stats_are_parsed(self):
+        context = FakeContext(self.bodies, session=True)
+        pool = FakePool(context)
+
+        with self.assertLogs("tiktokdl.download_post", "WARNING"):
+            results = await refresh_post_stats(self.post_ids, pool=pool)
+
+        self.assertEqual(self.post_ids, list(results))
+        self.assertEqual(10, results["1"].like_count)
+        self.assertEqual(
+            (2, 3, 400),
+            (
+                results["1"].share_count,
+                results["1"].comment_count,
+                results["1"].view_count,
+            ),
+        )
+        self.assertEqual(50, results["5"].like_count)
+        self.assertEqual("5", results["5"].post_id)
+        self.assertTrue(pool.released)
+        self.assertEqual(
+            [(ITEM_DETAIL_API_URL, post_id) for post_id in self.post_ids],
+            context.request.requested,
+        )
+
+    async def test_failures_are_logged_as_none(self):
+        pool = FakePool(FakeContext(self.bodies, session=True))
+
+        with self.assertLogs("tiktokdl.download_post", "WARNING") as logs:
+            results = await refresh_post_stats(self.post_ids, pool=pool)
+
+        self.assertEqual([None, None, None], [results["2"], results["3"], results["4"]])
+        self.assertEqual(3, len(logs.output))
+        self.assertIn("post 3: AttributeError", logs.output[1])
+        self.assertIn("post 4: TimeoutError: Request timed out", logs.output[2])
+
+    async def test_samples_are_stored(self):
+        pool = FakePool(FakeContext(self.bodies, session=True))
+
+        with StatsStore() as store, self.assertLogs(
+            "tiktokdl.download_post", "WARNING"
+        ):
+            await refresh_post_stats(self.post_ids, store=store, pool=pool)
+
+            self.assertEqual(["1", "5"], sorted(store.post_ids()))
+            self.assertEqual(50, store.latest("5").like_count)
+
+    async def test_session_is_only_established_when_missing(self):
+        warm_context = FakeContext({"1": detail_body("1", 10)}, session=True)
+        await refresh_post_stats(["1"], pool=FakePool(warm_context))
+        self.assertEqual([], warm_context.visited)
+
+        cold_context = FakeContext({"1": detail_body("1", 10)})
+        await refresh_post_stats(["1"], pool=FakePool(cold_context))
+        self.assertEqual(1, len(cold_context.visited))
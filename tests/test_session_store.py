@@ -0,0 +1,94 @@
+from unittest import IsolatedAsyncioTestCase
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from tiktokdl.session_store import get_device_id
+from tiktokdl.tiktok_magic import DEVICE_ID_TARGET_COOKIE
+import json
+
+DEVICE_ID_ITEM = {
+    "name": f"{DEVICE_ID_TARGET_COOKIE}_1988",
+    "value": json.dumps({"user_unique_id": "7406020582829051179"}),
+}
+
+
+class FakeContext:
+
+    def __init__(self, states: list):
+        self.states = list(states)
+
+    async def storage_state(self) -> dict:
+        return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+
+class FakePage:
+
+    def __init__(self, states: list):
+        self.context = FakeContext(states)
+
+    async def wait_for_timeout(self, timeout: float):
+        pass
+
+
+class Test_TestSessionStore(IsolatedAsyncioTestCase):
+
+    async def test_waits_for_local_storage(self):
+        page = FakePage(
+            [
+                {"cookies": [], "origins": []},
+                {
+                    "cookies": [],
+                    "origins": [
+                        {"origin": "https://www.tiktok.com", "localStorage": []}
+                    ],
+                },
+                {
+                    "cookies": [],
+                    "origins": [
+                        {
+                            "origin": "https://www.tiktok.com",
+                            "localStorage": [DEVICE_ID_ITEM],
+                        }
+                    ],
+                },
+            ]
+        )
+
+        self.assertEqual(7406020582829051179, await get_device_id(page, 1000, 1))
+
+    async def test_reads_tiktok_origin(self):
+        page = FakePage(
+            [
+                {
+                    "cookies": [],
+                    "origins": [
+                        {
+                            "origin": "https://www.google.com",
+                            "localStorage": [{"name": "other", "value": "1"}],
+                        },
+                        {
+                            "origin": "https://www.tiktok.com",
+                            "localStorage": [DEVICE_ID_ITEM],
+                        },
+                    ],
+                },
+            ]
+        )
+
+        self.assertEqual(7406020582829051179, await get_device_id(page, 1000, 1))
+
+    async def test_other_origins_are_ignored(self):
+        page = FakePage(
+            [
+                {
+                    "cookies": [],
+                    "origins": [
+                        {
+                            "origin": "https://nottiktok.com",
+                            "localStorage": [DEVICE_ID_ITEM],
+                        }
+                    ],
+                },
+            ]
+        )
+
+        with self.assertRaises(PlaywrightTimeoutError):
+            await get_device_id(page, 20, 1)
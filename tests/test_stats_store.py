@@ -0,0 +1,87 @@
+from unittest import TestCase
+from tiktokdl.post_data import TikTokPostStats
+from tiktokdl.stats_store import StatsStore
+import datetime
+import sqlite3
+
+
+class Test_TestStatsStore(TestCase):
+
+    def setUp(self):
+        self.store = StatsStore()
+        self.post_id = "7406020582829051179"
+
+    def tearDown(self):
+        self.store.close()
+
+    def sample(self, hour: int, likes: int, views: int) -> TikTokPostStats:
+        return TikTokPostStats(
+            post_id=self.post_id,
+            timestamp=datetime.datetime(
+                2024, 8, 22, hour, tzinfo=datetime.timezone.utc
+            ),
+            like_count=likes,
+            share_count=0,
+            comment_count=0,
+            view_count=views,
+        )
+
+    def test_unchanged_samples_are_skipped(self):
+        written = self.store.append_many(
+            [self.sample(1, 10, 100), self.sample(2, 10, 100), self.sample(3, 12, 150)]
+        )
+
+        self.assertEqual(2, written)
+        self.assertEqual(2, len(self.store))
+        self.assertFalse(self.store.append(self.sample(4, 12, 150)))
+
+    def test_samples_with_missing_counters_are_skipped(self):
+        sample = self.sample(2, 10, 100)
+        sample.view_count = None
+
+        written = self.store.append_many(
+            [self.sample(1, 10, 100), sample, self.sample(3, 10, 120)]
+        )
+
+        self.assertEqual(2, written)
+        self.assertEqual(
+            [100, 20], [delta.view_count for delta in self.store.deltas(self.post_id)]
+        )
+
+    def test_failed_insert_is_not_cached(self):
+        self.store._connection.execute(
+            "CREATE TRIGGER fail BEFORE INSERT ON post_stats BEGIN SELECT RAISE(ABORT, 'full'); END"
+        )
+        with self.assertRaises(sqlite3.DatabaseError):
+            self.store.append(self.sample(1, 10, 100))
+        self.store._connection.execute("DROP TRIGGER fail")
+
+        self.assertTrue(self.store.append(self.sample(2, 10, 100)))
+        self.assertEqual(1, len(self.store))
+
+    def test_range_query(self):
+        self.store.append_many(
+            [self.sample(hour, hour, hour * 10) for hour in range(10)]
+        )
+
+        samples = self.store.samples(
+            self.post_id,
+            start=datetime.datetime(2024, 8, 22, 3, tzinfo=datetime.timezone.utc),
+            end=datetime.datetime(2024, 8, 22, 5, tzinfo=datetime.timezone.utc),
+        )
+
+        self.assertEqual([3, 4, 5], [sample.like_count for sample in samples])
+        self.assertEqual(self.sample(9, 9, 90), self.store.latest(self.post_id))
+
+    def test_deltas(self):
+        self.store.append_many(
+            [self.sample(1, 10, 100), self.sample(2, 15, 160), self.sample(3, 16, 200)]
+        )
+
+        deltas = self.store.deltas(
+            self.post_id,
+            start=datetime.datetime(2024, 8, 22, 2, tzinfo=datetime.timezone.utc),
+        )
+
+        self.assertEqual([5, 1], [delta.like_count for delta in deltas])
+        self.assertEqual([60, 40], [delta.view_count for delta in deltas])
@@ -0,0 +1,100 @@
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from tiktokdl import streaming
+from tiktokdl.streaming import AdaptiveChunker, stream_to_file
+import io
+import os
+import threading
+
+
+class TrickleStream(io.RawIOBase):
+    """A stream that returns at most `max_read` bytes per read, like a socket."""
+
+    def __init__(self, data: bytes, max_read: int):
+        self.data = io.BytesIO(data)
+        self.max_read = max_read
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.data.readinto(memoryview(buffer)[: self.max_read])
+
+
+class Test_TestStreaming(TestCase):
+
+    def test_stream_to_file(self):
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        seen = []
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "video.mp4")
+            written = stream_to_file(
+                TrickleStream(data, 10000),
+                path,
+                content_length=len(data) + 4096,
+                on_data=lambda view: seen.append(len(view)),
+            )
+
+            with open(path, "rb") as file:
+                self.assertEqual(data, file.read())
+
+        self.assertEqual(len(data), written)
+        self.assertEqual(len(data), sum(seen))
+        self.assertLess(len(seen), len(data) // 10000)
+
+    def stream_in_thread(self, *streams: tuple) -> list:
+        """Stream (data, content_length) pairs to files in a new thread, returns the buffer used for each."""
+        buffers = []
+
+        def run():
+            with TemporaryDirectory() as directory:
+                path = os.path.join(directory, "image.jpeg")
+                for data, content_length in streams:
+                    stream_to_file(TrickleStream(data, 10000), path, content_length)
+                    with open(path, "rb") as file:
+                        self.assertEqual(data, file.read())
+                    buffers.append(streaming._buffers.buffer)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        return buffers
+
+    def test_buffer_is_sized_to_the_content(self):
+        image = os.urandom(40 * 1024)
+        (buffer,) = self.stream_in_thread((image, len(image)))
+
+        self.assertEqual(len(image), len(buffer))
+
+    def test_buffer_is_reused(self):
+        small, large = os.urandom(40 * 1024), os.urandom(300 * 1024)
+        buffers = self.stream_in_thread(
+            (small, len(small)),
+            (small, len(small)),
+            (large, len(large)),
+            (small, len(small)),
+        )
+
+        self.assertIs(buffers[0], buffers[1])
+        self.assertIsNot(buffers[1], buffers[2])
+        self.assertIs(buffers[2], buffers[3])
+        self.assertEqual(len(large), len(buffers[3]))
+
+    def test_wrong_or_missing_content_length(self):
+        data = os.urandom(200 * 1024 + 3)
+        buffers = self.stream_in_thread((data, 1000), (data, None))
+
+        self.assertEqual(1000, len(buffers[0]))
+        self.assertEqual(streaming.MAX_CHUNK_SIZE, len(buffers[1]))
+
+    def test_chunker_bounds(self):
+        chunker = AdaptiveChunker(min_size=1024, max_size=1024 * 1024)
+
+        for _ in range(20):
+            chunker.update(chunker.size, 1e-3)
+        self.assertEqual(1024 * 1024, chunker.size)
+
+        for _ in range(50):
+            chunker.update(chunker.size, 10)
+        self.assertEqual(1024, chunker.size)
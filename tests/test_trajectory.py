@@ -0,0 +1,125 @@
+from unittest import TestCase
+from tiktokdl.trajectory import (
+    START_DELAY_RANGE,
+    STEP_INTERVAL_RANGE,
+    TrajectoryGenerator,
+)
+from tiktokdl.captcha import __generate_captcha_response as generate_captcha_response
+import json
+import numpy as np
+
+
+class Test_TestTrajectory(TestCase):
+
+    def setUp(self):
+        self.generator = TrajectoryGenerator(seed=1234)
+
+    def test_step_format(self):
+        steps, deltas = self.generator.generate(187, 42)
+
+        self.assertEqual(len(steps), len(deltas))
+        self.assertEqual({"x", "y", "relative_time"}, set(steps[-1]))
+        self.assertEqual({"x", "y", "time"}, set(deltas[-1]))
+        self.assertEqual(187, steps[-1]["x"])
+        self.assertEqual(42, steps[-1]["y"])
+        self.assertEqual(187, sum(delta["x"] for delta in deltas))
+        self.assertTrue(all(isinstance(step["x"], int) for step in steps))
+
+    def test_json_steps(self):
+        steps = json.loads(TrajectoryGenerator(seed=7).generate_json(120, 30))
+
+        self.assertEqual(TrajectoryGenerator(seed=7).generate(120, 30)[0], steps)
+
+    def test_captcha_response(self):
+        steps = self.generator.generate_json(187, 42)
+        response = json.loads(
+            generate_captcha_response(steps, "captcha-id", 'verify"id')
+        )
+
+        self.assertEqual(json.loads(steps), response["reply"])
+        self.assertEqual(response["reply"], response["reply2"])
+        self.assertEqual('verify"id', response["verify_id"])
+        self.assertEqual(
+            {
+                "modified_img_width",
+                "id",
+                "mode",
+                "reply",
+                "reply2",
+                "verify_id",
+                "version",
+            },
+            set(response),
+        )
+
+    def test_short_targets(self):
+        for target in (0, 1, 3):
+            steps, _ = self.generator.generate(target, 10)
+            self.assertGreaterEqual(len(steps), 2)
+            self.assertEqual(target, steps[-1]["x"])
+
+    def test_seeded_generators_repeat(self):
+        self.assertEqual(
+            TrajectoryGenerator(seed=7).generate(120, 30),
+            TrajectoryGenerator(seed=7).generate(120, 30),
+        )
+
+    def test_timing_distribution(self):
+        start_delays = []
+        intervals = []
+        overshoots = 0
+        for target in np.random.default_rng(0).integers(40, 280, size=2000):
+            x, y, times, step_intervals = self.generator.generate_arrays(
+                int(target), 50
+            )
+
+            self.assertTrue(np.all(x >= 0))
+            self.assertTrue(np.all(np.abs(y - 50) <= 2))
+            self.assertTrue(np.all(np.diff(times) > 0))
+            self.assertLess(x.max(), target * 1.15 + 2)
+            overshoots += x.max() > target
+
+            start_delays.append(times[0] - step_intervals[0])
+            intervals.extend(step_intervals)
+
+        start_delays = np.array(start_delays)
+        intervals = np.array(intervals)
+
+        # Intervals are uniform over the inclusive range, so the mean sits in the middle.
+        self.assertTrue(
+            np.all(
+                (intervals >= STEP_INTERVAL_RANGE[0])
+                & (intervals <= STEP_INTERVAL_RANGE[1])
+            )
+        )
+        self.assertAlmostEqual(
+            np.mean(STEP_INTERVAL_RANGE), intervals.mean(), delta=0.02
+        )
+
+        # Kolmogorov-Smirnov distance of the start delays from a uniform distribution, 0.05 is well above the
+        # critical value of ~0.03 for 2000 samples at a 5% significance level.
+        low, high = START_DELAY_RANGE
+        ordered = np.sort(start_delays)
+        expected = (ordered - low + 1) / (high - low + 1)
+        observed = np.arange(1, len(ordered) + 1) / len(ordered)
+        self.assertLess(np.max(np.abs(observed - expected)), 0.05)
+
+        # Most slides overshoot a little, but not all of them.
+        self.assertGreater(overshoots, 2000 * 0.3)
+        self.assertLess(overshoots, 2000)
+
+    def test_slides_accelerate(self):
+        speeds = []
+        for _ in range(500):
+            x, _, _, _ = self.generator.generate_arrays(200, 50)
+            speed = np.diff(x)
+            tenth = max(1, len(speed) // 10)
+            speeds.append(
+                (
+                    speed[:tenth].mean(),
+                    speed[len(speed) // 3 : 2 * len(speed) // 3].mean(),
+                )
+            )
+
+        start_speed, middle_speed = np.mean(speeds, axis=0)
+        self.assertLess(start_speed, middle_speed)
@@ -0,0 +1,211 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+import json
+from tiktokdl.captcha import ChallengePool, verify_session
+from tiktokdl.captcha_cache import CaptchaSolutionCache
+
+IMAGE_HASHES = {
+    b"background-1": 0xF0F0_1234_ABCD_FFFF,
+    b"piece-1": 0x0123_4567_89AB_CDEF,
+}
+SOLUTION = 120
+
+
+class FakeResponse:
+
+    def __init__(self, data):
+        self.data = data
+
+    async def json(self):
+        return self.data
+
+    async def body(self):
+        return self.data
+
+
+class FakeRequestContext:
+    """Serves slide challenges that all use the same images, and verifies a reply ending at `solution`."""
+
+    def __init__(self, solution: int):
+        self.solution = solution
+        self.challenges_served = 0
+        self.verified = []
+
+    async def fetch(
+        self, url: str, method: str, params: dict, headers: dict, data=None
+    ):
+        if url.endswith("/captcha/verify"):
+            x = json.loads(data)["reply"][-1]["x"]
+            self.verified.append(x)
+            message = "Verification complete" if x == self.solution else "Failed"
+            return FakeResponse({"message": message})
+
+        self.challenges_served += 1
+        return FakeResponse(
+            {
+                "data": {
+                    "id": f"captcha-{self.challenges_served}",
+                    "verify_id": "",
+                    "mode": "slide",
+                    "question": {
+                        "url1": "background-1",
+                        "url2": "piece-1",
+                        "tip_y": 40,
+                    },
+                }
+            }
+        )
+
+    async def get(self, url: str):
+        return FakeResponse(url.encode())
+
+
+class FakePage:
+
+    def __init__(self, solution: int = SOLUTION):
+        self.request = FakeRequestContext(solution)
+
+
+class TrackingPool(ChallengePool):
+
+    closed = False
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+def decode_challenge_images(background_data: bytes, piece_data: bytes):
+    return (
+        background_data,
+        piece_data,
+        (IMAGE_HASHES[background_data], IMAGE_HASHES[piece_data]),
+    )
+
+
+def patch_solver(test_case) -> list:
+    """Patch out decoding and solving the challenge images, returns the list of images passed to the solver."""
+    located = []
+
+    def locate_piece(background, piece) -> int:
+        located.append((background, piece))
+        return SOLUTION
+
+    patches = [
+        patch("tiktokdl.captcha.__decode_challenge_images", decode_challenge_images),
+        patch("tiktokdl.captcha.__locate_piece", locate_piece),
+    ]
+    for item in patches:
+        item.start()
+        test_case.addCleanup(item.stop)
+    return located
+
+
+class Test_TestVerifySessionCache(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.page = FakePage()
+        self.located = patch_solver(self)
+        self.cache = CaptchaSolutionCache()
+        self.addCleanup(self.cache.close)
+
+    async def verify(self, max_attempts: int = 3) -> bool:
+        pool = ChallengePool(self.page, "verify_fp", 1, "token", size=1)
+        try:
+            return await verify_session(
+                self.page,
+                solution_cache=self.cache,
+                challenge_pool=pool,
+                max_attempts=max_attempts,
+            )
+        finally:
+            pool.close()
+
+    async def test_hit_skips_the_solver(self):
+        self.cache.put(*IMAGE_HASHES.values(), SOLUTION)
+
+        self.assertTrue(await self.verify())
+        self.assertEqual([], self.located)
+        self.assertEqual([SOLUTION], self.page.request.verified)
+        self.assertEqual((1, 0), (self.cache.hits, self.cache.misses))
+
+    async def test_verified_miss_is_stored(self):
+        self.assertTrue(await self.verify())
+
+        self.assertEqual([(b"background-1", b"piece-1")], self.located)
+        self.assertEqual(SOLUTION, self.cache.get(*IMAGE_HASHES.values()))
+
+    async def test_failed_cached_offset_is_discarded(self):
+        self.cache.put(*IMAGE_HASHES.values(), 90)
+
+        self.assertFalse(await self.verify(max_attempts=1))
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual([], self.located)
+
+        # The next challenge goes to the solver, and its verified offset replaces the stale one.
+        self.assertTrue(await self.verify())
+        self.assertEqual([90, SOLUTION], self.page.request.verified)
+        self.assertEqual(1, len(self.located))
+        self.assertEqual(SOLUTION, self.cache.get(*IMAGE_HASHES.values()))
+
+
+class Test_TestVerifySession(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patch_solver(self)
+
+    async def test_next_challenge_after_failed_verify(self):
+        page = FakePage()
+        # The solver is wrong for the first two challenges.
+        solutions = iter([80, 100, SOLUTION])
+        pool = ChallengePool(page, "verify_fp", 1, "token", size=2)
+
+        with patch("tiktokdl.captcha.__locate_piece", lambda *_: next(solutions)):
+            self.assertTrue(await verify_session(page, challenge_pool=pool))
+        pool.close()
+
+        self.assertEqual([80, 100, SOLUTION], page.request.verified)
+        self.assertGreaterEqual(page.request.challenges_served, 3)
+
+    async def test_gives_up_after_max_attempts(self):
+        page = FakePage(solution=SOLUTION + 1)
+        pool = ChallengePool(page, "verify_fp", 1, "token")
+
+        self.assertFalse(
+            await verify_session(page, challenge_pool=pool, max_attempts=2)
+        )
+        pool.close()
+
+        self.assertEqual([SOLUTION, SOLUTION], page.request.verified)
+
+    async def test_no_challenge(self):
+        page = FakePage()
+        pool = ChallengePool(page, "verify_fp", 1, "token")
+
+        async def take():
+            return None
+
+        pool.take = take
+        self.assertFalse(await verify_session(page, challenge_pool=pool))
+        pool.close()
+
+        self.assertEqual([], page.request.verified)
+
+    async def test_only_the_temporary_pool_is_closed(self):
+        page = FakePage()
+        pools = []
+
+        async def for_page(page, cookie_timeout, **kwargs):
+            pool = TrackingPool(page, "verify_fp", 1, "token")
+            pool.fill()
+            pools.append(pool)
+            return pool
+
+        with patch.object(ChallengePool, "for_page", for_page):
+            self.assertTrue(await verify_session(page))
+        self.assertTrue(pools[0].closed)
+
+        own_pool = TrackingPool(page, "verify_fp", 1, "token")
+        self.assertTrue(await verify_session(page, challenge_pool=own_pool))
+        self.assertFalse(own_pool.closed)
+        own_pool.close()
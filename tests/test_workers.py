@@ -0,0 +1,93 @@
+from unittest import TestCase
+from queue import Queue
+from tempfile import TemporaryDirectory
+from tiktokdl.workers import WorkerSupervisor, _take_url
+import os
+
+
+async def handler(url: str, pool, crash_marker: str = None) -> str:
+    """Crash the worker for URLs starting with "crash", and for "crash-once" URLs only the first time."""
+    if url.startswith("crash-once"):
+        if not os.path.exists(crash_marker):
+            open(crash_marker, "w").close()
+            os._exit(3)
+    elif url.startswith("crash"):
+        os._exit(3)
+    if url.startswith("fail"):
+        raise ValueError(url)
+    return url.upper()
+
+
+class Test_TestTakeUrl(TestCase):
+
+    def test_own_queue_first(self):
+        queues = [Queue(), Queue()]
+        queues[0].put("a")
+        queues[1].put("b")
+
+        self.assertEqual(("a", False), _take_url(0, queues))
+        self.assertEqual(("b", False), _take_url(1, queues))
+
+    def test_steals_when_empty(self):
+        queues = [Queue(), Queue(), Queue()]
+        queues[2].put("c")
+
+        self.assertEqual(("c", True), _take_url(0, queues))
+        self.assertEqual((None, False), _take_url(0, queues))
+
+
+class Test_TestWorkerSupervisor(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.crash_marker = os.path.join(self.directory.name, "crashed")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_supervisor(self, urls, concurrency: int = 1, **kwargs):
+        supervisor = WorkerSupervisor(
+            workers=2,
+            concurrency=concurrency,
+            handler=handler,
+            crash_marker=self.crash_marker,
+            **kwargs,
+        )
+        results = {result.url: result for result in supervisor.run(urls)}
+        self.assertEqual(sorted(urls), sorted(results))
+        return supervisor, results
+
+    def test_results(self):
+        urls = [f"url-{idx}" for idx in range(10)] + ["fail-1"]
+        supervisor, results = self.run_supervisor(urls, concurrency=2)
+
+        self.assertEqual("URL-3", results["url-3"].post)
+        self.assertIn("ValueError", results["fail-1"].error)
+        self.assertEqual(11, supervisor.metrics.processed)
+        self.assertEqual(1, supervisor.metrics.failed)
+        self.assertEqual(0, supervisor.metrics.restarts)
+        self.assertEqual(2, len(supervisor.metrics.per_worker))
+
+    def test_crash_requeues(self):
+        urls = ["crash-once"] + [f"url-{idx}" for idx in range(4)]
+        supervisor, results = self.run_supervisor(urls)
+
+        self.assertEqual("CRASH-ONCE", results["crash-once"].post)
+        self.assertTrue(all(result.error is None for result in results.values()))
+        self.assertEqual(1, supervisor.metrics.restarts)
+
+    def test_gives_up_after_max_attempts(self):
+        urls = ["crash"] + [f"url-{idx}" for idx in range(4)]
+        supervisor, results = self.run_supervisor(urls, max_attempts=2, max_restarts=3)
+
+        self.assertIn("Worker crashed", results["crash"].error)
+        self.assertEqual(2, supervisor.metrics.restarts)
+        self.assertEqual(1, supervisor.metrics.failed)
+
+    def test_gives_up_without_workers(self):
+        urls = ["crash"] + [f"url-{idx}" for idx in range(4)]
+        supervisor, results = self.run_supervisor(urls, max_attempts=10, max_restarts=0)
+
+        self.assertIn("No worker was left", results["crash"].error)
+        self.assertEqual(1, supervisor.metrics.failed)
+        self.assertEqual(0, supervisor.metrics.restarts)
@@ -1,6 +1,6 @@
-from tiktokdl import *
-
 import sys
+from importlib import import_module
+
 if sys.version_info[0] == 3 and sys.version_info[1] < 9:
     import logging
     logging.warning(
@@ -8,3 +8,49 @@ if sys.version_info[0] == 3 and sys.version_info[1] < 9:
     )
     import ssl
     ssl._create_default_https_context = ssl._create_unverified_context
+
+# Public names and the submodule they live in. Submodules are only imported when one of their names is first used,
+# so importing the package does not pull in Playwright, requests, OpenCV or NumPy.
+_LAZY_ATTRIBUTES = {
+    "get_post": "tiktokdl.download_post",
+    "refresh_post_stats": "tiktokdl.download_post",
+    "download_video": "tiktokdl.download_post",
+    "download_slideshow": "tiktokdl.download_post",
+    "BrowserPool": "tiktokdl.browser_pool",
+    "ContextProfile": "tiktokdl.browser_profiles",
+    "HttpClient": "tiktokdl.http_client",
+    "MediaInfo": "tiktokdl.post_data",
+    "MediaProcessor": "tiktokdl.media_processing",
+    "MemoryMonitor": "tiktokdl.memory",
+    "ChallengePool": "tiktokdl.captcha",
+    "verify_session": "tiktokdl.captcha",
+    "TikTokPost": "tiktokdl.post_data",
+    "TikTokPostStats": "tiktokdl.post_data",
+    "TikTokSlide": "tiktokdl.post_data",
+    "TikTokVideo": "tiktokdl.post_data",
+    "SessionPrewarmer": "tiktokdl.prewarm",
+    "StatsStore": "tiktokdl.stats_store",
+    "WorkerResult": "tiktokdl.workers",
+    "WorkerSupervisor": "tiktokdl.workers",
+    "CaptchaFailedException": "tiktokdl.exceptions",
+    "DownloadFailedException": "tiktokdl.exceptions",
+    "ResponseParseException": "tiktokdl.exceptions",
+    "RetryLimitReached": "tiktokdl.exceptions",
+    "TikTokBaseException": "tiktokdl.exceptions",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,388 @@
+import inspect
+import time
+from asyncio import Lock, Semaphore
+from contextlib import asynccontextmanager
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from tiktokdl.browser_profiles import ContextProfile, new_profile_context
+from tiktokdl.memory import find_child_processes, process_tree_rss
+
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Literal, Union
+
+if TYPE_CHECKING:
+    from tiktokdl.prewarm import SessionPrewarmer
+
+__all__ = ["BrowserPool", "launch_browser"]
+
+# The minimum number of seconds between two checks of the browser memory, as each check scans /proc.
+RSS_CHECK_INTERVAL = 5
+
+# Part of the command line of the Playwright driver process, which launches the browsers.
+PLAYWRIGHT_DRIVER_COMMAND = "run-driver"
+
+
+def __filter_kwargs(function: callable, all_kwargs: dict):
+    all_args = inspect.getfullargspec(function)
+    allowed_args = all_args.kwonlyargs
+
+    valid_kwargs = {}
+    for key, value in all_kwargs.items():
+        if key in allowed_args:
+            valid_kwargs[key] = value
+
+    return valid_kwargs
+
+
+async def launch_browser(
+    playwright_instance: Playwright,
+    browser: str,
+    proxy: Union[dict, None] = None,
+    headless: Union[bool, None] = None,
+    slow_mo: Union[float, None] = None,
+    **kwargs,
+) -> Browser:
+    """Launch a browser configured to work with TikTok.
+
+    Args:
+        playwright_instance (Playwright): The running Playwright instance.
+        browser (str): The browser framework to launch, one of chromium, firefox or webkit.
+        proxy (dict | None, optional): The proxy settings to use for the browser. Defaults to None.
+        headless (bool | None, optional): If the browser should be headless. Defaults to None.
+        slow_mo (float | None, optional): Slow the browser down, useful when not headless. Defaults to None.
+
+    Raises:
+        ValueError: If the browser is not one of chromium, firefox or webkit.
+
+    Returns:
+        Browser: The launched browser.
+    """
+    if browser == "chromium":
+        filtered_args = __filter_kwargs(playwright_instance.chromium.launch, kwargs)
+        return await playwright_instance.chromium.launch(
+            proxy=proxy,
+            headless=headless,
+            slow_mo=slow_mo,
+            args=["--disable-http2"],
+            **filtered_args,
+        )
+    elif browser == "firefox":
+        filtered_args = __filter_kwargs(playwright_instance.firefox.launch, kwargs)
+        return await playwright_instance.firefox.launch(
+            proxy=proxy,
+            headless=headless,
+            slow_mo=slow_mo,
+            firefox_user_prefs={
+                "http.spdy.enabled.http2": False,
+                "network.http.http2.enabled": False,
+                "network.http.http2.enabled.deps": False,
+                "network.http.http2.websockets": False,
+            },
+            **filtered_args,
+        )
+    elif browser == "webkit":
+        filtered_args = __filter_kwargs(playwright_instance.webkit.launch, kwargs)
+        return await playwright_instance.webkit.launch(
+            proxy=proxy, headless=headless, slow_mo=slow_mo, **filtered_args
+        )
+    else:
+        raise ValueError(
+            "Invalid browser provided. Must be one of chromium, firefox or webkit."
+        )
+
+
+class BrowserPool:
+    """A single browser shared by a bounded number of browser contexts.
+
+    Contexts are kept open between uses, so their cookies and session state stay warm for the next post. For long
+    running crawls, contexts can be retired after a number of uses and the browser replaced once it has handed out a
+    number of contexts or grown past a memory limit. A replaced browser is closed once its last context is released.
+    """
+
+    def __init__(
+        self,
+        browser: Literal["chromium", "firefox", "webkit"] = "firefox",
+        size: int = 4,
+        proxy: Union[dict, None] = None,
+        headless: Union[bool, None] = None,
+        slow_mo: Union[float, None] = None,
+        profile: Union[ContextProfile, str, None] = None,
+        max_context_uses: Union[int, None] = None,
+        recycle_after: Union[int, None] = None,
+        max_rss: Union[int, None] = None,
+        max_pending_bodies: Union[int, None] = None,
+        standby: int = 0,
+        **kwargs,
+    ):
+        """Create a browser pool. The browser is launched by `start` or when entering the pool as an async context manager.
+
+        Args:
+            browser (Literal[&quot;chromium&quot;, &quot;firefox&quot;, &quot;webkit&quot;], optional): The browser framework to use. Defaults to "firefox".
+            size (int, optional): The maximum number of contexts in use at once. Defaults to 4.
+            proxy (dict | None, optional): The proxy settings to use for the browser. Defaults to None.
+            headless (bool | None, optional): If the browser should be headless. Defaults to None.
+            slow_mo (float | None, optional): Slow the browser down, useful when not headless. Defaults to None.
+            profile (ContextProfile | str | None, optional): The profile used to create each context. Defaults to None, the default profile.
+            max_context_uses (int | None, optional): The number of times a context is used before it is closed and replaced. Defaults to None, no limit.
+            recycle_after (int | None, optional): The number of contexts a browser hands out before it is replaced. Defaults to None, no limit.
+            max_rss (int | None, optional): The resident memory in bytes of the Playwright driver and browser processes of this pool above which the browser is replaced. Only measured on Linux. Defaults to None, no limit.
+            max_pending_bodies (int | None, optional): The maximum number of captured post detail responses held by `get_post` at once, including the ones being downloaded after the context was released. Defaults to None, twice the pool size.
+            standby (int, optional): The number of idle contexts a `SessionPrewarmer` keeps with a TikTok session already established. They count towards `size`, so fewer are kept while contexts are in use. While callers are queued in `acquire`, up to this many are kept on top of `size` as replacements, so a slot freed by a discarded or worn out context goes to a warm one. Defaults to 0, no prewarming.
+        """
+        self.browser = browser
+        self.size = size
+        self.proxy = proxy
+        self.headless = headless
+        self.slow_mo = slow_mo
+        self.profile = profile
+        self.launch_kwargs = kwargs
+        self.max_context_uses = max_context_uses
+        self.recycle_after = recycle_after
+        self.max_rss = max_rss
+        self.pending_bodies = Semaphore(max_pending_bodies or size * 2)
+        self.standby = standby
+
+        self.contexts_created = 0
+        self.acquisitions = 0
+        self.browsers_launched = 0
+        self.recycles = 0
+        self.cold_starts = 0
+        # The number of callers queued in `acquire` for a free slot.
+        self.waiting = 0
+
+        self._playwright: Union[Playwright, None] = None
+        self._browser: Union[Browser, None] = None
+        self._idle: List[BrowserContext] = []
+        self._slots = Semaphore(size)
+        self._recycle_lock = Lock()
+        self._start_lock = Lock()
+        self._browser_uses = 0
+        self._context_uses: Dict[BrowserContext, int] = {}
+        self._in_use: Dict[Browser, int] = {}
+        self._last_rss_check = 0.0
+        self._driver_pids: List[int] = []
+        self._prewarmer: Union["SessionPrewarmer", None] = None
+
+    async def __launch(self):
+        self._browser = await launch_browser(
+            self._playwright,
+            self.browser,
+            self.proxy,
+            self.headless,
+            self.slow_mo,
+            **self.launch_kwargs,
+        )
+        self._browser_uses = 0
+        self.browsers_launched += 1
+
+    async def start(self) -> "BrowserPool":
+        # Contexts acquired before the pool was started all start it, only the first may launch the browser.
+        async with self._start_lock:
+            if self._playwright is None:
+                # Other pools in this process have drivers of their own, only the one started here is measured.
+                existing_drivers = set(find_child_processes(PLAYWRIGHT_DRIVER_COMMAND))
+                self._playwright = await async_playwright().start()
+                self._driver_pids = [
+                    pid
+                    for pid in find_child_processes(PLAYWRIGHT_DRIVER_COMMAND)
+                    if pid not in existing_drivers
+                ]
+                await self.__launch()
+
+                if self.standby and self._prewarmer is None:
+                    from tiktokdl.prewarm import SessionPrewarmer
+
+                    self._prewarmer = SessionPrewarmer(
+                        self, min_standby=self.standby
+                    ).start()
+        return self
+
+    async def close(self):
+        if self._prewarmer is not None:
+            await self._prewarmer.stop()
+            self._prewarmer = None
+
+        for context in self._idle:
+            await context.close()
+        self._idle.clear()
+        self._context_uses.clear()
+
+        # Includes browsers that were replaced but still had contexts in use.
+        for browser in list(self._in_use):
+            if browser is not self._browser:
+                await browser.close()
+        self._in_use.clear()
+
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._driver_pids = []
+
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def new_context(self) -> BrowserContext:
+        """Create a new context in the pool browser without taking a slot, eg. to warm it up and `offer` it to the pool.
+
+        Returns:
+            BrowserContext: The new context.
+        """
+        await self.start()
+        self.contexts_created += 1
+        return await new_profile_context(self._playwright, self._browser, self.profile)
+
+    def browser_rss(self) -> Union[int, None]:
+        """Get the resident memory of the Playwright driver of this pool and the browsers it launched. Other processes
+        started by this process, eg. the workers of a `MediaProcessor`, are not included.
+
+        Returns:
+            int | None: The resident memory in bytes, or None if the driver process could not be found, eg. not on Linux.
+        """
+        if not self._driver_pids:
+            return None
+        return sum(process_tree_rss(pid) or 0 for pid in self._driver_pids)
+
+    @property
+    def idle(self) -> int:
+        """The number of contexts ready to be acquired."""
+        return len(self._idle)
+
+    @property
+    def in_use(self) -> int:
+        """The number of contexts currently acquired."""
+        return sum(self._in_use.values())
+
+    def __has_room(self) -> bool:
+        # Each queued caller may have one idle context on top of `size`, ready for the next slot that frees up.
+        return self.idle + self.in_use < self.size + self.waiting
+
+    async def offer(self, context: BrowserContext):
+        """Add a context created with `new_context`, eg. by a prewarmer, to the idle contexts. The context is closed
+        instead if the pool already holds `size` contexts, plus one for each caller queued in `acquire`.
+
+        Args:
+            context (BrowserContext): The context.
+        """
+        if self._browser is None or context.browser is not self._browser:
+            # The browser was replaced or the pool closed while the context was being prepared.
+            await context.close()
+            return
+        if not self.__has_room():
+            # Contexts were created by `acquire` while this one was being prepared.
+            await context.close()
+            return
+        self._idle.append(context)
+
+    async def acquire(self) -> BrowserContext:
+        """Wait for a free slot and take an idle context, or create one if there are none.
+
+        Returns:
+            BrowserContext: The context, which must be given back with `release`.
+        """
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.acquisitions += 1
+        try:
+            await self.__recycle_if_needed()
+            if self._idle:
+                context = self._idle.pop()
+            else:
+                self.cold_starts += 1
+                context = await self.new_context()
+        except:
+            self._slots.release()
+            raise
+
+        self._browser_uses += 1
+        self._in_use[context.browser] = self._in_use.get(context.browser, 0) + 1
+        return context
+
+    def __should_recycle(self) -> bool:
+        if self.recycle_after and self._browser_uses >= self.recycle_after:
+            return True
+
+        if (
+            self.max_rss
+            and time.monotonic() - self._last_rss_check >= RSS_CHECK_INTERVAL
+        ):
+            self._last_rss_check = time.monotonic()
+            rss = self.browser_rss()
+            return rss is not None and rss > self.max_rss
+
+        return False
+
+    async def __recycle_if_needed(self):
+        async with self._recycle_lock:
+            if self._browser is None or not self.__should_recycle():
+                return
+
+            for context in self._idle:
+                self._context_uses.pop(context, None)
+                await context.close()
+            self._idle.clear()
+
+            old_browser = self._browser
+            await self.__launch()
+            self.recycles += 1
+            if not self._in_use.get(old_browser):
+                self._in_use.pop(old_browser, None)
+                await old_browser.close()
+
+    async def release(self, context: BrowserContext, discard: bool = False):
+        """Give a context back to the pool.
+
+        Args:
+            context (BrowserContext): The context taken with `acquire`.
+            discard (bool, optional): If the context should be closed instead of reused, eg. after an error. Defaults to False.
+        """
+        browser = context.browser
+        uses = self._context_uses.get(context, 0) + 1
+        self._in_use[browser] = self._in_use.get(browser, 1) - 1
+        try:
+            worn_out = self.max_context_uses and uses >= self.max_context_uses
+            # A pool that took replacements while callers were queued shrinks back to `size` once they are served.
+            if (
+                discard
+                or worn_out
+                or self._browser is None
+                or browser is not self._browser
+                or not self.__has_room()
+            ):
+                self._context_uses.pop(context, None)
+                await context.close()
+            else:
+                self._context_uses[context] = uses
+                self._idle.append(context)
+
+            if browser is not self._browser and self._in_use.get(browser) == 0:
+                # The last context of a replaced browser was released.
+                del self._in_use[browser]
+                await browser.close()
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[BrowserContext]:
+        """Use a context from the pool, discarding it if an error is raised while it is in use.
+
+        Yields:
+            BrowserContext: The context.
+        """
+        context = await self.acquire()
+        try:
+            yield context
+        except:
+            await self.release(context, discard=True)
+            raise
+        else:
+            await self.release(context)
@@ -0,0 +1,191 @@
+import re
+from dataclasses import dataclass, field
+
+from playwright.async_api import Browser, BrowserContext, Playwright, Route
+
+from tiktokdl.tiktok_magic import (
+    ANALYTICS_URL_PATTERNS,
+    EMULATED_DEVICE,
+    MEDIA_URL_PATTERNS,
+)
+
+from typing import Dict, Tuple, Union
+
+__all__ = [
+    "ContextProfile",
+    "DEFAULT_PROFILE",
+    "LIGHTWEIGHT_PROFILE",
+    "MINIMAL_PROFILE",
+    "PROFILES",
+    "get_profile",
+    "new_profile_context",
+]
+
+# Injected into every page of a profile with `disable_animations` set.
+DISABLE_ANIMATIONS_SCRIPT = """
+(() => {
+    const style = document.createElement("style");
+    style.textContent = "*, *::before, *::after { animation: none !important; transition: none !important; }";
+    const inject = () => (document.head || document.documentElement).appendChild(style);
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", inject, { once: true });
+    } else {
+        inject();
+    }
+    HTMLMediaElement.prototype.play = function () { return Promise.resolve(); };
+})();
+"""
+
+
+@dataclass(frozen=True)
+class ContextProfile:
+    """The settings used to create a browser context.
+
+    Attributes:
+        name (str): The name of the profile.
+        device (str): The Playwright device descriptor to emulate.
+        viewport (Dict | None): Overrides the viewport of the device if given.
+        blocked_resource_types (Tuple[str, ...]): Playwright resource types to abort, eg. "image", "media" or "font".
+        blocked_url_patterns (Tuple[str, ...]): Regular expressions of request URLs to abort.
+        disable_animations (bool): If CSS animations, transitions and media autoplay should be disabled.
+    """
+
+    name: str
+    device: str = EMULATED_DEVICE
+    viewport: Union[Dict, None] = None
+    blocked_resource_types: Tuple[str, ...] = ()
+    blocked_url_patterns: Tuple[str, ...] = ()
+    disable_animations: bool = False
+    _blocked_url_regex: Union[re.Pattern, None] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        if self.blocked_url_patterns:
+            regex = re.compile("|".join(f"(?:{p})" for p in self.blocked_url_patterns))
+            object.__setattr__(self, "_blocked_url_regex", regex)
+
+    @property
+    def blocks_requests(self) -> bool:
+        return bool(self.blocked_resource_types or self.blocked_url_patterns)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """Check if a request should be aborted under this profile.
+
+        Args:
+            resource_type (str): The Playwright resource type of the request.
+            url (str): The URL of the request.
+
+        Returns:
+            bool: If the request should be aborted.
+        """
+        if resource_type in self.blocked_resource_types:
+            return True
+        return (
+            self._blocked_url_regex is not None
+            and self._blocked_url_regex.search(url) is not None
+        )
+
+
+# Loads everything, the same as a real device.
+DEFAULT_PROFILE = ContextProfile(name="default")
+
+# Skips assets that are never needed to get the post details or the video URL.
+LIGHTWEIGHT_PROFILE = ContextProfile(
+    name="lightweight",
+    blocked_resource_types=("image", "media", "font"),
+    blocked_url_patterns=ANALYTICS_URL_PATTERNS + MEDIA_URL_PATTERNS,
+    disable_animations=True,
+)
+
+# Only loads the documents, scripts and API calls of the page, in a small viewport.
+MINIMAL_PROFILE = ContextProfile(
+    name="minimal",
+    viewport={"width": 320, "height": 568},
+    blocked_resource_types=(
+        "image",
+        "media",
+        "font",
+        "stylesheet",
+        "texttrack",
+        "eventsource",
+        "websocket",
+        "manifest",
+        "other",
+    ),
+    blocked_url_patterns=ANALYTICS_URL_PATTERNS + MEDIA_URL_PATTERNS,
+    disable_animations=True,
+)
+
+PROFILES = {
+    profile.name: profile
+    for profile in (DEFAULT_PROFILE, LIGHTWEIGHT_PROFILE, MINIMAL_PROFILE)
+}
+
+
+def get_profile(profile: Union[ContextProfile, str, None]) -> ContextProfile:
+    """Resolve a profile or the name of a built-in profile.
+
+    Args:
+        profile (ContextProfile | str | None): The profile, the name of a built-in profile, or None for the default profile.
+
+    Raises:
+        ValueError: If the name does not match a built-in profile.
+
+    Returns:
+        ContextProfile: The resolved profile.
+    """
+    if profile is None:
+        return DEFAULT_PROFILE
+    if isinstance(profile, ContextProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(
+            f"Invalid profile provided. Must be one of {', '.join(PROFILES)}."
+        )
+    return PROFILES[profile]
+
+
+async def new_profile_context(
+    playwright_instance: Playwright,
+    browser_instance: Browser,
+    profile: Union[ContextProfile, str, None] = None,
+) -> BrowserContext:
+    """Create a new browser context configured by a profile.
+
+    Args:
+        playwright_instance (Playwright): The running Playwright instance.
+        browser_instance (Browser): The browser to create the context in.
+        profile (ContextProfile | str | None, optional): The profile to use. Defaults to None, the default profile.
+
+    Returns:
+        BrowserContext: The new browser context.
+    """
+    profile = get_profile(profile)
+
+    device = dict(playwright_instance.devices[profile.device])
+    device.pop("is_mobile", None)
+    if profile.viewport is not None:
+        device["viewport"] = profile.viewport
+        device["screen"] = profile.viewport
+    if profile.disable_animations:
+        device["reduced_motion"] = "reduce"
+
+    context = await browser_instance.new_context(**device)
+    await context.clear_cookies()
+
+    if profile.disable_animations:
+        await context.add_init_script(DISABLE_ANIMATIONS_SCRIPT)
+
+    if profile.blocks_requests:
+
+        async def block_resources(route: Route):
+            request = route.request
+            if profile.should_block(request.resource_type, request.url):
+                await route.abort("blockedbyclient")
+            else:
+                await route.fallback()
+
+        await context.route("**/*", block_resources)
+
+    return context
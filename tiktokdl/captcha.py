@@ -1,9 +1,18 @@
-import cv2 as cv
-from random import randint
+import time
+from asyncio import (
+    FIRST_COMPLETED,
+    Queue,
+    Task,
+    ensure_future,
+    gather,
+    get_running_loop,
+    sleep,
+    wait,
+)
+from json import dumps as json_dumps
 
 from playwright.async_api import Page
 
-from tiktokdl.image_processing import find_position, image_from_url
 from tiktokdl.tiktok_magic import (
     CAPTCHA_GET_HEADERS,
     CAPTCHA_HOST,
@@ -13,29 +22,37 @@ from tiktokdl.tiktok_magic import (
     MODIFIED_IMAGE_WIDTH,
     OS_TYPE,
 )
+from tiktokdl.captcha_cache import CaptchaSolutionCache
 from tiktokdl.session_store import get_device_id, get_ms_token, get_verify_fp
 
-from typing import Dict, Tuple
+from typing import TYPE_CHECKING, Dict, Tuple, Union
+
+if TYPE_CHECKING:
+    from cv2 import Mat
 
 
 def __generate_captcha_response(
-    captcha_solution: Dict, captcha_id: str, verify_id: str
-) -> Dict:
-    data = {
-        "modified_img_width": MODIFIED_IMAGE_WIDTH,
-        "id": captcha_id,
-        "mode": "slide",
-        "reply": captcha_solution,
-        "reply2": captcha_solution,
-    }
+    captcha_solution: str, captcha_id: str, verify_id: str
+) -> bytes:
+    """Build the body of the captcha verify request.
+
+    Args:
+        captcha_solution (str): The slide steps as JSON, from `__generate_random_captcha_steps`.
+        captcha_id (str): The ID of the challenge.
+        verify_id (str): The s_v_web_id of the session.
 
-    response = {**data, "verify_id": verify_id, "version": CAPTCHA_VERSION}
-    return response
+    Returns:
+        bytes: The JSON body. Given as bytes, Playwright sends it as is rather than parsing and encoding it again.
+    """
+    # The steps are sent twice, so they are serialised once and spliced into the body instead of encoding a dict.
+    return (
+        f'{{"modified_img_width":{MODIFIED_IMAGE_WIDTH},"id":{json_dumps(captcha_id)},"mode":"slide",'
+        f'"reply":{captcha_solution},"reply2":{captcha_solution},'
+        f'"verify_id":{json_dumps(verify_id)},"version":{json_dumps(CAPTCHA_VERSION)}}}'
+    ).encode()
 
 
-def __generate_random_captcha_steps(
-    target_position, tip_y_value: int
-) -> Tuple[Dict, Dict]:
+def __generate_random_captcha_steps(target_position: int, tip_y_value: int) -> str:
     """Generate a random sequence of movements to simulate a human sliding the piece to the correct position.
 
     Args:
@@ -43,39 +60,12 @@ def __generate_random_captcha_steps(
         tip_y_value (int): The tip_y value given by the challenge.
 
     Returns:
-        Tuple[Dict, Dict]: First dictionary stores the solution required by TikTok. Second dictionary stores the deltas between each step.
+        str: The solution steps required by TikTok, as JSON.
     """
-    current_position = 0
-    current_time = randint(200, 400)
-    steps = []
-    deltas = []
-    while current_position < target_position:
-        time_step = randint(8, 9)
-        move_step = randint(1, 6)
-
-        current_time += time_step
-        current_position += move_step
+    # NumPy is slow to import, so only load the trajectory generator once a captcha actually has to be solved.
+    from tiktokdl.trajectory import generate_trajectory_json
 
-        steps.append(
-            {"x": current_position, "y": target_position, "relative_time": current_time}
-        )
-
-        deltas.append({"x": move_step, "y": randint(-2, 2), "time": time_step})
-
-    if steps[-1]["x"] > target_position or steps[-1]["x"] < target_position:
-        time_step = randint(8, 9)
-        move_step = target_position - steps[-1]["x"]
-        steps.append(
-            {
-                "x": target_position,
-                "y": tip_y_value,
-                "relatie_time": current_time + time_step,
-            }
-        )
-
-        deltas.append({"x": move_step, "y": randint(-2, 2), "time": time_step})
-
-    return steps, deltas
+    return generate_trajectory_json(target_position, tip_y_value)
 
 
 def __calculate_image_scale(
@@ -93,9 +83,21 @@ def __calculate_image_scale(
     return float(output_width) / float(original_width)
 
 
-def __solve_captcha(challenge_data: Dict) -> Dict:
-    background = image_from_url(challenge_data.get("url_1"))
-    piece = image_from_url(challenge_data.get("url_2"))
+def __decode_challenge_images(
+    background_data: bytes, piece_data: bytes
+) -> Tuple["Mat", "Mat", Tuple[int, int]]:
+    # OpenCV and NumPy are slow to import, so only load them once a captcha actually has to be solved.
+    from tiktokdl.image_processing import difference_hash, image_from_bytes
+
+    background = image_from_bytes(background_data)
+    piece = image_from_bytes(piece_data)
+    return background, piece, (difference_hash(background), difference_hash(piece))
+
+
+def __locate_piece(background: "Mat", piece: "Mat") -> int:
+    import cv2 as cv
+
+    from tiktokdl.image_processing import find_position
 
     _, original_width, _ = background.shape
     ratio = __calculate_image_scale(original_width)
@@ -103,13 +105,42 @@ def __solve_captcha(challenge_data: Dict) -> Dict:
     background = cv.resize(background, (0, 0), fx=ratio, fy=ratio)
     piece = cv.resize(piece, (0, 0), fx=ratio, fy=ratio)
 
-    x, y = find_position(background, piece)
-    h, w, _ = piece.shape
+    x, _ = find_position(background, piece)
+    return x
 
-    i = cv.rectangle(background, (x, y), (x + w, y + h), 255, 2)
 
-    steps, _ = __generate_random_captcha_steps(x, challenge_data.get("tip_y"))
-    return steps
+async def __solve_captcha(
+    challenge_data: Dict, solution_cache: Union[CaptchaSolutionCache, None] = None
+) -> Tuple[str, int, Tuple[int, int], bool]:
+    """Find the x offset of the piece for a challenge and generate the slide steps to reach it.
+
+    Args:
+        challenge_data (Dict): The challenge data from `ChallengePool.take`, including the downloaded images.
+        solution_cache (CaptchaSolutionCache | None, optional): A cache of previous solutions to check before running the solver. Defaults to None.
+
+    Returns:
+        Tuple[str, int, Tuple[int, int], bool]: The slide steps as JSON, the x offset, the hashes of the background and piece images, and if the x offset came from the cache.
+    """
+    # Decoding and template matching release the GIL, so run them off the event loop while other pages carry on.
+    loop = get_running_loop()
+    background, piece, image_hashes = await loop.run_in_executor(
+        None,
+        __decode_challenge_images,
+        challenge_data.get("background_image"),
+        challenge_data.get("piece_image"),
+    )
+
+    x = None
+    if solution_cache is not None:
+        # The lookup commits to SQLite, so it is kept off the event loop too.
+        x = await loop.run_in_executor(None, solution_cache.get, *image_hashes)
+    cached = x is not None
+
+    if not cached:
+        x = await loop.run_in_executor(None, __locate_piece, background, piece)
+
+    steps = __generate_random_captcha_steps(x, challenge_data.get("tip_y"))
+    return steps, x, image_hashes, cached
 
 
 def __parse_captcha_challenge(challenge_response: Dict) -> Dict:
@@ -141,95 +172,261 @@ def __parse_captcha_challenge(challenge_response: Dict) -> Dict:
     }
 
 
-async def __get_challenge(
-    page: Page,
-    verify_fp: str,
-    device_id: int,
-    ms_token: str,
-    timeout_interval: float = 100,
-    max_requests: int = 5,
-) -> Dict:
-    """Get a challenge from TikTok that can be used to verify the current session.
+async def _fetch_challenge(page: Page, session_params: Dict) -> Union[Dict, None]:
+    """Request a challenge and download its images.
 
     Args:
-        page (Page): The page to get the session of.
-        verify_fp (str): The VerifyFp string of the current session.
-        device_id (int): The Device ID of the current session.
-        ms_token (str): The msToken of the current session.
-        timeout_interval (float, optional): How long to wait between requesting a new challenge when the given challenge is not 'slide'. Defaults to 100.
-        max_requests (int, optional): The maximum number of requests to make. Defaults to 5.
+        page (Page): The page of the session.
+        session_params (Dict): The query parameters identifying the session.
 
     Returns:
-        Dict: The required challenge data that can be used to verify the challenge.
+        Dict | None: The challenge data with the images in "background_image" and "piece_image", or None if TikTok gave a challenge that is not a slide.
     """
-    api_request_context = page.request
-    challenge_type = None
-    request_count = 0
-
-    while challenge_type != "slide" and request_count < max_requests:
-        await page.wait_for_timeout(timeout_interval)
-        captcha_request = await api_request_context.fetch(
-            f"https://{CAPTCHA_HOST}/captcha/get",
-            params={
-                "did": device_id,
-                "device_id": device_id,
-                "os_type": OS_TYPE,
-                "fp": verify_fp,
-                "type": "verify",
-                "subtype": "slide",
-                "msToken": ms_token,
-            },
-            method="GET",
-            headers=CAPTCHA_GET_HEADERS,
-        )
-
-        data = await captcha_request.json()
-        challenge_type = data.get("data").get("mode")
-        request_count += 1
-
-    return __parse_captcha_challenge(data)
-
-
-async def verify_session(page: Page, cookie_timeout: float = 30000) -> bool:
-    """Complete a CAPTCHA to verify the current session for TikTok.
+    captcha_request = await page.request.fetch(
+        f"https://{CAPTCHA_HOST}/captcha/get",
+        params=session_params,
+        method="GET",
+        headers=CAPTCHA_GET_HEADERS,
+    )
+    challenge = __parse_captcha_challenge(await captcha_request.json())
+    if challenge.get("mode") != "slide":
+        return None
 
-    Args:
-        page (Page): The page to verify the session of.
-        cookie_timeout (float, optional): How long to wait for cookies to appear. Defaults to 30000.
+    background, piece = await gather(
+        page.request.get(challenge.get("url_1")),
+        page.request.get(challenge.get("url_2")),
+    )
+    challenge["background_image"], challenge["piece_image"] = await gather(
+        background.body(), piece.body()
+    )
+    challenge["fetched_at"] = time.monotonic()
+    return challenge
 
-    Returns:
-        bool: If the session verification was successful.
-    """
-    cookies = await page.context.cookies()
-    verify_fp = await get_verify_fp(page, cookie_timeout)
-    device_id = await get_device_id(page, cookie_timeout)
-    ms_token = get_ms_token(cookies)
 
-    captcha_challenge = await __get_challenge(page, verify_fp, device_id, ms_token)
+class ChallengePool:
+    """Keeps a small number of slide challenges, with their images already downloaded, ready to be solved for a session.
+
+    Challenges are requested several at a time in parallel and any that are not slide challenges are dropped. The pool
+    refills in the background as soon as a challenge is taken, so the next attempt does not wait on TikTok.
+    """
 
-    captcha_solution = __solve_captcha(captcha_challenge)
+    def __init__(
+        self,
+        page: Page,
+        verify_fp: str,
+        device_id: int,
+        ms_token: str,
+        size: int = 2,
+        parallel_requests: int = 3,
+        max_requests: int = 15,
+        max_age: float = 60,
+        retry_interval: float = 100,
+    ):
+        """Create a challenge pool for a session. Use `for_page` to read the session values from a page.
+
+        Args:
+            page (Page): The page of the session.
+            verify_fp (str): The VerifyFp string of the current session.
+            device_id (int): The Device ID of the current session.
+            ms_token (str): The msToken of the current session.
+            size (int, optional): The number of ready challenges to keep. Defaults to 2.
+            parallel_requests (int, optional): The number of challenges to request at once. Defaults to 3.
+            max_requests (int, optional): The maximum number of challenges to request per refill before giving up. Defaults to 15.
+            max_age (float, optional): The number of seconds after which a ready challenge is considered expired. Defaults to 60.
+            retry_interval (float, optional): How long to wait in ms before requesting more when a batch had no slide challenges. Defaults to 100.
+        """
+        self.page = page
+        self.verify_fp = verify_fp
+        self.device_id = device_id
+        self.ms_token = ms_token
+        self.size = size
+        self.parallel_requests = parallel_requests
+        self.max_requests = max_requests
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+
+        self.requests_made = 0
+        self.challenges_discarded = 0
+
+        self._ready: Queue = Queue()
+        self._filling: Union[Task, None] = None
+
+    @classmethod
+    async def for_page(
+        cls, page: Page, cookie_timeout: float = 30000, **kwargs
+    ) -> "ChallengePool":
+        """Create a challenge pool for the session of a page, waiting for the session cookies to be set.
+
+        Args:
+            page (Page): The page of the session.
+            cookie_timeout (float, optional): How long to wait for cookies to appear. Defaults to 30000.
+
+        Returns:
+            ChallengePool: The challenge pool, which starts filling straight away.
+        """
+        verify_fp = await get_verify_fp(page, cookie_timeout)
+        device_id = await get_device_id(page, cookie_timeout)
+        ms_token = get_ms_token(await page.context.cookies())
+
+        pool = cls(page, verify_fp, device_id, ms_token, **kwargs)
+        pool.fill()
+        return pool
+
+    @property
+    def session_params(self) -> Dict:
+        return {
+            "did": self.device_id,
+            "device_id": self.device_id,
+            "os_type": OS_TYPE,
+            "fp": self.verify_fp,
+            "type": "verify",
+            "subtype": "slide",
+            "msToken": self.ms_token,
+        }
+
+    async def __fill(self):
+        requests_made = 0
+        while self._ready.qsize() < self.size and requests_made < self.max_requests:
+            batch = min(self.parallel_requests, self.max_requests - requests_made)
+            requests_made += batch
+            self.requests_made += batch
+            challenges = await gather(
+                *(
+                    _fetch_challenge(self.page, self.session_params)
+                    for _ in range(batch)
+                ),
+                return_exceptions=True,
+            )
+
+            found = False
+            for challenge in challenges:
+                if isinstance(challenge, dict):
+                    self._ready.put_nowait(challenge)
+                    found = True
+                elif challenge is None:
+                    # TikTok gave a challenge that is not a slide.
+                    self.challenges_discarded += 1
+
+            if not found:
+                await sleep(self.retry_interval / 1000.0)
+
+    def fill(self):
+        """Start refilling the pool in the background, if it is not already."""
+        if self._filling is None or self._filling.done():
+            self._filling = ensure_future(self.__fill())
+
+    def __is_fresh(self, challenge: Dict) -> bool:
+        if time.monotonic() - challenge.get("fetched_at") <= self.max_age:
+            return True
+        self.challenges_discarded += 1
+        return False
+
+    async def take(self) -> Union[Dict, None]:
+        """Take a ready challenge, waiting for one to be fetched if the pool is empty.
+
+        Returns:
+            Dict | None: The challenge data with the images in "background_image" and "piece_image", or None if no slide challenge could be fetched.
+        """
+        while True:
+            while not self._ready.empty():
+                challenge = self._ready.get_nowait()
+                if self.__is_fresh(challenge):
+                    self.fill()
+                    return challenge
+
+            self.fill()
+            getter = ensure_future(self._ready.get())
+            await wait({getter, self._filling}, return_when=FIRST_COMPLETED)
+
+            if getter.done():
+                challenge = getter.result()
+                if self.__is_fresh(challenge):
+                    self.fill()
+                    return challenge
+                continue
+
+            getter.cancel()
+            if self._ready.empty():
+                # The refill ran out of requests without finding a slide challenge.
+                return None
+
+    def close(self):
+        """Stop refilling the pool."""
+        if self._filling is not None:
+            self._filling.cancel()
+
+
+async def __verify_challenge(
+    pool: ChallengePool,
+    challenge: Dict,
+    solution_cache: Union[CaptchaSolutionCache, None] = None,
+) -> bool:
+    captcha_solution, x_offset, image_hashes, cached = await __solve_captcha(
+        challenge, solution_cache
+    )
 
     challenge_response_data = __generate_captcha_response(
-        captcha_solution, captcha_challenge.get("captcha_id"), verify_fp
+        captcha_solution, challenge.get("captcha_id"), pool.verify_fp
     )
 
-    captcha_response_request = await page.request.fetch(
+    captcha_response_request = await pool.page.request.fetch(
         f"https://{CAPTCHA_HOST}/captcha/verify",
         headers=CAPTCHA_POST_HEADERS,
         data=challenge_response_data,
         params={
-            "did": device_id,
-            "device_id": device_id,
-            "os_type": OS_TYPE,
-            "fp": verify_fp,
-            "type": "verify",
-            "subtype": "slide",
+            **pool.session_params,
             "mode": "slide",
-            "msToken": ms_token,
             "challenge_code": CHALLENGE_CODE,
         },
         method="POST",
     )
 
     captcha_response = await captcha_response_request.json()
-    return captcha_response.get("message") == "Verification complete"
+    verified = captcha_response.get("message") == "Verification complete"
+
+    if solution_cache is not None:
+        loop = get_running_loop()
+        if verified and not cached:
+            await loop.run_in_executor(
+                None, solution_cache.put, *image_hashes, x_offset
+            )
+        elif not verified and cached:
+            await loop.run_in_executor(None, solution_cache.discard, *image_hashes)
+
+    return verified
+
+
+async def verify_session(
+    page: Page,
+    cookie_timeout: float = 30000,
+    solution_cache: Union[CaptchaSolutionCache, None] = None,
+    challenge_pool: Union[ChallengePool, None] = None,
+    max_attempts: int = 3,
+) -> bool:
+    """Complete a CAPTCHA to verify the current session for TikTok.
+
+    Args:
+        page (Page): The page to verify the session of.
+        cookie_timeout (float, optional): How long to wait for cookies to appear. Defaults to 30000.
+        solution_cache (CaptchaSolutionCache | None, optional): A cache of previously solved challenges. Hits skip the solver, and verified solutions are added to it. Defaults to None.
+        challenge_pool (ChallengePool | None, optional): A pool of ready challenges for this session, kept between calls. Defaults to None, a pool that only lives for this call.
+        max_attempts (int, optional): The number of challenges to try before giving up. The next challenge is fetched while the current one is being verified. Defaults to 3.
+
+    Returns:
+        bool: If the session verification was successful.
+    """
+    pool = challenge_pool or await ChallengePool.for_page(page, cookie_timeout)
+
+    try:
+        for _ in range(max_attempts):
+            challenge = await pool.take()
+            if challenge is None:
+                return False
+
+            if await __verify_challenge(pool, challenge, solution_cache):
+                return True
+
+        return False
+    finally:
+        if challenge_pool is None:
+            pool.close()
@@ -0,0 +1,232 @@
+import sqlite3
+import threading
+import time
+
+from typing import Dict, List, Set, Tuple, Union
+
+__all__ = ["CaptchaSolutionCache"]
+
+# The largest hamming distance between two image hashes that are still considered the same image.
+DEFAULT_MAX_DISTANCE = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captcha_solutions (
+    background_hash INTEGER NOT NULL,
+    piece_hash INTEGER NOT NULL,
+    x_offset INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (background_hash, piece_hash)
+) WITHOUT ROWID
+"""
+
+HASH_BITS = 64
+
+
+def _to_signed(value: int) -> int:
+    # SQLite integers are signed 64 bit, so store unsigned hashes as their two's complement.
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def _hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _band_masks(bands: int, bits: int = 2 * HASH_BITS) -> List[Tuple[int, int]]:
+    """Split `bits` into `bands` contiguous ranges of bits, as (shift, mask) pairs."""
+    masks = []
+    start = 0
+    for band in range(bands):
+        width = (bits - start) // (bands - band)
+        masks.append((start, (1 << width) - 1))
+        start += width
+    return masks
+
+
+class CaptchaSolutionCache:
+    """A bounded on-disk cache of solved slide captchas, keyed by perceptual hashes of the background and piece images.
+
+    TikTok reuses its slide puzzle backgrounds, so a challenge whose images hash close to a previously solved challenge
+    can reuse its x offset without running the solver. The whole index is kept in memory, the database is only read
+    when the cache is opened.
+
+    Near matches are found without comparing against every entry: the two hashes of an entry are joined into 128 bits
+    and split into `2 * max_distance + 1` bands, each with a dict from its bits to the entries. Two entries within
+    `max_distance` on both hashes differ in at most `2 * max_distance` bits, so they share at least one band exactly
+    and only the entries sharing a band with the lookup are compared.
+
+    The methods are thread safe, so they can be called from an executor to keep SQLite off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        max_entries: int = 10000,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+    ):
+        """Open (or create) a captcha solution cache.
+
+        Args:
+            path (str, optional): The path of the SQLite database file. Defaults to ":memory:".
+            max_entries (int, optional): The maximum number of solutions kept, the least recently used are removed first. Defaults to 10000.
+            max_distance (int, optional): The largest hamming distance between hashes that still counts as a match. Defaults to 4.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+
+        self._index: Dict[Tuple[int, int], int] = {}
+        self._band_masks = _band_masks(2 * max_distance + 1)
+        self._bands: List[Dict[int, Set[Tuple[int, int]]]] = [
+            {} for _ in self._band_masks
+        ]
+        for background_hash, piece_hash, x_offset in self._connection.execute(
+            "SELECT background_hash, piece_hash, x_offset FROM captcha_solutions"
+        ):
+            key = (_to_unsigned(background_hash), _to_unsigned(piece_hash))
+            self.__add(key, x_offset)
+
+    def __enter__(self) -> "CaptchaSolutionCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self):
+        self._connection.close()
+
+    def __band_values(self, key: Tuple[int, int]) -> List[int]:
+        joined = key[0] << HASH_BITS | key[1]
+        return [joined >> shift & mask for shift, mask in self._band_masks]
+
+    def __add(self, key: Tuple[int, int], x_offset: int):
+        if key not in self._index:
+            for band, value in zip(self._bands, self.__band_values(key)):
+                band.setdefault(value, set()).add(key)
+        self._index[key] = x_offset
+
+    def __remove(self, key: Tuple[int, int]):
+        if self._index.pop(key, None) is None:
+            return
+        for band, value in zip(self._bands, self.__band_values(key)):
+            keys = band[value]
+            keys.discard(key)
+            if not keys:
+                del band[value]
+
+    def __find(
+        self, background_hash: int, piece_hash: int
+    ) -> Union[Tuple[int, int], None]:
+        key = (background_hash, piece_hash)
+        if key in self._index:
+            return key
+
+        candidates = set()
+        for band, value in zip(self._bands, self.__band_values(key)):
+            candidates.update(band.get(value, ()))
+
+        best_key = None
+        best_distance = None
+        for candidate in candidates:
+            background_distance = _hamming_distance(candidate[0], background_hash)
+            if background_distance > self.max_distance:
+                continue
+            piece_distance = _hamming_distance(candidate[1], piece_hash)
+            if piece_distance > self.max_distance:
+                continue
+            distance = background_distance + piece_distance
+            if best_distance is None or distance < best_distance:
+                best_key, best_distance = candidate, distance
+
+        return best_key
+
+    def get(self, background_hash: int, piece_hash: int) -> Union[int, None]:
+        """Get the x offset of a previously solved challenge with matching images.
+
+        Args:
+            background_hash (int): The perceptual hash of the background image.
+            piece_hash (int): The perceptual hash of the piece image.
+
+        Returns:
+            int | None: The x offset of the solution, or None if no solved challenge matches.
+        """
+        with self._lock:
+            key = self.__find(background_hash, piece_hash)
+            if key is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE captcha_solutions SET last_used = ?, hits = hits + 1 "
+                    "WHERE background_hash = ? AND piece_hash = ?",
+                    (time.time(), _to_signed(key[0]), _to_signed(key[1])),
+                )
+            return self._index[key]
+
+    def put(self, background_hash: int, piece_hash: int, x_offset: int):
+        """Record the x offset of a solved challenge, removing the least recently used solutions if the cache is full.
+
+        Args:
+            background_hash (int): The perceptual hash of the background image.
+            piece_hash (int): The perceptual hash of the piece image.
+            x_offset (int): The x offset that solved the challenge.
+        """
+        with self._lock, self._connection:
+            self.__add((background_hash, piece_hash), x_offset)
+            self._connection.execute(
+                "INSERT OR REPLACE INTO captcha_solutions VALUES (?, ?, ?, ?, 0)",
+                (
+                    _to_signed(background_hash),
+                    _to_signed(piece_hash),
+                    x_offset,
+                    time.time(),
+                ),
+            )
+
+            overflow = len(self._index) - self.max_entries
+            if overflow > 0:
+                evicted: List[Tuple[int, int]] = self._connection.execute(
+                    "SELECT background_hash, piece_hash FROM captcha_solutions ORDER BY last_used LIMIT ?",
+                    (overflow,),
+                ).fetchall()
+                self._connection.executemany(
+                    "DELETE FROM captcha_solutions WHERE background_hash = ? AND piece_hash = ?",
+                    evicted,
+                )
+                for background, piece in evicted:
+                    self.__remove((_to_unsigned(background), _to_unsigned(piece)))
+
+    def discard(self, background_hash: int, piece_hash: int):
+        """Remove the solution matching the given images, eg. after it failed verification.
+
+        Args:
+            background_hash (int): The perceptual hash of the background image.
+            piece_hash (int): The perceptual hash of the piece image.
+        """
+        with self._lock:
+            key = self.__find(background_hash, piece_hash)
+            if key is None:
+                return
+
+            self.__remove(key)
+            with self._connection:
+                self._connection.execute(
+                    "DELETE FROM captcha_solutions WHERE background_hash = ? AND piece_hash = ?",
+                    (_to_signed(key[0]), _to_signed(key[1])),
+                )
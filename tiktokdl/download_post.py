@@ -1,36 +1,56 @@
-import inspect
+from asyncio import Semaphore, ensure_future, gather, get_running_loop, wait_for
+from asyncio import TimeoutError as AsyncTimeoutError
 from asyncio import sleep as async_sleep
+import logging
 from datetime import datetime, timezone
 from os.path import curdir
 from os.path import sep as PATH_SEP
 from urllib.parse import urlparse
-import requests
-from urllib.request import urlretrieve
 
-from playwright.async_api import BrowserContext, async_playwright, Playwright
+from playwright.async_api import (
+    BrowserContext,
+    Page,
+    Playwright,
+    Route,
+    async_playwright,
+)
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
+from tiktokdl.browser_pool import BrowserPool, launch_browser
+from tiktokdl.browser_profiles import ContextProfile, new_profile_context
 from tiktokdl.exceptions import (
     DownloadFailedException,
     ResponseParseException,
     RetryLimitReached,
 )
-from tiktokdl.post_data import TikTokPost, TikTokSlide, TikTokVideo
-
-from typing import Literal, Union
+from tiktokdl.post_data import TikTokPost, TikTokPostStats, TikTokSlide, TikTokVideo
+from tiktokdl.session_store import get_ms_token
+from tiktokdl.stats_store import StatsStore
+from tiktokdl.streaming import stream_to_file
+from tiktokdl.tiktok_magic import (
+    ITEM_DETAIL_API_GLOB,
+    ITEM_DETAIL_API_URL,
+    SLIDESHOW_IMAGE_HEADERS,
+    SLIDESHOW_IMAGE_KEYS,
+    TIKTOK_HOME_URL,
+)
 
-__all__ = ["get_post"]
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Literal, Tuple, Union
 
+if TYPE_CHECKING:
+    from tiktokdl.http_client import HttpClient
+    from tiktokdl.media_processing import MediaProcessor
+    from tiktokdl.post_data import MediaInfo
 
-def __filter_kwargs(function: callable, all_kwargs: dict):
-    all_args = inspect.getfullargspec(function)
-    allowed_args = all_args.kwonlyargs
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
-    valid_kwargs = {}
-    for key, value in all_kwargs.items():
-        if key in allowed_args:
-            valid_kwargs[key] = value
+__all__ = ["get_post", "refresh_post_stats"]
 
-    return valid_kwargs
+logger = logging.getLogger(__name__)
 
 
 def __validate_download_path(download_path: Union[str, None]):
@@ -79,7 +99,11 @@ def __parse_api_response(api_response: dict) -> Union[TikTokSlide, TikTokVideo]:
     )
 
     if __post_is_slideshow(post_data):
-        images = post_data.get("image").get("images")
+        # Only keep what is used of each image, the rest of the raw data is several times larger.
+        images = [
+            {key: image.get(key) for key in SLIDESHOW_IMAGE_KEYS}
+            for image in post_data.get("image").get("images")
+        ]
         return TikTokSlide(**post.__dict__, images=images)
     else:
         video_thumbnail = (
@@ -93,115 +117,297 @@ def __parse_api_response(api_response: dict) -> Union[TikTokSlide, TikTokVideo]:
         )
 
 
+def __parse_item_stats(api_response: dict) -> TikTokPostStats:
+    root_data = api_response.get("item_info")
+
+    stats_data = root_data.get("item_stats")
+    post_id = root_data.get("item_basic").get("id")
+
+    return TikTokPostStats(
+        post_id=post_id,
+        timestamp=datetime.now(tz=timezone.utc),
+        like_count=stats_data.get("digg_count"),
+        share_count=stats_data.get("share_count"),
+        comment_count=stats_data.get("comment_count"),
+        view_count=stats_data.get("play_count"),
+    )
+
+
 async def __get_browser(
     playwright_instance: Playwright,
     browser: str,
     proxy: Union[dict, None] = None,
     headless: Union[bool, None] = None,
     slow_mo: Union[float, None] = None,
+    profile: Union[ContextProfile, str, None] = None,
     **kwargs,
 ) -> BrowserContext:
 
-    browser_instance = None
+    browser_instance = await launch_browser(
+        playwright_instance, browser, proxy, headless, slow_mo, **kwargs
+    )
+    return await new_profile_context(playwright_instance, browser_instance, profile)
+
 
-    if browser == "chromium":
-        filtered_args = __filter_kwargs(playwright_instance.chromium.launch, kwargs)
-        browser_instance = await playwright_instance.chromium.launch(
-            proxy=proxy,
-            headless=headless,
-            slow_mo=slow_mo,
-            args=["--disable-http2"],
-            **filtered_args,
-        )
-    elif browser == "firefox":
-        filtered_args = __filter_kwargs(playwright_instance.firefox.launch, kwargs)
-        browser_instance = await playwright_instance.firefox.launch(
-            proxy=proxy,
-            headless=headless,
-            slow_mo=slow_mo,
-            firefox_user_prefs={
-                "http.spdy.enabled.http2": False,
-                "network.http.http2.enabled": False,
-                "network.http.http2.enabled.deps": False,
-                "network.http.http2.websockets": False,
-            },
-            **filtered_args,
-        )
-    elif browser == "webkit":
-        filtered_args = __filter_kwargs(playwright_instance.webkit.launch, kwargs)
-        browser_instance = await playwright_instance.webkit.launch(
-            proxy=proxy, headless=headless, slow_mo=slow_mo, **filtered_args
-        )
-    else:
-        raise ValueError(
-            "Invalid browser provided. Must be one of chromium, firefox or webkit."
+def __download_file(
+    http_client: "HttpClient",
+    url: str,
+    headers: Dict[str, str],
+    save_path: str,
+    keep_data: bool = False,
+) -> Union[bytes, None]:
+    """Stream a file to disk. Blocking, so it is run in an executor thread to keep the event loop free for the pages of
+    other posts while it downloads. The response is written without decoding it, so the headers should ask for the
+    "identity" encoding.
+
+    Args:
+        http_client (HttpClient): The HTTP client to download with.
+        url (str): The URL of the file.
+        headers (Dict[str, str]): The headers of the request.
+        save_path (str): The path to save the file to.
+        keep_data (bool, optional): If the downloaded bytes should be kept and returned. Defaults to False.
+
+    Returns:
+        bytes | None: The downloaded bytes if `keep_data` is set.
+    """
+    data = bytearray() if keep_data else None
+    with http_client.get(url, headers=headers, stream=True) as r:
+        r.raise_for_status()
+        content_length = r.headers.get("content-length")
+        stream_to_file(
+            r.raw,
+            save_path,
+            int(content_length) if content_length else None,
+            on_data=data.extend if data is not None else None,
         )
+    return bytes(data) if data is not None else None
 
-    device = playwright_instance.devices["iPhone 14 Pro Max"]
-    device.pop("is_mobile")
-    context = await browser_instance.new_context(**device)
-    await context.clear_cookies()
-    return context
+
+async def __try_process_media(
+    process: Callable[..., Awaitable], *args
+) -> Union["MediaInfo", None]:
+    # The media is already downloaded, so a processing error (eg. a broken worker pool or an unreadable image) only
+    # leaves its info unset instead of failing and retrying the whole post.
+    try:
+        return await process(*args)
+    except Exception:
+        return None
 
 
 async def download_video(
-    initial_response: requests.Response,
+    initial_request_headers: Dict[str, str],
     video_info: TikTokVideo,
     download_path: Union[str, None],
+    http_client: Union["HttpClient", None] = None,
+    media_processor: Union["MediaProcessor", None] = None,
 ):
-    """Uses the the browser request for the video to download the video. Valid for any download setting but less reliable.
+    """Uses the headers of the browser request for the post details to download the video. Valid for any download setting but less reliable.
 
     Args:
-        initial_response (requests.Response): Response data from the /api/items/details request.
+        initial_request_headers (Dict[str, str]): All the headers, including cookies, sent with the /api/reflow/item/detail request.
         video_info (TikTokVideo): The video data of the TikTok video.
         download_path (str | None): The path to download the video to. If None, uses current directory.
+        http_client (HttpClient | None, optional): The HTTP client to download with. Defaults to None, the shared client of the process.
+        media_processor (MediaProcessor | None, optional): If given, used to set `video_info.media_info` once the video is downloaded. It is left as None if processing fails. Defaults to None.
     """
+    from tiktokdl.http_client import get_http_client
+
+    http_client = http_client or get_http_client()
     download_path = __validate_download_path(download_path)
     parsed_donwload_url = urlparse(video_info.download_url)
     download_url_host = parsed_donwload_url.hostname
-    initial_request_headers = initial_response.request.headers
     video_request_headers = {
         "accept": "video/webm,video/ogg,video/*;q=0.9,application/ogg;q=0.7,audio/*;q=0.6,*/*;q=0.5",
         "accept-encoding": "identity",
-        "accept-language": initial_request_headers["accept-language"],
-        "connection": initial_request_headers["connection"],
-        "cookie": initial_request_headers["cookie"],
+        "accept-language": initial_request_headers.get("accept-language"),
+        "connection": initial_request_headers.get("connection", "keep-alive"),
+        "cookie": initial_request_headers.get("cookie"),
         "host": download_url_host,
         "range": "bytes=0-",
         "referrer": "https://www.tiktok.com/",
-        "user-agent": initial_request_headers["user-agent"],
-        "accept-language": initial_request_headers["accept-language"],
+        "user-agent": initial_request_headers.get("user-agent"),
     }
 
     save_path = f"{download_path}{video_info.post_id}.mp4"
-    with requests.get(
-        video_info.download_url, headers=video_request_headers, stream=True
-    ) as r:
-        r.raise_for_status()
-        with open(save_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
-                f.write(chunk)
+    await get_running_loop().run_in_executor(
+        None,
+        __download_file,
+        http_client,
+        video_info.download_url,
+        video_request_headers,
+        save_path,
+    )
 
     video_info.file_path = save_path
+    if media_processor is not None:
+        video_info.media_info = await __try_process_media(
+            media_processor.video, save_path
+        )
 
 
-async def download_slideshow(video_info: TikTokSlide, download_path: Union[str, None]):
+async def download_slideshow(
+    video_info: TikTokSlide,
+    download_path: Union[str, None],
+    http_client: Union["HttpClient", None] = None,
+    media_processor: Union["MediaProcessor", None] = None,
+):
     """For a given Slideshow post, download the images associated with it.
 
     Args:
         video_info (TikTokSlide): The Slideshow post data.
         download_path (str | None): The path to download the images to. If None, uses current directory.
+        http_client (HttpClient | None, optional): The HTTP client to download with. Defaults to None, the shared client of the process.
+        media_processor (MediaProcessor | None, optional): If given, used to set `video_info.media_info` from the bytes of each image as it is downloaded, with None for any image that could not be processed. Defaults to None.
     """
+    from tiktokdl.http_client import get_http_client
+
+    http_client = http_client or get_http_client()
     download_path = __validate_download_path(download_path)
 
+    loop = get_running_loop()
     images = []
+    processing = []
     for idx, image_info in enumerate(video_info.images):
         image_url = image_info.get("image_url")[-1]
         file = f"{download_path}{idx+1}.jpeg"
-        urlretrieve(image_url, file)
+        image_data = await loop.run_in_executor(
+            None,
+            __download_file,
+            http_client,
+            image_url,
+            SLIDESHOW_IMAGE_HEADERS,
+            file,
+            media_processor is not None,
+        )
         images.append(file)
 
+        if media_processor is not None:
+            # Scheduled now, so the image is processed while the next one downloads.
+            processing.append(
+                ensure_future(
+                    __try_process_media(media_processor.image, image_data, file)
+                )
+            )
+
     video_info.images = images
+    if processing:
+        video_info.media_info = list(await gather(*processing))
+
+
+async def __capture_detail_response(
+    page: Page, url: str, request_timeout: float
+) -> Tuple[Dict[str, str], bytes]:
+    """Navigate to a post and intercept the post detail API call made by the page.
+
+    Args:
+        page (Page): The page to navigate with.
+        url (str): The URL of the post.
+        request_timeout (float): The number of ms to wait for the post detail API call.
+
+    Raises:
+        PlaywrightTimeoutError: If the post detail API call was not made within the timeout.
+
+    Returns:
+        Tuple[Dict[str, str], bytes]: All the headers of the API request, and the raw body of the API response.
+    """
+    captured = get_running_loop().create_future()
+
+    async def capture(route: Route):
+        response = await route.fetch()
+        body = await response.body()
+        if not captured.done():
+            captured.set_result((await route.request.all_headers(), body))
+        try:
+            await route.fulfill(response=response, body=body)
+        except PlaywrightError:
+            # The page may be closed as soon as the response was captured, anything else is a real error.
+            if not page.is_closed():
+                raise
+
+    await page.route(ITEM_DETAIL_API_GLOB, capture)
+    await page.goto(url, wait_until="commit", timeout=request_timeout)
+    try:
+        return await wait_for(captured, request_timeout / 1000.0)
+    except AsyncTimeoutError:
+        raise PlaywrightTimeoutError(
+            f"Timeout exceeded {request_timeout}ms while waiting for the post details of {url}."
+        )
+
+
+async def __process_post(
+    url: str,
+    request_headers: Dict[str, str],
+    body: bytes,
+    download: bool,
+    download_path: Union[str, None],
+    http_client: Union["HttpClient", None] = None,
+    media_processor: Union["MediaProcessor", None] = None,
+) -> Union[TikTokSlide, TikTokVideo]:
+    try:
+        parsed_response = __parse_api_response(json_loads(body))
+    except:
+        raise ResponseParseException(url=url)
+
+    if download:
+        try:
+            if isinstance(parsed_response, TikTokSlide):
+                await download_slideshow(
+                    parsed_response, download_path, http_client, media_processor
+                )
+            else:
+                await download_video(
+                    request_headers,
+                    parsed_response,
+                    download_path,
+                    http_client,
+                    media_processor,
+                )
+        except:
+            raise DownloadFailedException(url=url)
+
+    return parsed_response
+
+
+async def __capture_post(
+    context: BrowserContext, url: str, request_timeout: float
+) -> Tuple[Dict[str, str], bytes]:
+    page = await context.new_page()
+    try:
+        # TODO: Reimplement CAPTACHA verification
+        # await page.goto(url)
+        # if not await verify_session(page):
+        #     raise CaptchaFailedException(url=url)
+
+        return await __capture_detail_response(page, url, request_timeout)
+    finally:
+        await page.close()
+
+
+async def __get_post_in_context(
+    context: BrowserContext,
+    url: str,
+    download: bool,
+    request_timeout: float,
+    download_path: Union[str, None],
+    http_client: Union["HttpClient", None] = None,
+    media_processor: Union["MediaProcessor", None] = None,
+) -> Union[TikTokSlide, TikTokVideo]:
+    page = await context.new_page()
+    try:
+        request_headers, body = await __capture_detail_response(
+            page, url, request_timeout
+        )
+        return await __process_post(
+            url,
+            request_headers,
+            body,
+            download,
+            download_path,
+            http_client,
+            media_processor,
+        )
+    finally:
+        await page.close()
 
 
 async def __get_post(
@@ -213,43 +419,77 @@ async def __get_post(
     download_path: Union[str, None] = None,
     headless: Union[bool, None] = None,
     slow_mo: Union[float, None] = None,
+    profile: Union[ContextProfile, str, None] = None,
+    pool: Union[BrowserPool, None] = None,
+    early_abort: bool = False,
+    http_client: Union["HttpClient", None] = None,
+    media_processor: Union["MediaProcessor", None] = None,
     **kwargs,
 ) -> Union[TikTokSlide, TikTokVideo]:
-    async with async_playwright() as playwright:
+    if download and http_client is None:
+        from tiktokdl.http_client import get_http_client
+
+        http_client = get_http_client(pool.proxy if pool is not None else proxy)
+
+    if pool is not None:
+        # Bounds the captured responses held at once, including the ones still downloading after an early abort.
+        async with pool.pending_bodies:
+            async with pool.context() as context:
+                if not early_abort:
+                    return await __get_post_in_context(
+                        context,
+                        url,
+                        download,
+                        request_timeout,
+                        download_path,
+                        http_client,
+                        media_processor,
+                    )
+                request_headers, body = await __capture_post(
+                    context, url, request_timeout
+                )
+
+            return await __process_post(
+                url,
+                request_headers,
+                body,
+                download,
+                download_path,
+                http_client,
+                media_processor,
+            )
 
+    async with async_playwright() as playwright:
         context = await __get_browser(
-            playwright, browser, proxy, headless, slow_mo, **kwargs
+            playwright, browser, proxy, headless, slow_mo, profile, **kwargs
         )
-
-        page = await context.new_page()
-        # TODO: Reimplement CAPTACHA verification
-        # await page.goto(url)
-        # if not await verify_session(page):
-        #     raise CaptchaFailedException(url=url)
-
-        async with page.expect_request(
-            lambda x: "/api/reflow/item/detail/" in x.url, timeout=request_timeout
-        ) as request:
-            await page.goto(url)
-
-        request_value = await request.value
-        response = await request_value.response()
-        data = await response.json()
         try:
-            parsed_response = __parse_api_response(data)
-        except:
-            raise ResponseParseException(url=url)
-
-        if download:
-            try:
-                if isinstance(parsed_response, TikTokSlide):
-                    await download_slideshow(parsed_response, download_path)
-                else:
-                    await download_video(response, parsed_response, download_path)
-            except:
-                raise DownloadFailedException(url=url)
-
-        return parsed_response
+            if not early_abort:
+                return await __get_post_in_context(
+                    context,
+                    url,
+                    download,
+                    request_timeout,
+                    download_path,
+                    http_client,
+                    media_processor,
+                )
+            request_headers, body = await __capture_post(context, url, request_timeout)
+        finally:
+            # Close them explicitly rather than leaving it to the Playwright driver shutting down.
+            await context.close()
+            await context.browser.close()
+
+    # The page is closed and the browser context released, only the captured headers are used from here on.
+    return await __process_post(
+        url,
+        request_headers,
+        body,
+        download,
+        download_path,
+        http_client,
+        media_processor,
+    )
 
 
 async def get_post(
@@ -263,6 +503,11 @@ async def get_post(
     download_path: Union[str, None] = None,
     headless: Union[bool, None] = None,
     slow_mo: Union[float, None] = None,
+    profile: Union[ContextProfile, str, None] = None,
+    pool: Union[BrowserPool, None] = None,
+    early_abort: bool = False,
+    http_client: Union["HttpClient", None] = None,
+    process_media: Union["MediaProcessor", bool] = False,
     **kwargs,
 ) -> Union[TikTokSlide, TikTokVideo]:
     """Get the information about a given video URL. If the `download` param is set to True, also download the video as an mp4 file or slideshow images as JPEG files.
@@ -278,6 +523,11 @@ async def get_post(
         download_path (str | None, optional): The path to download vidoes or images to. Defaults to None, the current directory.
         headless (bool | None, optional): If the browser should be headless. Defaults to None.
         slow_mo (float | None, optional): Slow the browser down, useful when not headless. Defaults to None.
+        profile (ContextProfile | str | None, optional): The browser context profile, or the name of a built-in profile ("default", "lightweight" or "minimal"). Defaults to None, the default profile.
+        pool (BrowserPool | None, optional): A running browser pool to take a warm context from instead of launching a new browser. When given, the browser, proxy, headless, slow_mo and profile arguments are ignored in favour of the pool's. Defaults to None.
+        early_abort (bool, optional): Close the page as soon as the post details have been captured and give the browser back (to the pool, or shut it down) before parsing and downloading. The download then only reuses the captured request headers and cookies. Defaults to False.
+        http_client (HttpClient | None, optional): The HTTP client to download media with. Defaults to None, the client shared by the process for the proxy settings, so connections to the CDN are reused between posts and retries.
+        process_media (MediaProcessor | bool, optional): Compute the dimensions, perceptual hashes and thumbnails of the downloaded media into `media_info`, with the given processor or, if True, the processor shared by the process. Only used when download is True. A processing error does not fail the post, the media info of that file is left as None. Defaults to False.
 
     Raises:
         ResponseParseException: If there was an error while parsing the response data to video info.
@@ -291,6 +541,14 @@ async def get_post(
     if download and browser != "firefox":
         print("WARNING: Downloading is not supported on browsers other than firefox!")
 
+    media_processor = None
+    if download and process_media:
+        from tiktokdl.media_processing import get_media_processor
+
+        media_processor = (
+            get_media_processor() if process_media is True else process_media
+        )
+
     for x in range(retries + 1):
         try:
             result = await __get_post(
@@ -302,6 +560,11 @@ async def get_post(
                 download_path=download_path,
                 headless=headless,
                 slow_mo=slow_mo,
+                profile=profile,
+                pool=pool,
+                early_abort=early_abort,
+                http_client=http_client,
+                media_processor=media_processor,
                 **kwargs,
             )
             return result
@@ -311,3 +574,95 @@ async def get_post(
                 continue
 
             raise RetryLimitReached(e, retries, url)
+
+
+async def __refresh_stats_in_context(
+    context: BrowserContext,
+    post_ids: List[str],
+    concurrency: int,
+    request_timeout: float,
+) -> List[Union[TikTokPostStats, None]]:
+    if get_ms_token(await context.cookies()) is None:
+        # Only establish a session when the context does not have one yet, eg. from a prewarmed pool.
+        page = await context.new_page()
+        try:
+            await page.goto(TIKTOK_HOME_URL)
+        finally:
+            await page.close()
+
+    limit = Semaphore(concurrency)
+
+    async def fetch_stats(post_id: str) -> Union[TikTokPostStats, None]:
+        async with limit:
+            try:
+                response = await context.request.get(
+                    ITEM_DETAIL_API_URL,
+                    params={"item_id": post_id},
+                    timeout=request_timeout,
+                )
+                return __parse_item_stats(json_loads(await response.body()))
+            except Exception as e:
+                logger.warning(
+                    "Could not refresh the stats of post %s: %s: %s",
+                    post_id,
+                    e.__class__.__name__,
+                    e,
+                )
+                return None
+
+    return await gather(*(fetch_stats(post_id) for post_id in post_ids))
+
+
+async def refresh_post_stats(
+    post_ids: List[str],
+    store: Union[StatsStore, None] = None,
+    browser: Literal["chromium", "firefox", "webkit"] = "firefox",
+    proxy: Union[dict, None] = None,
+    concurrency: int = 8,
+    request_timeout: float = 5000,
+    headless: Union[bool, None] = None,
+    slow_mo: Union[float, None] = None,
+    profile: Union[ContextProfile, str, None] = "minimal",
+    pool: Union[BrowserPool, None] = None,
+    **kwargs,
+) -> Dict[str, Union[TikTokPostStats, None]]:
+    """Get the current engagement stats of many known posts. A single browser session is established once and then
+    reused to call the post detail API directly for every post, so the post pages are never loaded and nothing is downloaded.
+
+    Args:
+        post_ids (List[str]): The IDs of the posts to refresh.
+        store (StatsStore | None, optional): A store to append the new samples to. Defaults to None.
+        browser (Literal[&quot;chromium&quot;, &quot;firefox&quot;, &quot;webkit&quot;], optional): The browser framework to use. Defaults to "firefox".
+        proxy (dict | None, optional): The proxy settings to use for the requests. Defaults to None.
+        concurrency (int, optional): The maximum number of API requests in flight at once. Defaults to 8.
+        request_timeout (float, optional): The number of ms to wait for each API request. Defaults to 5000.
+        headless (bool | None, optional): If the browser should be headless. Defaults to None.
+        slow_mo (float | None, optional): Slow the browser down, useful when not headless. Defaults to None.
+        profile (ContextProfile | str | None, optional): The browser context profile used to establish the session. Defaults to "minimal".
+        pool (BrowserPool | None, optional): A running browser pool to take a context from instead of launching a new browser. A context that already has a TikTok session, eg. from a `SessionPrewarmer`, is used as is. When given, the browser, proxy, headless, slow_mo and profile arguments are ignored in favour of the pool's. Defaults to None.
+
+    Returns:
+        Dict[str, TikTokPostStats | None]: The stats of each post ID, or None if the stats for that post could not be fetched. The reason is logged as a warning.
+    """
+    if pool is not None:
+        async with pool.context() as context:
+            results = await __refresh_stats_in_context(
+                context, post_ids, concurrency, request_timeout
+            )
+    else:
+        async with async_playwright() as playwright:
+            context = await __get_browser(
+                playwright, browser, proxy, headless, slow_mo, profile, **kwargs
+            )
+            try:
+                results = await __refresh_stats_in_context(
+                    context, post_ids, concurrency, request_timeout
+                )
+            finally:
+                await context.close()
+                await context.browser.close()
+
+    if store is not None:
+        store.append_many(stats for stats in results if stats is not None)
+
+    return dict(zip(post_ids, results))
@@ -0,0 +1,297 @@
+"""A shared HTTP client for downloading media, with keep-alive connection pooling, DNS caching and proxy support.
+
+Every download made through the same client reuses open connections to the CDN hosts, so only the first request to a
+host pays for the TCP and TLS handshakes.
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import quote, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from typing import Dict, Tuple, Union
+
+__all__ = ["ConnectionMetrics", "DnsCache", "HttpClient", "get_http_client"]
+
+# The number of hosts to keep a connection pool for, and the number of open connections kept per host.
+DEFAULT_POOL_HOSTS = 16
+DEFAULT_POOL_SIZE = 16
+
+# How long in seconds a resolved address is reused.
+DEFAULT_DNS_TTL = 300
+
+# The connect and read timeouts in seconds.
+DEFAULT_TIMEOUT = (10, 30)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+@dataclass()
+class ConnectionMetrics:
+    requests: int = 0
+    connections: int = 0
+    dns_hits: int = 0
+    dns_misses: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0
+
+
+def proxy_url(proxy: Union[dict, None]) -> Union[str, None]:
+    """Convert Playwright proxy settings to a proxy URL.
+
+    Args:
+        proxy (dict | None): The Playwright proxy settings, with a "server" and optional "username" and "password".
+
+    Returns:
+        str | None: The proxy URL, or None if no proxy is set.
+    """
+    if not proxy or not proxy.get("server"):
+        return None
+
+    server = proxy.get("server")
+    if "://" not in server:
+        # Playwright treats a server without a scheme as a HTTP proxy.
+        server = f"http://{server}"
+
+    username = proxy.get("username")
+    if not username:
+        return server
+
+    scheme, address = server.split("://", 1)
+    credentials = quote(username, safe="")
+    if proxy.get("password"):
+        credentials += f":{quote(proxy.get('password'), safe='')}"
+    return f"{scheme}://{credentials}@{address}"
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+class DnsCache:
+    """Caches the resolved address of each host for a fixed time, shared by every connection of a client."""
+
+    def __init__(self, ttl: float = DEFAULT_DNS_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, int], Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> str:
+        """Get the address to connect to for a host.
+
+        Args:
+            host (str): The hostname.
+            port (int): The port that will be connected to.
+
+        Returns:
+            str: The IP address of the host, or the host unchanged if it is already an address.
+        """
+        if _is_ip_address(host):
+            return host
+
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+
+        addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        address = addresses[0][4][0]
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (address, time.monotonic() + self.ttl)
+        return address
+
+    def invalidate(self, host: str, port: int):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+def _cached_dns_pool(pool_class: type, dns_cache: DnsCache) -> type:
+    """Subclass a urllib3 connection pool so its new connections connect to the cached address of the host.
+
+    The hostname is still used for the Host header, SNI and certificate verification.
+    """
+
+    class CachedDnsConnection(pool_class.ConnectionCls):
+        def _new_conn(self):
+            host = self._dns_host
+            self._dns_host = dns_cache.resolve(host, self.port)
+            try:
+                return super()._new_conn()
+            except Exception:
+                # The cached address may be stale, resolve again for the next attempt.
+                dns_cache.invalidate(host, self.port)
+                raise
+            finally:
+                self._dns_host = host
+
+    return type(
+        pool_class.__name__, (pool_class,), {"ConnectionCls": CachedDnsConnection}
+    )
+
+
+class _PooledAdapter(HTTPAdapter):
+
+    def __init__(self, dns_cache: Union[DnsCache, None] = None, **kwargs):
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if self.dns_cache is not None:
+            self.poolmanager.pool_classes_by_scheme = {
+                scheme: _cached_dns_pool(pool_class, self.dns_cache)
+                for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+            }
+
+
+class HttpClient:
+    """A `requests.Session` configured for downloading media from the TikTok CDN hosts.
+
+    Connections are kept open and reused per host, failed requests are retried with backoff on the same pool, and the
+    proxy is taken from the same settings that are given to the browser.
+    """
+
+    def __init__(
+        self,
+        proxy: Union[dict, None] = None,
+        pool_hosts: int = DEFAULT_POOL_HOSTS,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        retries: int = 3,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        dns_ttl: Union[float, None] = DEFAULT_DNS_TTL,
+    ):
+        """Create a HTTP client.
+
+        Args:
+            proxy (dict | None, optional): The Playwright proxy settings to use, see https://playwright.dev/python/docs/api/class-browsertype#browser-type-launch-option-proxy. Defaults to None.
+            pool_hosts (int, optional): The number of hosts to keep open connections to. Defaults to 16.
+            pool_size (int, optional): The number of open connections kept per host. Defaults to 16.
+            retries (int, optional): The number of times a request is retried on connection errors and 429 or 5xx responses. Defaults to 3.
+            timeout (float | Tuple[float, float], optional): The connect and read timeouts in seconds. Defaults to (10, 30).
+            dns_ttl (float | None, optional): How long in seconds to reuse a resolved address. Defaults to 300, None disables the cache.
+        """
+        self.proxy = proxy
+        self.timeout = timeout
+        self.dns_cache = DnsCache(dns_ttl) if dns_ttl else None
+
+        self._bypass = [
+            host.strip().lstrip("*").lower()
+            for host in ((proxy or {}).get("bypass") or "").split(",")
+            if host.strip()
+        ]
+
+        self.session = requests.Session()
+        self._adapter = _PooledAdapter(
+            dns_cache=self.dns_cache,
+            pool_connections=pool_hosts,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.25,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=("GET", "HEAD"),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+        url = proxy_url(proxy)
+        if url is not None:
+            self.session.proxies.update({"http": url, "https": url})
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def __bypasses_proxy(self, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        for pattern in self._bypass:
+            if (
+                pattern == ""
+                or host == pattern.lstrip(".")
+                or host.endswith(f".{pattern.lstrip('.')}")
+            ):
+                return True
+        return False
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Make a GET request with the shared connection pools. Keyword arguments are passed on to `requests.Session.get`.
+
+        Args:
+            url (str): The URL to get.
+
+        Returns:
+            requests.Response: The response. Streamed responses must be closed to give the connection back to the pool.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if self._bypass and self.__bypasses_proxy(url):
+            kwargs["proxies"] = {"http": None, "https": None}
+        return self.session.get(url, **kwargs)
+
+    @property
+    def metrics(self) -> ConnectionMetrics:
+        """The number of requests made and connections opened by the connection pools that are currently open."""
+        metrics = ConnectionMetrics()
+        managers = [self._adapter.poolmanager, *self._adapter.proxy_manager.values()]
+        for manager in managers:
+            for key in manager.pools.keys():
+                pool = manager.pools[key]
+                metrics.requests += pool.num_requests
+                metrics.connections += pool.num_connections
+
+        if self.dns_cache is not None:
+            metrics.dns_hits = self.dns_cache.hits
+            metrics.dns_misses = self.dns_cache.misses
+        return metrics
+
+
+_shared_clients: Dict[Union[str, None], HttpClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_http_client(proxy: Union[dict, None] = None) -> HttpClient:
+    """Get the HTTP client shared by the current process for the given proxy settings, creating it on first use.
+
+    Args:
+        proxy (dict | None, optional): The Playwright proxy settings. Defaults to None.
+
+    Returns:
+        HttpClient: The shared client.
+    """
+    key = None
+    if proxy:
+        key = f"{proxy_url(proxy)}|{proxy.get('bypass') or ''}"
+
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = HttpClient(proxy=proxy)
+            _shared_clients[key] = client
+        return client
@@ -1,7 +1,6 @@
 import cv2 as cv
 from cv2 import Mat
 import numpy as np
-from urllib.request import urlopen
 
 from typing import Tuple
 
@@ -49,6 +48,66 @@ def preprocess(image: Mat) -> Mat:
     return gradient
 
 
+def difference_hash(image: Mat, hash_size: int = 8) -> int:
+    """Get the difference hash (dHash) of an image. Similar images have hashes with a small hamming distance.
+
+    Args:
+        image (Mat): The image to hash.
+        hash_size (int, optional): The width and height of the gradient grid, the hash has hash_size^2 bits. Defaults to 8.
+
+    Returns:
+        int: The hash of the image.
+    """
+    if image.ndim == 3:
+        code = cv.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv.COLOR_BGR2GRAY
+        image = cv.cvtColor(image, code)
+
+    resized = cv.resize(image, (hash_size + 1, hash_size), interpolation=cv.INTER_AREA)
+    bits = (resized[:, 1:] > resized[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def perceptual_hash(image: Mat, hash_size: int = 8, highfreq_factor: int = 4) -> int:
+    """Get the perceptual hash (pHash) of an image from the low frequencies of its discrete cosine transform. More robust to re-encoding and small edits than `difference_hash`.
+
+    Args:
+        image (Mat): The image to hash.
+        hash_size (int, optional): The width and height of the block of low frequencies used, the hash has hash_size^2 bits. Defaults to 8.
+        highfreq_factor (int, optional): How many times larger than hash_size the image is scaled to before the transform. Defaults to 4.
+
+    Returns:
+        int: The hash of the image.
+    """
+    if image.ndim == 3:
+        code = cv.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv.COLOR_BGR2GRAY
+        image = cv.cvtColor(image, code)
+
+    size = hash_size * highfreq_factor
+    resized = cv.resize(image, (size, size), interpolation=cv.INTER_AREA)
+    frequencies = cv.dct(np.float32(resized))[:hash_size, :hash_size]
+    # The DC term is the average brightness, so it is left out of the median.
+    bits = (frequencies > np.median(frequencies.flatten()[1:])).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def thumbnail(image: Mat, max_size: int) -> Mat:
+    """Scale an image down so its longest side is at most max_size, keeping its aspect ratio.
+
+    Args:
+        image (Mat): The image to scale.
+        max_size (int): The maximum width and height of the thumbnail.
+
+    Returns:
+        Mat: The thumbnail, or the image itself if it is already small enough.
+    """
+    height, width = image.shape[:2]
+    scale = max_size / float(max(height, width))
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv.resize(image, size, interpolation=cv.INTER_AREA)
+
+
 def image_from_url(url: str) -> Mat:
     """Load an image from a URL.
 
@@ -58,8 +117,24 @@ def image_from_url(url: str) -> Mat:
     Returns:
         Mat: The image object of the given URL.
     """
-    image_request = urlopen(url)
-    image_array = np.asarray(bytearray(image_request.read()), dtype=np.uint8)
+    # Only load requests when an image is actually fetched, so the solver and media workers do not import it.
+    from tiktokdl.http_client import get_http_client
+
+    image_request = get_http_client().get(url)
+    image_request.raise_for_status()
+    return image_from_bytes(image_request.content)
+
+
+def image_from_bytes(data: bytes) -> Mat:
+    """Decode an image from its encoded bytes, eg. the body of an image response.
+
+    Args:
+        data (bytes): The encoded image.
+
+    Returns:
+        Mat: The decoded image.
+    """
+    image_array = np.frombuffer(data, dtype=np.uint8)
     return cv.imdecode(image_array, -1)
 
 
@@ -0,0 +1,233 @@
+"""Compute dimensions, perceptual hashes and thumbnails of downloaded media in a pool of worker processes.
+
+Slideshow images are processed from the bytes kept while they were downloaded, so the files are never read back.
+Videos are processed straight after they are written, only seeking to and decoding a few sampled frames.
+"""
+
+import multiprocessing
+import threading
+from asyncio import Future, get_running_loop
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2 as cv
+
+from tiktokdl.image_processing import (
+    difference_hash,
+    image_from_bytes,
+    perceptual_hash,
+    thumbnail,
+)
+from tiktokdl.post_data import MediaInfo
+
+from typing import Union
+
+__all__ = ["MediaProcessor", "get_media_processor", "process_image", "process_video"]
+
+# The longest side in px of the thumbnails that are written.
+THUMBNAIL_SIZE = 320
+
+# The number of frames sampled evenly across a video to hash.
+VIDEO_SAMPLE_FRAMES = 5
+
+THUMBNAIL_QUALITY = 85
+
+
+def __write_thumbnail(image, path: Union[str, None], max_size: int) -> Union[str, None]:
+    if path is None:
+        return None
+    cv.imwrite(
+        path, thumbnail(image, max_size), [cv.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY]
+    )
+    return path
+
+
+def process_image(
+    data: bytes,
+    thumbnail_path: Union[str, None] = None,
+    thumbnail_size: int = THUMBNAIL_SIZE,
+) -> MediaInfo:
+    """Get the media info of an encoded image, and optionally write a thumbnail of it.
+
+    Args:
+        data (bytes): The encoded image.
+        thumbnail_path (str | None, optional): The path to write the thumbnail to. Defaults to None, no thumbnail.
+        thumbnail_size (int, optional): The longest side of the thumbnail in px. Defaults to 320.
+
+    Returns:
+        MediaInfo: The dimensions and hashes of the image.
+    """
+    image = image_from_bytes(data)
+    height, width = image.shape[:2]
+    return MediaInfo(
+        width=width,
+        height=height,
+        difference_hash=difference_hash(image),
+        perceptual_hash=perceptual_hash(image),
+        thumbnail_path=__write_thumbnail(image, thumbnail_path, thumbnail_size),
+    )
+
+
+def process_video(
+    path: str,
+    thumbnail_path: Union[str, None] = None,
+    thumbnail_size: int = THUMBNAIL_SIZE,
+    sample_frames: int = VIDEO_SAMPLE_FRAMES,
+) -> Union[MediaInfo, None]:
+    """Get the media info of a video file from a few frames sampled evenly across it, and optionally write a thumbnail of the first frame.
+
+    Args:
+        path (str): The path of the video file.
+        thumbnail_path (str | None, optional): The path to write the thumbnail to. Defaults to None, no thumbnail.
+        thumbnail_size (int, optional): The longest side of the thumbnail in px. Defaults to 320.
+        sample_frames (int, optional): The number of frames to hash. Defaults to 5.
+
+    Returns:
+        MediaInfo | None: The dimensions, duration and hashes of the video, hashed from the middle sampled frame, or None if no frame could be decoded.
+    """
+    capture = cv.VideoCapture(path)
+    try:
+        frame_count = int(capture.get(cv.CAP_PROP_FRAME_COUNT))
+        fps = capture.get(cv.CAP_PROP_FPS)
+
+        if frame_count > 1:
+            step = frame_count / float(sample_frames)
+            positions = sorted({int(idx * step) for idx in range(sample_frames)})
+        else:
+            positions = [0]
+
+        frames = []
+        for position in positions:
+            if position:
+                capture.set(cv.CAP_PROP_POS_FRAMES, position)
+            success, frame = capture.read()
+            if success:
+                frames.append(frame)
+    finally:
+        capture.release()
+
+    if not frames:
+        return None
+
+    middle = frames[len(frames) // 2]
+    height, width = middle.shape[:2]
+    return MediaInfo(
+        width=width,
+        height=height,
+        difference_hash=difference_hash(middle),
+        perceptual_hash=perceptual_hash(middle),
+        thumbnail_path=__write_thumbnail(frames[0], thumbnail_path, thumbnail_size),
+        duration=frame_count / fps if fps else None,
+        frame_hashes=[difference_hash(frame) for frame in frames],
+    )
+
+
+class MediaProcessor:
+    """Runs `process_image` and `process_video` off the event loop, in worker processes or threads."""
+
+    def __init__(
+        self,
+        workers: Union[int, None] = None,
+        processes: bool = True,
+        thumbnails: bool = True,
+        thumbnail_size: int = THUMBNAIL_SIZE,
+        sample_frames: int = VIDEO_SAMPLE_FRAMES,
+    ):
+        """Create a media processor. The workers are started on first use.
+
+        Args:
+            workers (int | None, optional): The number of worker processes or threads. Defaults to None, the number of CPUs.
+            processes (bool, optional): If processes should be used, otherwise threads. OpenCV releases the GIL for most of the work, so threads avoid the start up cost when only a few posts are processed. Defaults to True.
+            thumbnails (bool, optional): If thumbnails should be written next to the downloaded media. Defaults to True.
+            thumbnail_size (int, optional): The longest side of the thumbnails in px. Defaults to 320.
+            sample_frames (int, optional): The number of frames of each video to hash. Defaults to 5.
+        """
+        self.workers = workers
+        self.processes = processes
+        self.thumbnails = thumbnails
+        self.thumbnail_size = thumbnail_size
+        self.sample_frames = sample_frames
+
+        self._executor: Union[Executor, None] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "MediaProcessor":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.processes:
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers)
+            return self._executor
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def __thumbnail_path(self, media_path: str) -> Union[str, None]:
+        if not self.thumbnails:
+            return None
+        return f"{media_path.rsplit('.', 1)[0]}_thumbnail.jpeg"
+
+    def image(self, data: bytes, image_path: str) -> "Future[MediaInfo]":
+        """Start processing an image that was downloaded to image_path from its bytes. The work is submitted straight away, so it runs while the caller carries on downloading.
+
+        Args:
+            data (bytes): The encoded image.
+            image_path (str): The path the image was saved to, the thumbnail is written next to it.
+
+        Returns:
+            Future[MediaInfo]: The media info of the image, once processed.
+        """
+        return get_running_loop().run_in_executor(
+            self.executor,
+            process_image,
+            data,
+            self.__thumbnail_path(image_path),
+            self.thumbnail_size,
+        )
+
+    def video(self, video_path: str) -> "Future[Union[MediaInfo, None]]":
+        """Start processing a downloaded video.
+
+        Args:
+            video_path (str): The path of the video, the thumbnail is written next to it.
+
+        Returns:
+            Future[MediaInfo | None]: The media info of the video once processed, or None if it could not be decoded.
+        """
+        return get_running_loop().run_in_executor(
+            self.executor,
+            process_video,
+            video_path,
+            self.__thumbnail_path(video_path),
+            self.thumbnail_size,
+            self.sample_frames,
+        )
+
+
+_shared_processor: Union[MediaProcessor, None] = None
+_shared_processor_lock = threading.Lock()
+
+
+def get_media_processor() -> MediaProcessor:
+    """Get the media processor shared by the current process, creating it on first use.
+
+    Returns:
+        MediaProcessor: The shared processor.
+    """
+    global _shared_processor
+    with _shared_processor_lock:
+        if _shared_processor is None:
+            _shared_processor = MediaProcessor()
+        return _shared_processor
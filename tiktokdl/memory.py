@@ -0,0 +1,221 @@
+"""Measure the memory used by this process and the browsers it launched, and report it periodically."""
+
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+from typing import Callable, Dict, List, Union
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+__all__ = [
+    "MemoryMonitor",
+    "MemoryReport",
+    "find_child_processes",
+    "memory_report",
+    "process_tree_rss",
+]
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+@dataclass()
+class MemoryReport:
+    timestamp: float
+    rss: int
+    children_rss: Union[int, None]
+    peak_rss: int
+    traced_current: Union[int, None] = None
+    traced_peak: Union[int, None] = None
+    top_allocations: List[str] = field(default_factory=list)
+
+    @property
+    def total_rss(self) -> int:
+        return self.rss + (self.children_rss or 0)
+
+
+def __read_rss(pid: int) -> Union[int, None]:
+    try:
+        with open(f"/proc/{pid}/statm") as file:
+            return int(file.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def __child_pids() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as file:
+                # The command name may contain spaces, the parent pid is the second field after it.
+                parent = int(file.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    return children
+
+
+def find_child_processes(command: str, pid: Union[int, None] = None) -> List[int]:
+    """Find the direct children of a process whose command line contains a string, eg. the Playwright driver.
+
+    Args:
+        command (str): The string to look for in the command line, the arguments are joined with spaces.
+        pid (int | None, optional): The parent process. Defaults to None, the current process.
+
+    Returns:
+        List[int]: The pids of the matching children, empty if they cannot be read on this platform.
+    """
+    if not os.path.isdir("/proc"):
+        return []
+
+    matches = []
+    for child in __child_pids().get(pid or os.getpid(), []):
+        try:
+            with open(f"/proc/{child}/cmdline", "rb") as file:
+                command_line = file.read().replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            continue
+        if command in command_line:
+            matches.append(child)
+    return matches
+
+
+def process_tree_rss(
+    pid: Union[int, None] = None, include_root: bool = True
+) -> Union[int, None]:
+    """Get the resident memory of a process and all of its descendants, eg. the Playwright driver and the browsers it launched.
+
+    Args:
+        pid (int | None, optional): The root process. Defaults to None, the current process.
+        include_root (bool, optional): If the memory of the root process itself is included. Defaults to True.
+
+    Returns:
+        int | None: The resident memory in bytes, or None if it cannot be read on this platform.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+
+    pid = pid or os.getpid()
+    children = __child_pids()
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        if current != pid or include_root:
+            total += __read_rss(current) or 0
+        pending.extend(children.get(current, []))
+    return total
+
+
+def __peak_rss() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def memory_report(top: int = 0) -> MemoryReport:
+    """Take a snapshot of the memory used by the current process and its descendants.
+
+    Args:
+        top (int, optional): The number of largest allocation sites to include, if `tracemalloc` is tracing. Defaults to 0.
+
+    Returns:
+        MemoryReport: The memory report.
+    """
+    rss = __read_rss(os.getpid())
+    report = MemoryReport(
+        timestamp=time.time(),
+        rss=rss if rss is not None else __peak_rss(),
+        children_rss=process_tree_rss(include_root=False),
+        peak_rss=__peak_rss(),
+    )
+
+    if tracemalloc.is_tracing():
+        report.traced_current, report.traced_peak = tracemalloc.get_traced_memory()
+        if top:
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+            report.top_allocations = [str(statistic) for statistic in statistics]
+
+    return report
+
+
+class MemoryMonitor:
+    """Calls a hook with a `MemoryReport` at a fixed interval from a background task, eg. to log memory growth of a long crawl."""
+
+    def __init__(
+        self,
+        on_report: Callable[[MemoryReport], None],
+        interval: float = 60,
+        trace: bool = False,
+        top: int = 10,
+    ):
+        """Create a memory monitor. It is started by `start` or when entering it as an async context manager.
+
+        Args:
+            on_report (Callable[[MemoryReport], None]): The hook called with every report.
+            interval (float, optional): The number of seconds between reports. Defaults to 60.
+            trace (bool, optional): If `tracemalloc` should be started to include Python allocations in the reports. Tracing slows down allocations considerably. Defaults to False.
+            top (int, optional): The number of largest allocation sites included when tracing. Defaults to 10.
+        """
+        self.on_report = on_report
+        self.interval = interval
+        self.trace = trace
+        self.top = top
+        self.reports = 0
+
+        self._task: Union[asyncio.Task, None] = None
+        self._started_tracing = False
+
+    async def __run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.report()
+
+    def report(self) -> MemoryReport:
+        """Take a report and call the hook with it straight away.
+
+        Returns:
+            MemoryReport: The report.
+        """
+        report = memory_report(self.top if self.trace else 0)
+        self.reports += 1
+        self.on_report(report)
+        return report
+
+    def start(self) -> "MemoryMonitor":
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.__run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    async def __aenter__(self) -> "MemoryMonitor":
+        return self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
@@ -4,6 +4,17 @@ from datetime import datetime
 from typing import List
 
 
+@dataclass()
+class MediaInfo:
+    width: int
+    height: int
+    difference_hash: int
+    perceptual_hash: int
+    thumbnail_path: str = None
+    duration: float = None
+    frame_hashes: List[int] = None
+
+
 @dataclass()
 class TikTokPost:
     url: str
@@ -27,8 +38,20 @@ class TikTokVideo(TikTokPost):
     video_thumbnail: str
     download_url: str
     file_path: str = None
+    media_info: MediaInfo = None
 
 
 @dataclass()
 class TikTokSlide(TikTokPost):
     images: List[dict] = None
+    media_info: List[MediaInfo] = None
+
+
+@dataclass()
+class TikTokPostStats:
+    post_id: str
+    timestamp: datetime
+    like_count: int
+    share_count: int
+    comment_count: int
+    view_count: int
@@ -0,0 +1,159 @@
+"""Keep browser contexts with an established TikTok session on standby, so posts never wait on a cold session."""
+
+import asyncio
+import time
+
+from playwright.async_api import BrowserContext
+
+from tiktokdl.session_store import get_device_id, get_verify_fp, wait_for_cookie
+from tiktokdl.tiktok_magic import TIKTOK_HOME_URL
+
+from typing import TYPE_CHECKING, Set, Union
+
+if TYPE_CHECKING:
+    from tiktokdl.browser_pool import BrowserPool
+    from tiktokdl.captcha_cache import CaptchaSolutionCache
+
+__all__ = ["SessionPrewarmer"]
+
+# How often in seconds the prewarmer checks the number of idle contexts against the standby wanted.
+PREWARM_POLL_INTERVAL = 0.1
+
+# How long in seconds to back off after a context failed to warm up, eg. while TikTok is unreachable.
+PREWARM_FAILURE_BACKOFF = 2
+
+
+class SessionPrewarmer:
+    """Fills a `BrowserPool` with idle contexts that have already been to TikTok, with the s_v_web_id, msToken and
+    __tea_cache_tokens session state set, and optionally a verified captcha.
+
+    Up to `min_standby` contexts are kept ready. Standby contexts count towards the pool size like contexts in use, so
+    fewer are kept while most of the pool is busy. While callers are queued in `BrowserPool.acquire`, one replacement
+    is kept ready for each of them, up to `min_standby`, so the slot freed by a discarded or worn out context does not
+    start cold.
+    """
+
+    def __init__(
+        self,
+        pool: "BrowserPool",
+        min_standby: int = 1,
+        parallel: int = 2,
+        warm_url: str = TIKTOK_HOME_URL,
+        cookie_timeout: float = 10000,
+        verify: bool = False,
+        solution_cache: Union["CaptchaSolutionCache", None] = None,
+    ):
+        """Create a prewarmer for a pool. Pools created with `standby` start one of their own.
+
+        Args:
+            pool (BrowserPool): The pool to keep warm contexts in.
+            min_standby (int, optional): The number of warm idle contexts to keep. Defaults to 1.
+            parallel (int, optional): The number of contexts warmed at once. Defaults to 2.
+            warm_url (str, optional): The page each context is navigated to. Defaults to TIKTOK_HOME_URL.
+            cookie_timeout (float, optional): How long in ms to wait for the session cookies. Defaults to 10000.
+            verify (bool, optional): If a captcha should be solved with `verify_session` to verify each session. Defaults to False.
+            solution_cache (CaptchaSolutionCache | None, optional): The captcha solution cache used when verifying. Defaults to None.
+        """
+        self.pool = pool
+        self.min_standby = min_standby
+        self.parallel = parallel
+        self.warm_url = warm_url
+        self.cookie_timeout = cookie_timeout
+        self.verify = verify
+        self.solution_cache = solution_cache
+
+        self.warmed = 0
+        self.failed = 0
+        self.warm_time = 0.0
+
+        self._task: Union[asyncio.Task, None] = None
+        self._warming: Set[asyncio.Task] = set()
+
+    @property
+    def target(self) -> int:
+        """The number of warm idle contexts wanted right now, limited by the free slots of the pool and the callers
+        queued for one."""
+        free_slots = max(self.pool.size - self.pool.in_use, 0)
+        return min(self.min_standby, free_slots + self.pool.waiting)
+
+    async def warm(self, context: BrowserContext) -> bool:
+        """Establish a TikTok session in a context.
+
+        Args:
+            context (BrowserContext): The context to warm up.
+
+        Returns:
+            bool: If the session was established, and verified when `verify` is set.
+        """
+        page = await context.new_page()
+        try:
+            await page.goto(self.warm_url, wait_until="domcontentloaded")
+            await get_verify_fp(page, self.cookie_timeout)
+            await get_device_id(page, self.cookie_timeout)
+            await wait_for_cookie(page, "msToken", self.cookie_timeout)
+
+            if self.verify:
+                from tiktokdl.captcha import verify_session
+
+                return await verify_session(
+                    page, self.cookie_timeout, solution_cache=self.solution_cache
+                )
+            return True
+        finally:
+            await page.close()
+
+    async def __warm_one(self):
+        started = time.perf_counter()
+        context = None
+        try:
+            context = await self.pool.new_context()
+            warmed = await self.warm(context)
+        except asyncio.CancelledError:
+            if context is not None:
+                await context.close()
+            raise
+        except Exception:
+            warmed = False
+
+        if not warmed:
+            self.failed += 1
+            if context is not None:
+                await context.close()
+            await asyncio.sleep(PREWARM_FAILURE_BACKOFF)
+            return
+
+        self.warmed += 1
+        self.warm_time += time.perf_counter() - started
+        await self.pool.offer(context)
+
+    async def __run(self):
+        while True:
+            deficit = self.target - self.pool.idle - len(self._warming)
+            for _ in range(min(deficit, self.parallel - len(self._warming))):
+                task = asyncio.ensure_future(self.__warm_one())
+                self._warming.add(task)
+                task.add_done_callback(self._warming.discard)
+
+            await asyncio.sleep(PREWARM_POLL_INTERVAL)
+
+    def start(self) -> "SessionPrewarmer":
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.__run())
+        return self
+
+    async def stop(self):
+        tasks = [*self._warming]
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> "SessionPrewarmer":
+        await self.pool.start()
+        return self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
@@ -1,9 +1,10 @@
 import time
 import json
+from urllib.parse import urlparse
 from playwright.async_api import Page, Cookie
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from typing import List
-from tiktokdl.tiktok_magic import DEVICE_ID_TARGET_COOKIE
+from tiktokdl.tiktok_magic import DEVICE_ID_TARGET_COOKIE, TIKTOK_DOMAIN
 
 
 async def wait_for_cookie(
@@ -32,7 +33,7 @@ async def wait_for_cookie(
             if item.get("name") == target_cookie:
                 return item.get("value")
 
-        if now - start_time > timeout:
+        if (now - start_time) * 1000 > timeout:
             raise PlaywrightTimeoutError(
                 f"Timeout exceeded {timeout}ms while waiting for {target_cookie} to be set."
             )
@@ -40,6 +41,16 @@ async def wait_for_cookie(
         await page.wait_for_timeout(timeout_interval)
 
 
+def __tiktok_local_storage(storage: dict) -> List[dict]:
+    """Get the localStorage items of the TikTok origins in a storage state. Other origins, eg. of embedded frames, are skipped."""
+    items = []
+    for origin in storage.get("origins") or []:
+        host = urlparse(origin.get("origin", "")).hostname or ""
+        if host == TIKTOK_DOMAIN or host.endswith(f".{TIKTOK_DOMAIN}"):
+            items.extend(origin.get("localStorage") or [])
+    return items
+
+
 def get_ms_token(cookies: List[Cookie]) -> str:
     """Get the msToken of the current session.
 
@@ -76,19 +87,19 @@ async def get_device_id(
     """
     start_time = time.time()
     while True:
-        storage = await page.context.storage_state()
-        local_storage = storage.get("origins")[0].get("localStorage")
+        # localStorage is usually still empty right after navigating, so keep polling until TikTok has set it.
+        local_storage = __tiktok_local_storage(await page.context.storage_state())
         now = time.time()
         for item in local_storage:
             if DEVICE_ID_TARGET_COOKIE in item.get("name"):
-                data = json.loads(item.get("value"))
                 try:
+                    data = json.loads(item.get("value"))
                     device_id = int(data.get("user_unique_id"))
                     return device_id
                 except:
                     continue
 
-        if now - start_time > timeout:
+        if (now - start_time) * 1000 > timeout:
             raise PlaywrightTimeoutError(
                 f"Timeout exceeded {timeout}ms while waiting for {DEVICE_ID_TARGET_COOKIE} to be set."
             )
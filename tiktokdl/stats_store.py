@@ -0,0 +1,233 @@
+import sqlite3
+from datetime import datetime, timezone
+
+from tiktokdl.post_data import TikTokPostStats
+
+from typing import Dict, Iterable, List, Tuple, Union
+
+__all__ = ["StatsStore"]
+
+COUNTER_FIELDS = ("like_count", "share_count", "comment_count", "view_count")
+
+# Rows are clustered on (post_id, sampled_at) so a range query for a single post
+# is a contiguous scan of the table b-tree and no secondary index is required.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS post_stats (
+    post_id INTEGER NOT NULL,
+    sampled_at INTEGER NOT NULL,
+    like_count INTEGER NOT NULL,
+    share_count INTEGER NOT NULL,
+    comment_count INTEGER NOT NULL,
+    view_count INTEGER NOT NULL,
+    PRIMARY KEY (post_id, sampled_at)
+) WITHOUT ROWID
+"""
+
+
+def _to_epoch(timestamp: Union[datetime, int, None]) -> Union[int, None]:
+    if timestamp is None or isinstance(timestamp, int):
+        return timestamp
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp())
+
+
+def _from_epoch(epoch: int) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+class StatsStore:
+    """An append-only SQLite store of engagement counter samples for known posts.
+
+    A sample is only written when at least one counter differs from the last stored sample of the same post,
+    so posts that are refreshed often but rarely change only cost a row per change.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """Open (or create) a stats store.
+
+        Args:
+            path (str, optional): The path of the SQLite database file. Defaults to ":memory:".
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(SCHEMA)
+        self._connection.commit()
+        self._latest: Dict[int, Tuple[int, ...]] = {}
+
+    def __enter__(self) -> "StatsStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM post_stats").fetchone()[0]
+
+    def __last_counters(self, post_id: int) -> Union[Tuple[int, ...], None]:
+        if post_id not in self._latest:
+            row = self._connection.execute(
+                "SELECT like_count, share_count, comment_count, view_count FROM post_stats "
+                "WHERE post_id = ? ORDER BY sampled_at DESC LIMIT 1",
+                (post_id,),
+            ).fetchone()
+            self._latest[post_id] = row
+        return self._latest[post_id]
+
+    def append(self, stats: TikTokPostStats) -> bool:
+        """Record a single sample.
+
+        Args:
+            stats (TikTokPostStats): The sample to record.
+
+        Returns:
+            bool: If the sample was written, False if the counters were unchanged since the last sample.
+        """
+        return self.append_many([stats]) == 1
+
+    def append_many(self, samples: Iterable[TikTokPostStats]) -> int:
+        """Record many samples in a single transaction. Samples with a missing counter are skipped.
+
+        Args:
+            samples (Iterable[TikTokPostStats]): The samples to record.
+
+        Returns:
+            int: The number of samples that were written.
+        """
+        rows = []
+        written: Dict[int, Tuple[int, ...]] = {}
+        for stats in samples:
+            values = tuple(getattr(stats, field) for field in COUNTER_FIELDS)
+            # A missing counter is not a count of 0, storing it as one would create a fake delta.
+            if None in values:
+                continue
+
+            post_id = int(stats.post_id)
+            counters = tuple(int(value) for value in values)
+            last_counters = (
+                written[post_id]
+                if post_id in written
+                else self.__last_counters(post_id)
+            )
+            if last_counters == counters:
+                continue
+            written[post_id] = counters
+            rows.append((post_id, _to_epoch(stats.timestamp), *counters))
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO post_stats VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+        # Only cache the samples once they are stored, so a failed insert does not skip them next time.
+        self._latest.update(written)
+        return len(rows)
+
+    def __range_clause(
+        self,
+        start: Union[datetime, int, None],
+        end: Union[datetime, int, None],
+    ) -> Tuple[str, list]:
+        clause = ""
+        params = []
+        if start is not None:
+            clause += " AND sampled_at >= ?"
+            params.append(_to_epoch(start))
+        if end is not None:
+            clause += " AND sampled_at <= ?"
+            params.append(_to_epoch(end))
+        return clause, params
+
+    def samples(
+        self,
+        post_id: Union[str, int],
+        start: Union[datetime, int, None] = None,
+        end: Union[datetime, int, None] = None,
+    ) -> List[TikTokPostStats]:
+        """Get the stored samples of a post, oldest first.
+
+        Args:
+            post_id (str | int): The ID of the post.
+            start (datetime | int | None, optional): Only include samples taken at or after this time. Defaults to None.
+            end (datetime | int | None, optional): Only include samples taken at or before this time. Defaults to None.
+
+        Returns:
+            List[TikTokPostStats]: The samples in the given range.
+        """
+        clause, params = self.__range_clause(start, end)
+        rows = self._connection.execute(
+            "SELECT sampled_at, like_count, share_count, comment_count, view_count "
+            f"FROM post_stats WHERE post_id = ?{clause} ORDER BY sampled_at",
+            (int(post_id), *params),
+        )
+        return [
+            TikTokPostStats(str(post_id), _from_epoch(sampled_at), *counters)
+            for sampled_at, *counters in rows
+        ]
+
+    def deltas(
+        self,
+        post_id: Union[str, int],
+        start: Union[datetime, int, None] = None,
+        end: Union[datetime, int, None] = None,
+    ) -> List[TikTokPostStats]:
+        """Get the change in each counter between consecutive samples of a post, oldest first.
+
+        The first sample of a post has no predecessor, so its delta is the counters themselves.
+
+        Args:
+            post_id (str | int): The ID of the post.
+            start (datetime | int | None, optional): Only include deltas ending at or after this time. Defaults to None.
+            end (datetime | int | None, optional): Only include deltas ending at or before this time. Defaults to None.
+
+        Returns:
+            List[TikTokPostStats]: The deltas, timestamped with the time of the later sample.
+        """
+        clause, params = self.__range_clause(start, end)
+        delta_columns = ", ".join(
+            f"{field} - LAG({field}, 1, 0) OVER w" for field in COUNTER_FIELDS
+        )
+        # The window has to see the sample before `start`, so the range is applied after the LAG.
+        rows = self._connection.execute(
+            f"SELECT * FROM (SELECT sampled_at, {delta_columns} FROM post_stats "
+            "WHERE post_id = ? WINDOW w AS (ORDER BY sampled_at)) "
+            f"WHERE 1 = 1{clause} ORDER BY sampled_at",
+            (int(post_id), *params),
+        )
+        return [
+            TikTokPostStats(str(post_id), _from_epoch(sampled_at), *counters)
+            for sampled_at, *counters in rows
+        ]
+
+    def latest(self, post_id: Union[str, int]) -> Union[TikTokPostStats, None]:
+        """Get the most recent sample of a post.
+
+        Args:
+            post_id (str | int): The ID of the post.
+
+        Returns:
+            TikTokPostStats | None: The most recent sample, or None if the post has no samples.
+        """
+        row = self._connection.execute(
+            "SELECT sampled_at, like_count, share_count, comment_count, view_count FROM post_stats "
+            "WHERE post_id = ? ORDER BY sampled_at DESC LIMIT 1",
+            (int(post_id),),
+        ).fetchone()
+        if row is None:
+            return None
+        sampled_at, *counters = row
+        return TikTokPostStats(str(post_id), _from_epoch(sampled_at), *counters)
+
+    def post_ids(self) -> List[str]:
+        """Get the IDs of every post with at least one sample.
+
+        Returns:
+            List[str]: The post IDs.
+        """
+        rows = self._connection.execute("SELECT DISTINCT post_id FROM post_stats")
+        return [str(post_id) for post_id, in rows]
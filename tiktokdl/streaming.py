@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+
+from typing import BinaryIO, Callable, Union
+
+__all__ = ["AdaptiveChunker", "stream_to_file"]
+
+# Bounds of the size of a single read from the response.
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+
+# The chunk size is tuned so that a single read takes roughly this long at the observed throughput.
+TARGET_READ_INTERVAL = 0.025
+
+# How much weight the most recent read has when smoothing the observed throughput.
+THROUGHPUT_SMOOTHING = 0.3
+
+# The read buffer of each thread, kept between calls to `stream_to_file`.
+_buffers = threading.local()
+
+
+def _get_buffer(size: int) -> bytearray:
+    """Get the read buffer of the current thread, only allocating a new one if it is smaller than `size`."""
+    buffer = getattr(_buffers, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = _buffers.buffer = bytearray(size)
+    return buffer
+
+
+class AdaptiveChunker:
+    """Picks the size of the next read from the throughput observed so far.
+
+    Slow links get small reads so data is written and progress is seen regularly, fast links get large reads so the
+    number of Python level iterations and syscalls per byte stays low.
+    """
+
+    def __init__(
+        self,
+        initial_size: int = MIN_CHUNK_SIZE,
+        min_size: int = MIN_CHUNK_SIZE,
+        max_size: int = MAX_CHUNK_SIZE,
+        target_interval: float = TARGET_READ_INTERVAL,
+    ):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_interval = target_interval
+        self.size = max(min_size, min(initial_size, max_size))
+        self.throughput = None
+
+    def update(self, read_bytes: int, elapsed: float) -> int:
+        """Record a completed read and get the size of the next one.
+
+        Args:
+            read_bytes (int): The number of bytes that were read.
+            elapsed (float): The number of seconds the read took.
+
+        Returns:
+            int: The size of the next read in bytes.
+        """
+        if read_bytes <= 0:
+            return self.size
+
+        throughput = read_bytes / max(elapsed, 1e-6)
+        if self.throughput is None:
+            self.throughput = throughput
+        else:
+            self.throughput += THROUGHPUT_SMOOTHING * (throughput - self.throughput)
+
+        ideal_size = int(self.throughput * self.target_interval)
+        # Grow or shrink by at most a factor of two per read so a single outlier does not swing the size.
+        ideal_size = max(self.size // 2, min(ideal_size, self.size * 2))
+        self.size = max(self.min_size, min(ideal_size, self.max_size))
+        return self.size
+
+
+def stream_to_file(
+    source: BinaryIO,
+    path: str,
+    content_length: Union[int, None] = None,
+    chunker: Union[AdaptiveChunker, None] = None,
+    on_data: Union[Callable[[memoryview], None], None] = None,
+) -> int:
+    """Copy a readable binary stream, such as `requests.Response.raw`, to a file.
+
+    Reads go straight into a preallocated buffer with `readinto` and the buffer is only written out once it holds a
+    full chunk, so each write is large no matter how little a single read returns. The buffer is kept per thread and
+    reused by the next call, and is only as large as the stream when its length is known.
+
+    Args:
+        source (BinaryIO): The stream to read from, it must support `readinto`.
+        path (str): The path of the file to write.
+        content_length (int | None, optional): The expected size of the stream, used to reserve the file's disk space up front. Defaults to None.
+        chunker (AdaptiveChunker | None, optional): Picks the size of each read. Defaults to None, a new AdaptiveChunker.
+        on_data (Callable[[memoryview], None] | None, optional): Called with every block of data before it is written. The view is only valid during the call. Defaults to None.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    chunker = chunker or AdaptiveChunker()
+    buffer_size = chunker.max_size
+    if content_length:
+        buffer_size = min(buffer_size, content_length)
+    view = memoryview(_get_buffer(buffer_size))[:buffer_size]
+    written = 0
+    filled = 0
+
+    with open(path, "wb") as file:
+        preallocated = False
+        if content_length and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(file.fileno(), 0, content_length)
+                preallocated = True
+            except OSError:
+                pass
+
+        while True:
+            start = time.perf_counter()
+            chunk_size = min(chunker.size, buffer_size)
+            read = source.readinto(view[filled : filled + chunk_size])
+            if not read:
+                break
+
+            filled += read
+            if filled >= chunk_size:
+                if on_data is not None:
+                    on_data(view[:filled])
+                file.write(view[:filled])
+                written += filled
+                filled = 0
+            chunker.update(read, time.perf_counter() - start)
+
+        if filled:
+            if on_data is not None:
+                on_data(view[:filled])
+            file.write(view[:filled])
+            written += filled
+
+        if preallocated and written < content_length:
+            file.truncate(written)
+
+    view.release()
+    return written
@@ -35,3 +35,44 @@ CAPTCHA_VERSION = 2
 
 # The cookie that stores the device_id of the current session.
 DEVICE_ID_TARGET_COOKIE = "__tea_cache_tokens"
+
+# The TikTok homepage, used to establish a session before calling the API directly.
+TIKTOK_HOME_URL = "https://www.tiktok.com/"
+TIKTOK_DOMAIN = "tiktok.com"
+
+# The API endpoint that returns the details of a single post.
+ITEM_DETAIL_API_PATH = "/api/reflow/item/detail/"
+ITEM_DETAIL_API_URL = f"https://www.tiktok.com{ITEM_DETAIL_API_PATH}"
+ITEM_DETAIL_API_GLOB = f"**{ITEM_DETAIL_API_PATH}**"
+
+# The device emulated by the browser context.
+EMULATED_DEVICE = "iPhone 14 Pro Max"
+
+# URL patterns of analytics, monitoring and advertising requests made by the TikTok
+# web app.
+ANALYTICS_URL_PATTERNS = (
+    r"mon(-[a-z]+)?\.tiktokv\.(com|us)",
+    r"mcs(-[a-z]+)?\.tiktokv\.(com|us)",
+    r"log(-[a-z]+)?\.tiktokv\.(com|us)",
+    r"analytics\.tiktok\.com",
+    r"/monitor_browser/",
+    r"/web/report",
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+)
+
+# URL patterns of streamed media (video and audio) served by the TikTok CDNs.
+MEDIA_URL_PATTERNS = (
+    r"/video/tos/",
+    r"mime_type=video_mp4",
+    r"\.mp4(\?|$)",
+    r"\.mp3(\?|$)",
+)
+
+# The fields kept of each image of a slideshow post.
+SLIDESHOW_IMAGE_KEYS = ("image_url", "image_width", "image_height")
+
+# The headers used to download slideshow images. Images are streamed to disk undecoded,
+# so they must not be compressed.
+SLIDESHOW_IMAGE_HEADERS = {"accept-encoding": "identity"}
@@ -0,0 +1,231 @@
+"""Vectorised generation of human-like slide trajectories for the slide captcha.
+
+A trajectory is built from a template: a progress curve over normalised time that accelerates, overshoots the target
+slightly and settles back onto it, with a little smoothed jitter. Templates are precomputed in bulk, so generating a
+trajectory only samples the timing of each step, looks up a template and scales it to the target offset.
+
+The captcha only sends the steps, so `generate_json` serialises them straight from the arrays. That skips a dict per
+step, and JSON encoding those dicts cost more than generating the trajectory itself.
+"""
+
+from math import ceil
+
+import numpy as np
+
+from typing import Dict, List, Tuple, Union
+
+__all__ = ["TrajectoryGenerator", "generate_trajectory", "generate_trajectory_json"]
+
+# The delay in ms between the challenge being shown and the first movement.
+START_DELAY_RANGE = (200, 400)
+
+# The interval in ms between two movement events, inclusive.
+STEP_INTERVAL_RANGE = (8, 9)
+
+# The average distance in px covered per movement event.
+STEP_DISTANCE_RANGE = (2.5, 4.5)
+
+# The exponent applied to normalised time, above 1 the slide starts slowly and accelerates.
+ACCELERATION_RANGE = (1.6, 2.4)
+
+# The "back" easing constant, 0 never overshoots and 1.7 overshoots by roughly 10% before settling.
+OVERSHOOT_RANGE = (0.0, 1.2)
+
+# The standard deviation of the jitter added to a template, as a fraction of the target offset.
+JITTER_SCALE = 0.004
+
+# The maximum vertical drift in px from tip_y while sliding.
+MAX_Y_DRIFT = 2
+
+# A single step of a trajectory as JSON, in the format expected by TikTok.
+STEP_JSON_FORMAT = '{{"x":{},"y":{},"relative_time":{}}}'
+
+
+def _smooth(noise: np.ndarray, window: int) -> np.ndarray:
+    """Moving average along the last axis, computed with a cumulative sum."""
+    padded = np.concatenate(
+        [np.zeros(noise.shape[:-1] + (1,)), np.cumsum(noise, axis=-1)], axis=-1
+    )
+    smoothed = (padded[..., window:] - padded[..., :-window]) / window
+    pad = noise.shape[-1] - smoothed.shape[-1]
+    return np.pad(
+        smoothed,
+        [(0, 0)] * (noise.ndim - 1) + [(pad // 2, pad - pad // 2)],
+        mode="edge",
+    )
+
+
+def build_templates(rng: np.random.Generator, count: int, points: int) -> np.ndarray:
+    """Build progress curves that start at 0 and end at exactly 1.
+
+    Args:
+        rng (np.random.Generator): The random generator to draw the template parameters from.
+        count (int): The number of templates to build.
+        points (int): The number of points in each template, evenly spaced over normalised time.
+
+    Returns:
+        np.ndarray: An array of shape (count, points) of progress values.
+    """
+    t = np.linspace(0.0, 1.0, points)
+    acceleration = rng.uniform(*ACCELERATION_RANGE, size=(count, 1))
+    overshoot = rng.uniform(*OVERSHOOT_RANGE, size=(count, 1))
+
+    # Ease-out-back on accelerated time: overshoots past 1 and comes back to exactly 1 at t = 1.
+    eased = t**acceleration - 1.0
+    progress = 1.0 + (overshoot + 1.0) * eased**3 + overshoot * eased**2
+
+    # Jitter fades out at both ends, so every template still starts at 0 and ends at 1.
+    jitter = _smooth(rng.normal(0.0, JITTER_SCALE, size=(count, points)), 9)
+    progress += jitter * np.sin(np.pi * t)
+
+    return np.clip(progress, 0.0, None)
+
+
+class TrajectoryGenerator:
+    """Generates slide trajectories from a library of precomputed templates.
+
+    The generator is seeded, so a generator created with the same seed produces the same sequence of trajectories.
+    """
+
+    def __init__(
+        self,
+        seed: Union[int, None] = None,
+        templates: int = 128,
+        template_points: int = 256,
+    ):
+        """Create a trajectory generator and precompute its templates.
+
+        Args:
+            seed (int | None, optional): The seed of the random generator. Defaults to None, a random seed.
+            templates (int, optional): The number of templates to precompute. Defaults to 128.
+            template_points (int, optional): The resolution of each template. Defaults to 256.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.templates = build_templates(self.rng, templates, template_points)
+        self._template_time = np.linspace(0.0, 1.0, template_points)
+
+    def generate_arrays(
+        self, target_position: int, tip_y_value: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Generate a trajectory as arrays.
+
+        Args:
+            target_position (int): The target piece X position.
+            tip_y_value (int): The tip_y value given by the challenge.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: The x position, y position, relative time in ms and interval since the previous step in ms of every step.
+        """
+        target_position = max(int(target_position), 0)
+
+        # Draw everything in two calls, as the per-call overhead dominates for short slides.
+        step_distance, start_delay, template_choice = self.rng.random(3)
+        step_distance = STEP_DISTANCE_RANGE[0] + step_distance * (
+            STEP_DISTANCE_RANGE[1] - STEP_DISTANCE_RANGE[0]
+        )
+        step_count = max(2, ceil(target_position / step_distance))
+        interval_draws, drift_draws = self.rng.random((2, step_count))
+
+        interval_span = STEP_INTERVAL_RANGE[1] - STEP_INTERVAL_RANGE[0] + 1
+        intervals = STEP_INTERVAL_RANGE[0] + (interval_draws * interval_span).astype(
+            np.int64
+        )
+        elapsed = np.cumsum(intervals)
+        delay_span = START_DELAY_RANGE[1] - START_DELAY_RANGE[0] + 1
+        times = elapsed + (START_DELAY_RANGE[0] + int(start_delay * delay_span))
+
+        template = self.templates[int(template_choice * len(self.templates))]
+        progress = np.interp(elapsed / elapsed[-1], self._template_time, template)
+
+        x = np.rint(progress * target_position).astype(np.int64)
+        x[-1] = target_position
+
+        drift = np.cumsum((drift_draws * 3).astype(np.int64) - 1)
+        # np.clip and np.diff(prepend=...) cost several times more than the ufuncs they wrap on arrays this short.
+        y = tip_y_value + np.minimum(np.maximum(drift, -MAX_Y_DRIFT), MAX_Y_DRIFT)
+        y[-1] = tip_y_value
+
+        return x, y, times, intervals
+
+    def generate(
+        self, target_position: int, tip_y_value: int
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Generate a trajectory in the format expected by TikTok.
+
+        Args:
+            target_position (int): The target piece X position.
+            tip_y_value (int): The tip_y value given by the challenge.
+
+        Returns:
+            Tuple[List[Dict], List[Dict]]: The steps of the solution required by TikTok, and the deltas between each step.
+        """
+        x, y, times, intervals = self.generate_arrays(target_position, tip_y_value)
+
+        delta_x = x.copy()
+        delta_x[1:] -= x[:-1]
+        delta_y = y - tip_y_value
+        delta_y[1:] = y[1:] - y[:-1]
+
+        steps = [
+            {"x": step_x, "y": step_y, "relative_time": step_time}
+            for step_x, step_y, step_time in zip(x.tolist(), y.tolist(), times.tolist())
+        ]
+        deltas = [
+            {"x": step_x, "y": step_y, "time": step_time}
+            for step_x, step_y, step_time in zip(
+                delta_x.tolist(), delta_y.tolist(), intervals.tolist()
+            )
+        ]
+        return steps, deltas
+
+    def generate_json(self, target_position: int, tip_y_value: int) -> str:
+        """Generate the steps of a trajectory as a JSON array in the format expected by TikTok.
+
+        Args:
+            target_position (int): The target piece X position.
+            tip_y_value (int): The tip_y value given by the challenge.
+
+        Returns:
+            str: The steps of the solution required by TikTok as JSON.
+        """
+        x, y, times, _ = self.generate_arrays(target_position, tip_y_value)
+        steps = map(STEP_JSON_FORMAT.format, x.tolist(), y.tolist(), times.tolist())
+        return f"[{','.join(steps)}]"
+
+
+_default_generator: Union[TrajectoryGenerator, None] = None
+
+
+def _get_default_generator() -> TrajectoryGenerator:
+    global _default_generator
+    if _default_generator is None:
+        _default_generator = TrajectoryGenerator()
+    return _default_generator
+
+
+def generate_trajectory(
+    target_position: int, tip_y_value: int
+) -> Tuple[List[Dict], List[Dict]]:
+    """Generate a trajectory with a shared, lazily created generator.
+
+    Args:
+        target_position (int): The target piece X position.
+        tip_y_value (int): The tip_y value given by the challenge.
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: The steps of the solution required by TikTok, and the deltas between each step.
+    """
+    return _get_default_generator().generate(target_position, tip_y_value)
+
+
+def generate_trajectory_json(target_position: int, tip_y_value: int) -> str:
+    """Generate the steps of a trajectory as JSON with a shared, lazily created generator.
+
+    Args:
+        target_position (int): The target piece X position.
+        tip_y_value (int): The tip_y value given by the challenge.
+
+    Returns:
+        str: The steps of the solution required by TikTok as JSON.
+    """
+    return _get_default_generator().generate_json(target_position, tip_y_value)
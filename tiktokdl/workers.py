@@ -0,0 +1,342 @@
+"""Shard `get_post` calls over several worker processes, each with its own event loop and browser pool."""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait
+from queue import Empty
+
+from tiktokdl.post_data import TikTokSlide, TikTokVideo
+
+from typing import Awaitable, Callable, Dict, Iterable, List, Literal, Tuple, Union
+
+__all__ = ["WorkerResult", "WorkerSupervisor"]
+
+# How long a worker waits on its own queue before trying to steal from the others.
+QUEUE_POLL_INTERVAL = 0.05
+
+# How often the supervisor checks on its workers while waiting for results.
+SUPERVISOR_POLL_INTERVAL = 0.5
+
+
+@dataclass()
+class WorkerResult:
+    url: str
+    worker_id: int
+    duration: float
+    post: Union[TikTokSlide, TikTokVideo, None] = None
+    error: Union[str, None] = None
+
+
+@dataclass()
+class WorkerMetrics:
+    worker_id: int
+    processed: int = 0
+    failed: int = 0
+    stolen: int = 0
+    busy_time: float = 0
+    lifetime: float = 0
+
+
+@dataclass()
+class SupervisorMetrics:
+    workers: int = 0
+    processed: int = 0
+    failed: int = 0
+    stolen: int = 0
+    restarts: int = 0
+    wall_time: float = 0
+    busy_time: float = 0
+    per_worker: Dict[int, WorkerMetrics] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.processed / self.wall_time if self.wall_time else 0
+
+    @property
+    def utilisation(self) -> float:
+        if not self.wall_time or not self.workers:
+            return 0
+        return self.busy_time / (self.wall_time * self.workers)
+
+
+def _take_url(worker_id: int, queues: List[multiprocessing.Queue]):
+    """Take the next URL from the worker's own queue, or steal one from another worker's queue when it is empty.
+
+    Returns:
+        Tuple[str | None, bool]: The URL, or None if every queue is empty, and if the URL was stolen.
+    """
+    try:
+        return queues[worker_id].get(timeout=QUEUE_POLL_INTERVAL), False
+    except Empty:
+        pass
+
+    for offset in range(1, len(queues)):
+        victim = queues[(worker_id + offset) % len(queues)]
+        try:
+            return victim.get(timeout=QUEUE_POLL_INTERVAL), True
+        except Empty:
+            continue
+
+    return None, False
+
+
+async def _worker_loop(
+    worker_id: int,
+    queues: List[multiprocessing.Queue],
+    results: Connection,
+    concurrency: int,
+    pool_kwargs: dict,
+    get_post_kwargs: dict,
+    handler: Union[Callable[..., Awaitable], None] = None,
+):
+    from tiktokdl.browser_pool import BrowserPool
+
+    if handler is None:
+        from tiktokdl.download_post import get_post as handler
+
+    metrics = WorkerMetrics(worker_id)
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+
+    async def consume(pool: BrowserPool):
+        while True:
+            url, stolen = await loop.run_in_executor(None, _take_url, worker_id, queues)
+            if url is None:
+                return
+
+            # Sent straight to the pipe, so the supervisor knows about the URL even if this process crashes on it.
+            results.send(("started", worker_id, url))
+            metrics.stolen += stolen
+            start = time.perf_counter()
+            result = WorkerResult(url=url, worker_id=worker_id, duration=0)
+            try:
+                result.post = await handler(url, pool=pool, **get_post_kwargs)
+            except Exception as e:
+                result.error = f"{e.__class__.__name__}: {e!s}"
+                metrics.failed += 1
+
+            result.duration = time.perf_counter() - start
+            metrics.processed += 1
+            metrics.busy_time += result.duration
+            results.send(("done", worker_id, result))
+
+    # The browser is launched when the handler first acquires a context, so handlers that never use it do not need one.
+    pool = BrowserPool(size=concurrency, **pool_kwargs)
+    try:
+        await asyncio.gather(*(consume(pool) for _ in range(concurrency)))
+    finally:
+        await pool.close()
+
+    metrics.lifetime = time.perf_counter() - started
+    results.send(("metrics", worker_id, metrics))
+
+
+def _worker_main(
+    worker_id: int,
+    queues: List[multiprocessing.Queue],
+    results: Connection,
+    concurrency: int,
+    pool_kwargs: dict,
+    get_post_kwargs: dict,
+    handler: Union[Callable[..., Awaitable], None] = None,
+):
+    asyncio.run(
+        _worker_loop(
+            worker_id,
+            queues,
+            results,
+            concurrency,
+            pool_kwargs,
+            get_post_kwargs,
+            handler,
+        )
+    )
+
+
+class WorkerSupervisor:
+    """Spawns worker processes that each run `get_post` with their own event loop and browser pool.
+
+    URLs are dealt out to a queue per worker. A worker that runs out of its own URLs steals from the queues of the others,
+    so no worker sits idle while another still has a backlog. Workers that crash are restarted and the URLs they were
+    working on are given back to their queue.
+    """
+
+    def __init__(
+        self,
+        workers: Union[int, None] = None,
+        concurrency: int = 4,
+        browser: Literal["chromium", "firefox", "webkit"] = "firefox",
+        proxy: Union[dict, None] = None,
+        headless: Union[bool, None] = None,
+        profile: Union[str, None] = None,
+        max_restarts: int = 3,
+        max_attempts: int = 2,
+        pool_options: Union[dict, None] = None,
+        handler: Union[Callable[..., Awaitable], None] = None,
+        **get_post_kwargs,
+    ):
+        """Create a supervisor. Any extra keyword arguments are passed on to `get_post`.
+
+        Args:
+            workers (int | None, optional): The number of worker processes. Defaults to None, the number of CPUs.
+            concurrency (int, optional): The number of posts each worker gets at once, and the size of its browser pool. Defaults to 4.
+            browser (Literal[&quot;chromium&quot;, &quot;firefox&quot;, &quot;webkit&quot;], optional): The browser framework to use. Defaults to "firefox".
+            proxy (dict | None, optional): The proxy settings to use for the browsers. Defaults to None.
+            headless (bool | None, optional): If the browsers should be headless. Defaults to None.
+            profile (str | None, optional): The name of the browser context profile to use. Defaults to None, the default profile.
+            max_restarts (int, optional): The number of times each worker may be restarted after crashing. Defaults to 3.
+            max_attempts (int, optional): The number of times a URL may be in flight on a crashing worker before it is given up on. Defaults to 2.
+            pool_options (dict | None, optional): Extra keyword arguments for the browser pool of each worker, eg. `max_rss` or `recycle_after` to bound the memory of long runs. Defaults to None.
+            handler (Callable[..., Awaitable] | None, optional): The coroutine function called as `handler(url, pool=pool, **get_post_kwargs)` for every URL. It is sent to the worker processes, so it has to be a module level function. Defaults to None, `get_post`.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.max_restarts = max_restarts
+        self.max_attempts = max_attempts
+        self.pool_kwargs = {
+            "browser": browser,
+            "proxy": proxy,
+            "headless": headless,
+            "profile": profile,
+            **(pool_options or {}),
+        }
+        self.get_post_kwargs = get_post_kwargs
+        self.handler = handler
+        self.metrics = SupervisorMetrics()
+
+        self._mp_context = multiprocessing.get_context("spawn")
+
+    def __spawn(
+        self, worker_id: int, queues
+    ) -> Tuple[multiprocessing.Process, Connection]:
+        results, worker_results = self._mp_context.Pipe(duplex=False)
+        process = self._mp_context.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                queues,
+                worker_results,
+                self.concurrency,
+                self.pool_kwargs,
+                self.get_post_kwargs,
+                self.handler,
+            ),
+            daemon=True,
+        )
+        process.start()
+        worker_results.close()
+        return process, results
+
+    def run(self, urls: Iterable[str]) -> List[WorkerResult]:
+        """Get every URL across the worker processes and wait for them all to finish.
+
+        Args:
+            urls (Iterable[str]): The URLs to get.
+
+        Returns:
+            List[WorkerResult]: A result for every URL, in the order they finished.
+        """
+        urls = list(urls)
+        self.metrics = SupervisorMetrics(workers=self.workers)
+        started = time.perf_counter()
+
+        queues = [self._mp_context.Queue() for _ in range(self.workers)]
+        for idx, url in enumerate(urls):
+            queues[idx % self.workers].put(url)
+
+        processes: Dict[int, multiprocessing.Process] = {}
+        results: Dict[int, Connection] = {}
+        for worker_id in range(self.workers):
+            processes[worker_id], results[worker_id] = self.__spawn(worker_id, queues)
+        restarts = {worker_id: 0 for worker_id in processes}
+        in_flight = {worker_id: [] for worker_id in processes}
+        attempts: Dict[str, int] = {}
+        finished: List[WorkerResult] = []
+
+        def handle_messages(connection: Connection):
+            try:
+                while connection.poll():
+                    kind, worker_id, payload = connection.recv()
+                    if kind == "started":
+                        in_flight[worker_id].append(payload)
+                        attempts[payload] = attempts.get(payload, 0) + 1
+                    elif kind == "done":
+                        in_flight[worker_id].remove(payload.url)
+                        finished.append(payload)
+                    elif kind == "metrics":
+                        self.metrics.per_worker[worker_id] = payload
+            except EOFError:
+                # The worker exited, it is picked up below.
+                pass
+
+        while processes:
+            for connection in wait(list(results.values()), SUPERVISOR_POLL_INTERVAL):
+                handle_messages(connection)
+
+            exited = [
+                worker_id
+                for worker_id, process in processes.items()
+                if not process.is_alive()
+            ]
+            if not exited:
+                continue
+
+            for worker_id in exited:
+                process = processes.pop(worker_id)
+                process.join()
+                # Read everything the worker sent before deciding what it was still working on.
+                connection = results.pop(worker_id)
+                handle_messages(connection)
+                connection.close()
+                if process.exitcode == 0:
+                    continue
+
+                for url in in_flight[worker_id]:
+                    if attempts[url] < self.max_attempts:
+                        queues[worker_id].put(url)
+                    else:
+                        finished.append(
+                            WorkerResult(
+                                url=url,
+                                worker_id=worker_id,
+                                duration=0,
+                                error=f"Worker crashed with exit code {process.exitcode}",
+                            )
+                        )
+                in_flight[worker_id].clear()
+
+                if restarts[worker_id] < self.max_restarts:
+                    restarts[worker_id] += 1
+                    self.metrics.restarts += 1
+                    processes[worker_id], results[worker_id] = self.__spawn(
+                        worker_id, queues
+                    )
+
+        for queue in queues:
+            queue.cancel_join_thread()
+            queue.close()
+
+        # Anything left over was queued for workers that crashed too many times.
+        done_urls = {result.url for result in finished}
+        for url in urls:
+            if url not in done_urls:
+                finished.append(
+                    WorkerResult(
+                        url=url,
+                        worker_id=-1,
+                        duration=0,
+                        error="No worker was left to process the URL",
+                    )
+                )
+
+        self.metrics.wall_time = time.perf_counter() - started
+        for worker_metrics in self.metrics.per_worker.values():
+            self.metrics.stolen += worker_metrics.stolen
+            self.metrics.busy_time += worker_metrics.busy_time
+        self.metrics.processed = len(finished)
+        self.metrics.failed = sum(1 for result in finished if result.error is not None)
+
+        return finished